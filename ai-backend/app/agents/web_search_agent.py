@@ -1,18 +1,15 @@
-import os
-from langchain_ollama import ChatOllama
 from langchain.agents import initialize_agent, AgentType
+from app.core.llm_registry import get_chat_model
+from app.core.resources import lazy_resource
 from app.langchain_tools.web_search_tool import web_search_tool
 
-# Initialize the Ollama LLM
-llm = ChatOllama(
-    model="gemma3:4b",  # adjust model name if needed
-    base_url=os.getenv("OLLAMA_HOST", "http://192.168.1.20:11434")
-)
-
-# Initialize the agent with the LLM and your tool
-agent_executor = initialize_agent(
-    tools=[web_search_tool],
-    llm=llm,
-    agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-    verbose=True
+# Initialize the agent with the shared pooled LLM and your tool on first use
+agent_executor = lazy_resource(
+    "web_search_agent",
+    lambda: initialize_agent(
+        tools=[web_search_tool],
+        llm=get_chat_model("gemma3:4b"),
+        agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        verbose=True,
+    ),
 )
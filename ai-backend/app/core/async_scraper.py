@@ -0,0 +1,160 @@
+import asyncio
+import codecs
+import os
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.html_extract import PageFieldExtractor
+from app.core.logger_config import logger
+from app.core.page_cache import PageCache, page_cache
+
+SCRAPE_MAX_CONNECTIONS = int(os.getenv("SCRAPE_MAX_CONNECTIONS", "32"))
+SCRAPE_MAX_PER_HOST = int(os.getenv("SCRAPE_MAX_PER_HOST", "4"))
+SCRAPE_TIMEOUT_SECONDS = float(os.getenv("SCRAPE_TIMEOUT_SECONDS", "5"))
+SCRAPE_DEADLINE_SECONDS = float(os.getenv("SCRAPE_DEADLINE_SECONDS", "8"))
+SCRAPE_MAX_BYTES = int(os.getenv("SCRAPE_MAX_BYTES", str(512 * 1024)))
+# Characters of main article text to return per page (0 = title/description only)
+SCRAPE_ARTICLE_CHARS = int(os.getenv("SCRAPE_ARTICLE_CHARS", "0"))
+
+_USER_AGENT = "Mozilla/5.0 (compatible; AI-HandsOn-Scraper/1.0)"
+
+
+def failed_page(url: str, reason: str) -> dict:
+    return {"url": url, "title": "Failed to fetch", "description": reason}
+
+
+class AsyncScraper:
+    """
+    Concurrent page scraper sharing one pooled, keep-alive HTTP client.
+
+    Requests to the same host are capped by a per-host semaphore, bodies are
+    streamed into an incremental extractor and the download stops as soon as
+    the fields are known or `max_bytes` is reached, and `scrape_many`
+    returns whatever finished before the overall deadline, marking the rest
+    failed. Extracted fields are kept in a persistent page cache and stale
+    entries are revalidated with conditional GETs.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = SCRAPE_MAX_CONNECTIONS,
+        max_per_host: int = SCRAPE_MAX_PER_HOST,
+        timeout: float = SCRAPE_TIMEOUT_SECONDS,
+        max_bytes: int = SCRAPE_MAX_BYTES,
+        article_chars: int = SCRAPE_ARTICLE_CHARS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        cache: Optional[PageCache] = page_cache,
+    ):
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.article_chars = article_chars
+        self._transport = transport
+        self.cache = cache
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # httpx clients and semaphores are bound to the loop that created them
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                timeout=self.timeout,
+                follow_redirects=True,
+                headers={"User-Agent": _USER_AGENT},
+                transport=self._transport,
+            )
+            self._loop = loop
+            self._host_limits = {}
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        return self._host_limits[host]
+
+    async def _extract(self, response: httpx.Response) -> tuple[dict, int]:
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(
+            errors="replace"
+        )
+        extractor = PageFieldExtractor(article_chars=self.article_chars)
+        received = 0
+        async for block in response.aiter_bytes():
+            block = block[: self.max_bytes - received]
+            received += len(block)
+            if extractor.feed(decoder.decode(block)) or received >= self.max_bytes:
+                break
+        extractor.feed(decoder.decode(b"", final=True))
+        extractor.close()
+        return extractor.fields(), received
+
+    async def fetch(self, url: str) -> dict:
+        client = self._get_client()
+        try:
+            cached = (
+                await asyncio.to_thread(self.cache.get, url) if self.cache else None
+            )
+            if cached and cached.fresh:
+                self.cache.record_hit(cached)
+                return {"url": url, **cached.fields}
+
+            headers = cached.validators() if cached else {}
+            started = time.perf_counter()
+            async with self._host_limit(url):
+                async with client.stream("GET", url, headers=headers) as response:
+                    if response.status_code == 304 and cached:
+                        await asyncio.to_thread(
+                            self.cache.refresh, url, response.headers
+                        )
+                        self.cache.record_revalidated(cached)
+                        return {"url": url, **cached.fields}
+                    response.raise_for_status()
+                    fields, received = await self._extract(response)
+
+            if self.cache:
+                fetch_ms = (time.perf_counter() - started) * 1000
+                self.cache.record_fetch(received, changed=bool(headers))
+                await asyncio.to_thread(
+                    self.cache.put, url, fields, response.headers, received, fetch_ms
+                )
+            return {"url": url, **fields}
+        except Exception as e:
+            logger.warning(f"⚠️ Scraping {url} failed: {e!r}")
+            return failed_page(url, str(e) or type(e).__name__)
+
+    async def scrape_many(
+        self, urls: List[str], deadline: float = SCRAPE_DEADLINE_SECONDS
+    ) -> List[dict]:
+        """Scrape `urls` concurrently; results keep the input order."""
+        if not urls:
+            return []
+        tasks = [asyncio.create_task(self.fetch(url)) for url in urls]
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"⏱️ {len(pending)} URL(s) missed the {deadline}s deadline")
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        return [
+            task.result() if task in done else failed_page(url, "Deadline exceeded")
+            for url, task in zip(urls, tasks)
+        ]
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+scraper = AsyncScraper()
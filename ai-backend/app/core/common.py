@@ -1,3 +1,4 @@
-import os
-from langchain_ollama import ChatOllama
-llm = ChatOllama(model="gemma3:4b", base_url=os.getenv("OLLAMA_HOST"))
+from app.core.llm_registry import get_chat_model
+from app.core.resources import lazy_resource
+
+llm = lazy_resource("chat_llm", lambda: get_chat_model("gemma3:4b"))
@@ -0,0 +1,9 @@
+"""
+Loads `.env` into the environment. Entry points (app.main, the CLIs) import
+this before any other app module, since those read their configuration at
+import time.
+"""
+
+from dotenv import load_dotenv
+
+load_dotenv()
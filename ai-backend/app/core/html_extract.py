@@ -0,0 +1,167 @@
+from html.parser import HTMLParser
+from typing import Optional
+
+# Containers whose text never belongs to the title, description or article
+_SKIP_TAGS = {"script", "style", "noscript", "template", "svg"}
+_ARTICLE_SKIP_TAGS = _SKIP_TAGS | {"nav", "header", "footer", "aside", "form"}
+_ARTICLE_TEXT_TAGS = {"p", "h1", "h2", "h3", "h4", "li", "blockquote", "pre"}
+
+
+class _StopParsing(Exception):
+    pass
+
+
+class PageFieldExtractor(HTMLParser):
+    """
+    Incremental extractor for a page's <title>, meta description and first
+    <p>, with optional main-text capture capped at `article_chars`.
+
+    Feed it HTML as it arrives; `done` turns true as soon as every requested
+    field is known, so the caller can stop downloading and parsing.
+    """
+
+    def __init__(self, article_chars: int = 0):
+        super().__init__(convert_charrefs=True)
+        self.article_chars = article_chars
+        self.title: Optional[str] = None
+        self.meta_description: Optional[str] = None
+        self.first_paragraph: Optional[str] = None
+        self.done = False
+
+        self._title_parts: Optional[list] = None
+        self._paragraph_parts: Optional[list] = None
+        self._skip_depth = 0
+        self._article_skip_depth = 0
+        self._article_parts: list = []
+        self._article_len = 0
+        self._article_block: Optional[list] = None
+        self._head_closed = False
+
+    # ---- state ----
+    def _check_done(self):
+        # A body paragraph only settles the description once the <head>,
+        # where a meta description would live, is behind us
+        head_ready = self.title is not None and (
+            self.meta_description is not None
+            or (self.first_paragraph is not None and self._head_closed)
+        )
+        article_ready = self._article_len >= self.article_chars
+        if head_ready and article_ready:
+            self.done = True
+            raise _StopParsing
+
+    def feed(self, data: str) -> bool:
+        if self.done:
+            return True
+        try:
+            super().feed(data)
+        except _StopParsing:
+            pass
+        return self.done
+
+    def close(self):
+        if not self.done:
+            try:
+                super().close()
+            except _StopParsing:
+                pass
+        self._finish_title()
+
+    def _finish_title(self):
+        if self._title_parts is not None and self.title is None:
+            self.title = "".join(self._title_parts).strip()
+        self._title_parts = None
+
+    # ---- HTMLParser hooks ----
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        if tag in _ARTICLE_SKIP_TAGS:
+            self._article_skip_depth += 1
+
+        if tag == "title" and self.title is None:
+            self._title_parts = []
+        elif tag == "meta" and self.meta_description is None:
+            attributes = dict(attrs)
+            if (attributes.get("name") or "").lower() == "description" and (
+                attributes.get("content")
+            ):
+                self.meta_description = attributes["content"]
+                self._check_done()
+        elif tag == "p" and self.first_paragraph is None:
+            self._paragraph_parts = []
+        elif tag == "body":
+            self._head_closed = True
+
+        if (
+            self.article_chars
+            and tag in _ARTICLE_TEXT_TAGS
+            and not self._article_skip_depth
+        ):
+            self._article_block = []
+
+    def handle_startendtag(self, tag, attrs):
+        # <meta ... /> and friends never open a container
+        self.handle_starttag(tag, attrs)
+        if tag in _SKIP_TAGS:
+            self._skip_depth -= 1
+        if tag in _ARTICLE_SKIP_TAGS:
+            self._article_skip_depth -= 1
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        if tag in _ARTICLE_SKIP_TAGS and self._article_skip_depth:
+            self._article_skip_depth -= 1
+
+        if tag == "head":
+            self._head_closed = True
+        elif tag == "title" and self._title_parts is not None:
+            self._finish_title()
+            self._check_done()
+        elif tag == "p" and self._paragraph_parts is not None:
+            self.first_paragraph = "".join(self._paragraph_parts)
+            self._paragraph_parts = None
+            self._check_done()
+
+        if tag in _ARTICLE_TEXT_TAGS and self._article_block is not None:
+            text = " ".join("".join(self._article_block).split())
+            self._article_block = None
+            if text:
+                remaining = self.article_chars - self._article_len
+                self._article_parts.append(text[:remaining])
+                self._article_len += min(len(text), remaining)
+                self._check_done()
+
+    def handle_data(self, data):
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+            return
+        if self._skip_depth:
+            return
+        if self._paragraph_parts is not None:
+            self._paragraph_parts.append(data)
+        if self._article_block is not None:
+            self._article_block.append(data)
+
+    # ---- result ----
+    @property
+    def article(self) -> str:
+        return "\n".join(self._article_parts)
+
+    def fields(self) -> dict:
+        description = self.meta_description or self.first_paragraph
+        result = {
+            "title": self.title or "No title",
+            "description": description or "No description",
+        }
+        if self.article_chars:
+            result["content"] = self.article
+        return result
+
+
+def extract_page_fields(html: str, article_chars: int = 0) -> dict:
+    extractor = PageFieldExtractor(article_chars=article_chars)
+    extractor.feed(html)
+    extractor.close()
+    return extractor.fields()
@@ -0,0 +1,371 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from langchain_ollama import ChatOllama
+from pydantic import PrivateAttr
+
+from app.core.logger_config import logger
+from app.core.ollama_balancer import (
+    OLLAMA_HOSTS,
+    OllamaBalancer,
+    default_client_kwargs,
+)
+from app.core.resources import lazy_resource
+
+# How long Ollama keeps a model loaded after a request (e.g. "30m", "-1")
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE") or None
+OLLAMA_NUM_CTX = (
+    int(os.getenv("OLLAMA_NUM_CTX")) if os.getenv("OLLAMA_NUM_CTX") else None
+)
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "32"))
+OLLAMA_TIMEOUT_SECONDS = float(os.getenv("OLLAMA_TIMEOUT_SECONDS", "300"))
+# Comma separated models loaded at startup, e.g. "gemma3:4b,llama3.1:8b"
+OLLAMA_WARMUP_MODELS = [
+    m.strip() for m in os.getenv("OLLAMA_WARMUP_MODELS", "").split(",") if m.strip()
+]
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "30"))
+# Per-model concurrency overrides, e.g. "gemma3:4b=4,llama3.1:8b=2"
+LLM_MODEL_CONCURRENCY = {
+    name.strip(): int(limit)
+    for name, _, limit in (
+        item.rpartition("=")
+        for item in os.getenv("LLM_MODEL_CONCURRENCY", "").split(",")
+        if "=" in item
+    )
+}
+
+
+class ModelBusyError(RuntimeError):
+    """Raised when a model's request queue is full or the wait timed out."""
+
+    def __init__(self, model: str, reason: str):
+        super().__init__(f"Model '{model}' is busy: {reason}")
+        self.model = model
+
+
+class _ThreadWaiter:
+    def __init__(self):
+        self.event = threading.Event()
+        self.abandoned = False
+
+    def grant(self) -> bool:
+        self.event.set()
+        return True
+
+
+class _AsyncWaiter:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+        self.abandoned = False
+
+    def grant(self) -> bool:
+        # Called under the limiter lock, possibly from another thread
+        if self.abandoned:
+            return False
+        self.granted = True
+        self.loop.call_soon_threadsafe(self._resolve)
+        return True
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class ConcurrencyLimiter:
+    """
+    FIFO concurrency limit shared by sync (thread) and async callers.
+
+    At most `max_concurrency` requests run at once; up to `max_queue` more
+    wait in line, and anything beyond that, or waiting longer than
+    `queue_timeout`, fails fast with ModelBusyError instead of piling up.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_queue: int = LLM_MAX_QUEUE,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT_SECONDS,
+    ):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters: deque = deque()
+        self._completed = 0
+        self._rejected = 0
+        self._wait_ms_total = 0.0
+
+    def _enter_or_enqueue(self, waiter) -> bool:
+        """Take a free slot (True) or join the queue (False). Holds the lock."""
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self._rejected += 1
+            raise ModelBusyError(self.model, f"{len(self._waiters)} requests queued")
+        self._waiters.append(waiter)
+        return False
+
+    def _abandon(self, waiter) -> bool:
+        """Leave the queue; True if a slot was already handed to `waiter`."""
+        with self._lock:
+            waiter.abandoned = True
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                self._rejected += 1
+                return False
+            return True
+
+    def release(self):
+        with self._lock:
+            self._completed += 1
+            while self._waiters:
+                # The slot moves straight to the next live waiter
+                if self._waiters.popleft().grant():
+                    return
+            self._active -= 1
+
+    def _record_wait(self, started: float):
+        with self._lock:
+            self._wait_ms_total += (time.perf_counter() - started) * 1000
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        started = time.perf_counter()
+        waiter = _ThreadWaiter()
+        with self._lock:
+            entered = self._enter_or_enqueue(waiter)
+        if not entered and not waiter.event.wait(self.queue_timeout):
+            if not self._abandon(waiter):
+                raise ModelBusyError(self.model, "timed out waiting in queue")
+        self._record_wait(started)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[None]:
+        started = time.perf_counter()
+        waiter = _AsyncWaiter(asyncio.get_running_loop())
+        with self._lock:
+            entered = self._enter_or_enqueue(waiter)
+        if not entered:
+            try:
+                await asyncio.wait_for(waiter.future, self.queue_timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                if self._abandon(waiter):
+                    # Granted while we were giving up: hand the slot back
+                    self.release()
+                if isinstance(e, asyncio.TimeoutError):
+                    raise ModelBusyError(self.model, "timed out waiting in queue")
+                raise
+        self._record_wait(started)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            admitted = self._completed + self._active
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queued": len(self._waiters),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_queue_wait_ms": (
+                    round(self._wait_ms_total / admitted, 2) if admitted else 0
+                ),
+            }
+
+
+class PooledChatOllama(ChatOllama):
+    """
+    ChatOllama whose requests pass through its model's ConcurrencyLimiter and
+    are routed by the OllamaBalancer. A request that fails before its first
+    chunk is retried on another node; once output has streamed it is not.
+    """
+
+    _limiter: Optional[ConcurrencyLimiter] = PrivateAttr(default=None)
+    _balancer: Optional[OllamaBalancer] = PrivateAttr(default=None)
+
+    def _retry_or_raise(self, node, tried: set, error: Exception):
+        tried.add(node)
+        if len(tried) >= len(self._balancer.nodes):
+            raise error
+        logger.warning(
+            f"🔁 {self.model} request failed on {node.host} ({error!r}), "
+            "retrying on another node"
+        )
+
+    def _create_chat_stream(self, messages, stop=None, **kwargs) -> Iterator[Any]:
+        if self._balancer is None:
+            yield from super()._create_chat_stream(messages, stop, **kwargs)
+            return
+        chat_params = self._chat_params(messages, stop, **kwargs)
+        with self._limiter.slot():
+            tried: set = set()
+            while True:
+                node = self._balancer.pick(self.model, tried)
+                started = False
+                try:
+                    with self._balancer.attempt(node, self.model):
+                        if chat_params["stream"]:
+                            for part in node.client.chat(**chat_params):
+                                started = True
+                                yield part
+                        else:
+                            response = node.client.chat(**chat_params)
+                            started = True
+                            yield response
+                    return
+                except Exception as e:
+                    if started:
+                        raise
+                    self._retry_or_raise(node, tried, e)
+
+    async def _acreate_chat_stream(
+        self, messages, stop=None, **kwargs
+    ) -> AsyncIterator[Any]:
+        if self._balancer is None:
+            async for part in super()._acreate_chat_stream(messages, stop, **kwargs):
+                yield part
+            return
+        chat_params = self._chat_params(messages, stop, **kwargs)
+        async with self._limiter.aslot():
+            tried: set = set()
+            while True:
+                node = self._balancer.pick(self.model, tried)
+                started = False
+                try:
+                    with self._balancer.attempt(node, self.model):
+                        if chat_params["stream"]:
+                            async for part in await node.async_client.chat(
+                                **chat_params
+                            ):
+                                started = True
+                                yield part
+                        else:
+                            response = await node.async_client.chat(**chat_params)
+                            started = True
+                            yield response
+                    return
+                except Exception as e:
+                    if started:
+                        raise
+                    self._retry_or_raise(node, tried, e)
+
+
+class LLMRegistry:
+    """
+    Owns every chat model the app talks to. All models share the balancer's
+    pooled keep-alive clients (one per Ollama node), and each model name gets
+    one concurrency limiter no matter how many modules use it.
+    """
+
+    def __init__(
+        self,
+        hosts: List[Optional[str]] = OLLAMA_HOSTS,
+        keep_alive: Optional[str] = OLLAMA_KEEP_ALIVE,
+        num_ctx: Optional[int] = OLLAMA_NUM_CTX,
+        max_connections: int = OLLAMA_MAX_CONNECTIONS,
+        timeout: float = OLLAMA_TIMEOUT_SECONDS,
+    ):
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+        self.balancer = OllamaBalancer(
+            hosts, default_client_kwargs(max_connections, timeout)
+        )
+        self._lock = threading.Lock()
+        self._models: Dict[Tuple, PooledChatOllama] = {}
+        self._limiters: Dict[str, ConcurrencyLimiter] = {}
+
+    def limiter(self, model: str) -> ConcurrencyLimiter:
+        with self._lock:
+            if model not in self._limiters:
+                self._limiters[model] = ConcurrencyLimiter(
+                    model,
+                    max_concurrency=LLM_MODEL_CONCURRENCY.get(
+                        model, LLM_MAX_CONCURRENCY
+                    ),
+                )
+            return self._limiters[model]
+
+    def get_chat_model(self, model: str, **overrides) -> PooledChatOllama:
+        """Shared chat model for `model`; `overrides` are extra ChatOllama fields."""
+        key = (model, tuple(sorted(overrides.items())))
+        limiter = self.limiter(model)
+        with self._lock:
+            if key not in self._models:
+                params = {
+                    "model": model,
+                    "base_url": self.balancer.nodes[0].host,
+                    "keep_alive": self.keep_alive,
+                    "num_ctx": self.num_ctx,
+                    **overrides,
+                }
+                llm = PooledChatOllama(**params)
+                first = self.balancer.nodes[0]
+                llm._client, llm._async_client = first.client, first.async_client
+                llm._limiter = limiter
+                llm._balancer = self.balancer
+                self._models[key] = llm
+                hosts = ", ".join(str(node.host) for node in self.balancer.nodes)
+                logger.info(f"🧠 Registered chat model {model} on {hosts}")
+            return self._models[key]
+
+    async def start(self, models: List[str] = OLLAMA_WARMUP_MODELS):
+        """Probe the nodes, warm up `models` and start periodic health checks."""
+        await self.balancer.check_all()
+        await self.warm_up(models)
+        self.balancer.start_health_checks()
+
+    async def stop(self):
+        await self.balancer.stop_health_checks()
+
+    async def warm_up(self, models: List[str] = OLLAMA_WARMUP_MODELS):
+        """Load `models` into Ollama memory so the first user request is fast."""
+        for model in models:
+            node = self.balancer.pick(model)
+            started = time.perf_counter()
+            try:
+                with self.balancer.attempt(node, model):
+                    # An empty prompt only loads the model
+                    await node.async_client.generate(
+                        model=model, prompt="", keep_alive=self.keep_alive
+                    )
+                elapsed = time.perf_counter() - started
+                logger.info(f"🔥 Warmed up {model} on {node.host} in {elapsed:.1f}s")
+            except Exception as e:
+                logger.warning(f"⚠️ Warm-up of {model} on {node.host} failed: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {
+            "models": {model: limiter.stats() for model, limiter in limiters.items()},
+            "nodes": self.balancer.stats(),
+        }
+
+
+llm_registry = lazy_resource("llm_registry", LLMRegistry)
+
+
+def get_chat_model(model: str, **overrides) -> PooledChatOllama:
+    return llm_registry.get_chat_model(model, **overrides)
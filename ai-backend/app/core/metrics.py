@@ -0,0 +1,168 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+T = TypeVar("T")
+
+_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120,
+)  # fmt: skip
+
+STAGE_SECONDS = Histogram(
+    "rag_stage_duration_seconds",
+    "Time spent in one pipeline stage (chunking, embedding, qdrant_upsert, ...)",
+    ["stage"],
+    buckets=_LATENCY_BUCKETS,
+)
+LLM_TTFT_SECONDS = Histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from sending a chat request to the first streamed token",
+    ["model"],
+    buckets=_LATENCY_BUCKETS,
+)
+LLM_TOKENS_PER_SECOND = Histogram(
+    "llm_tokens_per_second",
+    "Generation speed after the first token",
+    ["model"],
+    buckets=(1, 2.5, 5, 10, 20, 30, 50, 75, 100, 150, 250),
+)
+LLM_OUTPUT_TOKENS = Counter(
+    "llm_output_tokens_total", "Streamed output tokens", ["model"]
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Request latency per route, until the last body chunk is sent",
+    ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+StageTimings = List[Tuple[str, float]]
+
+# Set inside ingestion worker processes so their stage timings can be shipped
+# back to the API process, whose registry is the one /metrics exports
+_recorder: ContextVar[Optional[StageTimings]] = ContextVar(
+    "stage_recorder", default=None
+)
+
+
+def observe_stage(stage: str, seconds: float, recorder: StageTimings = None):
+    STAGE_SECONDS.labels(stage=stage).observe(seconds)
+    recorder = recorder if recorder is not None else _recorder.get()
+    if recorder is not None:
+        recorder.append((stage, seconds))
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+@contextmanager
+def record_stages() -> Iterator[StageTimings]:
+    """Collect every span finished in this context into the yielded list."""
+    timings: StageTimings = []
+    token = _recorder.set(timings)
+    try:
+        yield timings
+    finally:
+        _recorder.reset(token)
+
+
+def timed_iterator(iterable: Iterable[T], stage: str) -> Iterator[T]:
+    """Time producing each item; safe to drive from another thread."""
+    # Captured now: a generator body would only run in the consuming thread
+    recorder = _recorder.get()
+
+    def timed() -> Iterator[T]:
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                observe_stage(stage, time.perf_counter() - started, recorder)
+            yield item
+
+    return timed()
+
+
+def observe_stages(timings: StageTimings):
+    """Replay timings recorded in another process into this registry."""
+    for stage, seconds in timings:
+        STAGE_SECONDS.labels(stage=stage).observe(seconds)
+
+
+class GenerationTimer:
+    """Tracks time-to-first-token and tokens/sec for one streamed answer."""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.started = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.chunks = 0
+
+    def on_chunk(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            LLM_TTFT_SECONDS.labels(model=self.model).observe(
+                self.first_token_at - self.started
+            )
+        self.chunks += 1
+
+    def finish(self, output_tokens: Optional[int] = None):
+        if self.first_token_at is None:
+            return
+        # Ollama streams about one token per chunk when usage is unavailable
+        tokens = output_tokens or self.chunks
+        LLM_OUTPUT_TOKENS.labels(model=self.model).inc(tokens)
+        elapsed = time.perf_counter() - self.first_token_at
+        if elapsed > 0 and tokens > 1:
+            LLM_TOKENS_PER_SECOND.labels(model=self.model).observe(
+                (tokens - 1) / elapsed
+            )
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing each request per route template. Streaming
+    responses are timed until their last body chunk, not just the headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status["code"]),
+            ).observe(time.perf_counter() - started)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,185 @@
+import asyncio
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Set
+
+import httpx
+from ollama import AsyncClient, Client, ResponseError
+
+from app.core.logger_config import logger
+
+# Comma separated Ollama base URLs; falls back to the single OLLAMA_HOST
+OLLAMA_HOSTS = [
+    host.strip()
+    for host in (os.getenv("OLLAMA_HOSTS") or os.getenv("OLLAMA_HOST") or "").split(",")
+    if host.strip()
+] or [None]
+OLLAMA_HEALTH_INTERVAL_SECONDS = float(
+    os.getenv("OLLAMA_HEALTH_INTERVAL_SECONDS", "10")
+)
+OLLAMA_HEALTH_TIMEOUT_SECONDS = float(os.getenv("OLLAMA_HEALTH_TIMEOUT_SECONDS", "2"))
+# Consecutive failures (requests or health checks) before a node is ejected
+OLLAMA_EJECT_AFTER_FAILURES = int(os.getenv("OLLAMA_EJECT_AFTER_FAILURES", "2"))
+# Extra outstanding requests a node with the model loaded may carry before a
+# node that would have to load it first is preferred
+OLLAMA_COLD_MODEL_PENALTY = float(os.getenv("OLLAMA_COLD_MODEL_PENALTY", "2"))
+
+
+class NoHealthyNodeError(RuntimeError):
+    pass
+
+
+class OllamaNode:
+    """One Ollama server with its pooled sync/async clients and live state."""
+
+    def __init__(self, host: Optional[str], client_kwargs: dict):
+        self.host = host
+        self.client = Client(host=host, **client_kwargs)
+        self.async_client = AsyncClient(host=host, **client_kwargs)
+        self.outstanding = 0
+        self.healthy = True
+        self.failures = 0
+        self.loaded_models: Set[str] = set()
+        self.requests = 0
+        self.errors = 0
+        self.last_checked: Optional[float] = None
+
+    def stats(self) -> dict:
+        return {
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "loaded_models": sorted(self.loaded_models),
+            "requests": self.requests,
+            "errors": self.errors,
+            "consecutive_failures": self.failures,
+        }
+
+
+class OllamaBalancer:
+    """
+    Routes chat requests across Ollama nodes.
+
+    A node is chosen by fewest outstanding requests, with nodes that already
+    hold the model in memory preferred (see OLLAMA_COLD_MODEL_PENALTY).
+    Nodes that keep failing requests or health checks are ejected until a
+    health check (GET /api/ps, which also reports loaded models) passes.
+    """
+
+    def __init__(
+        self,
+        hosts: List[Optional[str]],
+        client_kwargs: dict,
+        eject_after: int = OLLAMA_EJECT_AFTER_FAILURES,
+        cold_penalty: float = OLLAMA_COLD_MODEL_PENALTY,
+    ):
+        self.nodes = [OllamaNode(host, client_kwargs) for host in hosts]
+        self.eject_after = eject_after
+        self.cold_penalty = cold_penalty
+        self._lock = threading.Lock()
+        self._tiebreak = itertools.count()
+        self._health_task: Optional[asyncio.Task] = None
+
+    def pick(self, model: str, exclude: Set[OllamaNode] = frozenset()) -> OllamaNode:
+        with self._lock:
+            candidates = [n for n in self.nodes if n not in exclude]
+            if not candidates:
+                raise NoHealthyNodeError(f"No Ollama node left to try for {model}")
+            # With every node ejected, keep trying rather than failing outright
+            healthy = [n for n in candidates if n.healthy] or candidates
+            turn = next(self._tiebreak)
+
+            def cost(item):
+                index, node = item
+                cold = 0 if model in node.loaded_models else self.cold_penalty
+                return (node.outstanding + cold, (index - turn) % len(healthy))
+
+            _, node = min(enumerate(healthy), key=cost)
+            node.outstanding += 1
+            node.requests += 1
+            return node
+
+    def _eject_on_failure(self, node: OllamaNode, error: Exception):
+        # Holds the lock
+        node.failures += 1
+        if node.healthy and node.failures >= self.eject_after:
+            node.healthy = False
+            logger.warning(f"🚫 Ejected Ollama node {node.host}: {error!r}")
+
+    @contextmanager
+    def attempt(self, node: OllamaNode, model: str) -> Iterator[None]:
+        """Track one request picked onto `node`; failures count toward ejection."""
+        try:
+            yield
+        except Exception as e:
+            with self._lock:
+                node.outstanding -= 1
+                node.errors += 1
+                # A 4xx means the server is up and answered
+                if not (isinstance(e, ResponseError) and e.status_code < 500):
+                    self._eject_on_failure(node, e)
+            raise
+        except BaseException:
+            # Cancelled or closed early by the consumer
+            with self._lock:
+                node.outstanding -= 1
+            raise
+        else:
+            with self._lock:
+                node.outstanding -= 1
+                node.failures = 0
+                node.loaded_models.add(model)
+
+    async def check(self, node: OllamaNode):
+        try:
+            response = await asyncio.wait_for(
+                node.async_client.ps(), OLLAMA_HEALTH_TIMEOUT_SECONDS
+            )
+        except Exception as e:
+            with self._lock:
+                self._eject_on_failure(node, e)
+            return
+        with self._lock:
+            node.loaded_models = {m.model or m.name for m in response.models}
+            node.failures = 0
+            node.last_checked = time.time()
+            if not node.healthy:
+                node.healthy = True
+                logger.info(f"✅ Ollama node {node.host} is back in rotation")
+
+    async def check_all(self):
+        await asyncio.gather(*(self.check(node) for node in self.nodes))
+
+    async def _health_loop(self, interval: float):
+        while True:
+            await self.check_all()
+            await asyncio.sleep(interval)
+
+    def start_health_checks(self, interval: float = OLLAMA_HEALTH_INTERVAL_SECONDS):
+        if self._health_task is None and interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop(interval))
+
+    async def stop_health_checks(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {node.host or "default": node.stats() for node in self.nodes}
+
+
+def default_client_kwargs(max_connections: int, timeout: float) -> dict:
+    return {
+        "limits": httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+        "timeout": httpx.Timeout(timeout, connect=10),
+    }
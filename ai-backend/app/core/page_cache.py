@@ -0,0 +1,265 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from app.core.logger_config import logger
+from app.core.resources import lazy_resource
+
+PAGE_CACHE_PATH = os.getenv(
+    "PAGE_CACHE_PATH", str(Path(os.getcwd()) / "cache" / "pages.sqlite3")
+)
+PAGE_CACHE_TTL_SECONDS = float(os.getenv("PAGE_CACHE_TTL_SECONDS", "3600"))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+_MAX_AGE_RE = re.compile(r"max-age\s*=\s*(\d+)")
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical cache key: lowercase scheme/host, no default port or fragment,
+    sorted query parameters."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def ttl_from_headers(
+    headers, default: float = PAGE_CACHE_TTL_SECONDS
+) -> Optional[float]:
+    """
+    Per-entry TTL from Cache-Control. None (no-store) means the page must not
+    be stored; 0 (no-cache, max-age=0) means it may be stored but has to be
+    revalidated before every use.
+    """
+    cache_control = (headers.get("cache-control") or "").lower()
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0
+    match = _MAX_AGE_RE.search(cache_control)
+    return float(match.group(1)) if match else default
+
+
+@dataclass
+class CachedPage:
+    fields: dict
+    etag: Optional[str]
+    last_modified: Optional[str]
+    expires_at: float
+    fetched_bytes: int
+    fetch_ms: float
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at > time.time()
+
+    def validators(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    Persistent cache of extracted page fields keyed by normalized URL.
+
+    Fresh entries are served without a request; stale entries that carry an
+    ETag or Last-Modified are revalidated with a conditional GET, and a 304
+    only extends their expiry. Least recently used rows are evicted once the
+    stored payloads exceed `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        path: str = PAGE_CACHE_PATH,
+        ttl: float = PAGE_CACHE_TTL_SECONDS,
+        max_bytes: int = PAGE_CACHE_MAX_BYTES,
+    ):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(
+            (
+                "hits",
+                "misses",
+                "revalidated",
+                "changed",
+                "bytes_saved",
+                "bytes_fetched",
+                "evicted",
+            ),
+            0,
+        )
+        self._ms_saved = 0.0
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                fields TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL NOT NULL,
+                fetched_bytes INTEGER NOT NULL,
+                fetch_ms REAL NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used);
+            """)
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fields, etag, last_modified, expires_at, fetched_bytes, "
+                "fetch_ms FROM pages WHERE url = ?",
+                (normalize_url(url),),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE pages SET last_used = ? WHERE url = ?",
+                (time.time(), normalize_url(url)),
+            )
+            self._conn.commit()
+        fields, etag, last_modified, expires_at, fetched_bytes, fetch_ms = row
+        return CachedPage(
+            json.loads(fields), etag, last_modified, expires_at, fetched_bytes, fetch_ms
+        )
+
+    def put(
+        self,
+        url: str,
+        fields: dict,
+        headers,
+        fetched_bytes: int,
+        fetch_ms: float,
+    ):
+        ttl = ttl_from_headers(headers, self.ttl)
+        if ttl is None:
+            self.delete(url)
+            return
+        etag, last_modified = headers.get("etag"), headers.get("last-modified")
+        # Without a TTL or a validator the entry could never be reused
+        if ttl <= 0 and not (etag or last_modified):
+            self.delete(url)
+            return
+        payload = json.dumps(fields, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    normalize_url(url),
+                    payload,
+                    etag,
+                    last_modified,
+                    now + ttl,
+                    fetched_bytes,
+                    fetch_ms,
+                    len(payload.encode("utf-8")),
+                    now,
+                ),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def refresh(self, url: str, headers):
+        """Extend a revalidated (304) entry's expiry."""
+        ttl = ttl_from_headers(headers, self.ttl)
+        if ttl is None:
+            self.delete(url)
+            return
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET expires_at = ?, last_used = ? WHERE url = ?",
+                (time.time() + ttl, time.time(), normalize_url(url)),
+            )
+            self._conn.commit()
+
+    def delete(self, url: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM pages WHERE url = ?", (normalize_url(url),))
+            self._conn.commit()
+
+    def _evict(self):
+        (total,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM pages"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        # Free down to 90% of the budget so steady-state inserts don't evict
+        # one row at a time
+        excess = total - int(self.max_bytes * 0.9)
+        victims = []
+        for url, size in self._conn.execute(
+            "SELECT url, size FROM pages ORDER BY last_used ASC"
+        ):
+            victims.append((url,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM pages WHERE url = ?", victims)
+        self._counters["evicted"] += len(victims)
+        logger.info(f"🧹 Evicted {len(victims)} pages from the page cache")
+
+    # ---- counters ----
+    def record_hit(self, page: CachedPage):
+        with self._lock:
+            self._counters["hits"] += 1
+            self._counters["bytes_saved"] += page.fetched_bytes
+            self._ms_saved += page.fetch_ms
+
+    def record_revalidated(self, page: CachedPage):
+        with self._lock:
+            self._counters["revalidated"] += 1
+            self._counters["bytes_saved"] += page.fetched_bytes
+
+    def record_fetch(self, fetched_bytes: int, changed: bool):
+        with self._lock:
+            self._counters["changed" if changed else "misses"] += 1
+            self._counters["bytes_fetched"] += fetched_bytes
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages"
+            ).fetchone()
+            counters = dict(self._counters)
+            ms_saved = self._ms_saved
+        lookups = (
+            counters["hits"]
+            + counters["misses"]
+            + counters["revalidated"]
+            + counters["changed"]
+        )
+        served = counters["hits"] + counters["revalidated"]
+        return {
+            **counters,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+            "hit_rate": round(served / lookups, 4) if lookups else 0,
+            "fetch_ms_saved": round(ms_saved, 1),
+        }
+
+
+page_cache = lazy_resource("page_cache", PageCache)
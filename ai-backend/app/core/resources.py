@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, Generic, Iterable, List, Optional, TypeVar
+
+from app.core.logger_config import logger
+
+T = TypeVar("T")
+
+# Resources built at import time of app.main, i.e. in the master process when
+# running `gunicorn --preload`, so forked workers share them copy-on-write.
+# Only resources registered as fork-safe (model weights; not sockets, SQLite
+# connections or threads) are built there; others named here are skipped.
+# "all" preloads every fork-safe resource.
+PRELOAD_RESOURCES = os.getenv("PRELOAD_RESOURCES", "")
+# Resources warmed in the background after startup; /ready reports ready once
+# they are all loaded
+READY_RESOURCES = os.getenv("READY_RESOURCES", "embed_model")
+
+
+class LazyResource(Generic[T]):
+    """
+    A module-level singleton that is built by `factory` on first use.
+
+    Attribute access is forwarded to the built object, so call sites keep
+    using the resource exactly like the eager singleton it replaces.
+    Building is thread-safe and a failed build is retried on the next use.
+    `fork_safe` marks resources that may be built before the server forks.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T], fork_safe: bool = False):
+        self._name = name
+        self._factory = factory
+        self.fork_safe = fork_safe
+        self._lock = threading.Lock()
+        self._value: Optional[T] = None
+        self._loaded = False
+        self._error: Optional[str] = None
+        self._load_seconds: Optional[float] = None
+
+    # Deliberately distinct names: anything defined here shadows the wrapped
+    # object's attributes
+    @property
+    def resource_name(self) -> str:
+        return self._name
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def get(self) -> T:
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                started = time.perf_counter()
+                logger.info(f"⏳ Initializing {self._name}")
+                try:
+                    self._value = self._factory()
+                except Exception as e:
+                    self._error = str(e)
+                    logger.error(f"❌ Failed to initialize {self._name}: {e}")
+                    raise
+                self._load_seconds = time.perf_counter() - started
+                self._error = None
+                self._loaded = True
+                logger.info(f"✅ Initialized {self._name} in {self._load_seconds:.2f}s")
+        return self._value
+
+    def resource_status(self) -> dict:
+        return {
+            "loaded": self._loaded,
+            "load_seconds": (
+                round(self._load_seconds, 3) if self._load_seconds is not None else None
+            ),
+            "error": self._error,
+        }
+
+    def __getattr__(self, item):
+        # Only called for attributes not defined on LazyResource itself
+        if item.startswith("__"):
+            raise AttributeError(item)
+        return getattr(self.get(), item)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._loaded else "not loaded"
+        return f"<LazyResource {self._name} ({state})>"
+
+
+_resources: Dict[str, LazyResource] = {}
+
+
+def lazy_resource(
+    name: str, factory: Callable[[], T], fork_safe: bool = False
+) -> LazyResource[T]:
+    resource = LazyResource(name, factory, fork_safe)
+    _resources[name] = resource
+    return resource
+
+
+def _parse(names) -> List[str]:
+    if isinstance(names, str):
+        return [n.strip() for n in names.split(",") if n.strip()]
+    return list(names)
+
+
+def _select(names) -> List[LazyResource]:
+    names = _parse(names)
+    if "all" in names:
+        return list(_resources.values())
+    unknown = [n for n in names if n not in _resources]
+    if unknown:
+        logger.warning(f"⚠️ Unknown resources {unknown}; known: {sorted(_resources)}")
+    return [_resources[n] for n in names if n in _resources]
+
+
+def preload(
+    names: Iterable[str] | str = PRELOAD_RESOURCES, before_fork: bool = False
+) -> List[str]:
+    """
+    Build the named resources now; returns the names that failed. With
+    `before_fork`, resources that are not fork-safe are left to the workers.
+    """
+    names = _parse(names)
+    selected = _select(names)
+    if before_fork:
+        unsafe = [r.resource_name for r in selected if not r.fork_safe]
+        if unsafe and "all" not in names:
+            logger.warning(f"⚠️ Not preloading {unsafe} before fork: not fork-safe")
+        selected = [r for r in selected if r.fork_safe]
+    failed = []
+    for resource in selected:
+        try:
+            resource.get()
+        except Exception:
+            failed.append(resource.resource_name)
+    return failed
+
+
+def readiness(names: Iterable[str] | str = READY_RESOURCES) -> dict:
+    selected = _select(names)
+    return {
+        "ready": all(resource.is_loaded for resource in selected),
+        "resources": {r.resource_name: r.resource_status() for r in selected},
+    }
+
+
+def resources_status() -> dict:
+    return {name: resource.resource_status() for name, resource in _resources.items()}
@@ -0,0 +1,170 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Iterator, Optional
+
+import orjson
+from fastapi.responses import StreamingResponse
+from starlette.requests import Request
+
+# "ndjson" (one JSON frame per line) or "sse" (`data: <json>` events); clients
+# can also ask for SSE per request with `Accept: text/event-stream`
+STREAM_FORMAT = os.getenv("STREAM_FORMAT", "ndjson")
+# Tokens arriving within this window (after the first one) share one frame
+STREAM_COALESCE_MS = float(os.getenv("STREAM_COALESCE_MS", "0"))
+# A frame is flushed early once it holds this many characters
+STREAM_COALESCE_CHARS = int(os.getenv("STREAM_COALESCE_CHARS", "0"))
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+
+def stream_format(request: Optional[Request] = None) -> str:
+    if request is not None and "text/event-stream" in request.headers.get("accept", ""):
+        return "sse"
+    return STREAM_FORMAT if STREAM_FORMAT in MEDIA_TYPES else "ndjson"
+
+
+def streaming_response(frames, fmt: str, headers: dict = None) -> StreamingResponse:
+    headers = dict(headers or {})
+    if fmt == "sse":
+        headers.setdefault("Cache-Control", "no-cache")
+        # Stops nginx from buffering the event stream
+        headers.setdefault("X-Accel-Buffering", "no")
+    return StreamingResponse(frames, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+
+class FrameEncoder:
+    """
+    Encodes the frames of one stream. Assistant frames differ only in their
+    `response`, so everything else (role, model, the message's created_at)
+    is serialized once and each token costs one string encode.
+    """
+
+    def __init__(self, model: str = "gemma3:4b", fmt: str = "ndjson"):
+        self.fmt = fmt
+        self._start, self._end = (b"data: ", b"\n\n") if fmt == "sse" else (b"", b"\n")
+        self.created_at = datetime.now().isoformat()
+        static = orjson.dumps(
+            {
+                "role": "assistant",
+                "created_at": self.created_at,
+                "done": False,
+                "model": model,
+            }
+        )
+        self._token_head = static[:-1] + b',"response":'
+        self._done = self._delimit(
+            static.replace(b'"done":false', b'"done":true')[:-1] + b',"response":""}'
+        )
+
+    def _delimit(self, payload: bytes) -> bytes:
+        return self._start + payload + self._end
+
+    def assistant(self, content: str) -> bytes:
+        return self._start + self._token_head + orjson.dumps(content) + b"}" + self._end
+
+    def done(self) -> bytes:
+        return self._done
+
+    def error(self, error: Exception) -> bytes:
+        return self._delimit(orjson.dumps({"error": str(error), "done": True}))
+
+    def event(self, event: str, **data) -> bytes:
+        """Agent progress frame (tool calls/results) interleaved with tokens."""
+        frame = {
+            "event": event,
+            **data,
+            "created_at": datetime.now().isoformat(),
+            "done": False,
+        }
+        return self._delimit(orjson.dumps(frame, default=str))
+
+
+def coalesce(
+    pieces: Iterable[str],
+    window_ms: float = STREAM_COALESCE_MS,
+    max_chars: int = STREAM_COALESCE_CHARS,
+) -> Iterator[str]:
+    """
+    Join consecutive tokens into larger frames. The first token is passed
+    through at once so time-to-first-token is unchanged; the window is only
+    checked when a token arrives (see acoalesce for a timer-driven flush).
+    """
+    if window_ms <= 0 and max_chars <= 0:
+        yield from pieces
+        return
+    buffer, size, started = [], 0, None
+    first = True
+    for piece in pieces:
+        if first:
+            first = False
+            yield piece
+            continue
+        buffer.append(piece)
+        size += len(piece)
+        started = started or time.monotonic()
+        if (max_chars > 0 and size >= max_chars) or (
+            window_ms > 0 and (time.monotonic() - started) * 1000 >= window_ms
+        ):
+            yield "".join(buffer)
+            buffer, size, started = [], 0, None
+    if buffer:
+        yield "".join(buffer)
+
+
+async def acoalesce(
+    pieces: AsyncIterator[str],
+    window_ms: float = STREAM_COALESCE_MS,
+    max_chars: int = STREAM_COALESCE_CHARS,
+) -> AsyncIterator[str]:
+    """
+    Async coalesce: a buffered frame is flushed when its window expires even
+    if no further token arrives, so coalescing never stalls a slow stream.
+    """
+    if window_ms <= 0 and max_chars <= 0:
+        async for piece in pieces:
+            yield piece
+        return
+
+    loop = asyncio.get_running_loop()
+    iterator = pieces.__aiter__()
+    buffer, size, deadline = [], 0, None
+    first = True
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield "".join(buffer)
+                buffer, size, deadline = [], 0, None
+                continue
+
+            future, pending = pending, None
+            try:
+                piece = future.result()
+            except StopAsyncIteration:
+                break
+            if first:
+                first = False
+                yield piece
+                continue
+            buffer.append(piece)
+            size += len(piece)
+            if deadline is None and window_ms > 0:
+                deadline = loop.time() + window_ms / 1000
+            if max_chars > 0 and size >= max_chars:
+                yield "".join(buffer)
+                buffer, size, deadline = [], 0, None
+    finally:
+        # Closed early (client gone): stop the upstream read, then the source
+        if pending is not None:
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        if hasattr(iterator, "aclose"):
+            await iterator.aclose()
+    if buffer:
+        yield "".join(buffer)
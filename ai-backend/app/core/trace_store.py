@@ -0,0 +1,35 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+AGENT_TRACE_MAX_RUNS = int(os.getenv("AGENT_TRACE_MAX_RUNS", "100"))
+
+
+class TraceStore:
+    """
+    In-memory store of full agent run states keyed by run id, so responses
+    can stay small and the trace is fetched only when someone asks for it.
+    The oldest runs are dropped past `max_runs`.
+    """
+
+    def __init__(self, max_runs: int = AGENT_TRACE_MAX_RUNS):
+        self.max_runs = max_runs
+        self._lock = threading.Lock()
+        self._runs: OrderedDict[str, Any] = OrderedDict()
+
+    def put(self, run_id: str, trace: Any):
+        if self.max_runs <= 0:
+            return
+        with self._lock:
+            self._runs[run_id] = trace
+            self._runs.move_to_end(run_id)
+            while len(self._runs) > self.max_runs:
+                self._runs.popitem(last=False)
+
+    def get(self, run_id: str) -> Optional[Any]:
+        with self._lock:
+            return self._runs.get(run_id)
+
+
+trace_store = TraceStore()
@@ -1,34 +1,227 @@
-from datetime import datetime
+import asyncio
 from app.core.logger_config import logger
+from app.core.metrics import GenerationTimer
+from app.core.streaming import FrameEncoder, acoalesce, coalesce
 import json
+import os
+import queue
+import threading
+from typing import Callable, Iterable, Iterator, TypeVar
 from langchain_core.messages import SystemMessage, HumanMessage
+from starlette.requests import Request
 
+T = TypeVar("T")
 
-def stream_generator(llm, messages):
+# Tool outputs (e.g. scraped pages) are truncated in streamed agent events
+AGENT_EVENT_PREVIEW_CHARS = int(os.getenv("AGENT_EVENT_PREVIEW_CHARS", "500"))
+
+
+def prefetch_iterator(iterable: Iterable[T], depth: int = 2) -> Iterator[T]:
+    """
+    Drive `iterable` from a background thread, keeping up to `depth` items
+    ready so producing the next item overlaps with consuming the current one.
+    """
+    items: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(entry) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(("item", item)):
+                    return
+            put(("done", None))
+        except BaseException as e:
+            put(("error", e))
+
+    threading.Thread(target=produce, daemon=True).start()
     try:
+        while True:
+            kind, value = items.get()
+            if kind == "done":
+                return
+            if kind == "error":
+                raise value
+            yield value
+    finally:
+        # Unblocks the producer if the consumer stops early
+        stop.set()
+
+
+def _output_tokens(chunk):
+    usage = getattr(chunk, "usage_metadata", None)
+    return usage.get("output_tokens") if usage else None
+
+
+def stream_generator(llm, messages, fmt: str = "ndjson"):
+    """
+    Stream an answer as newline-delimited assistant frames (or SSE events
+    with fmt="sse"), ending with a `done` frame. Tokens may be coalesced into
+    fewer frames, see STREAM_COALESCE_MS / STREAM_COALESCE_CHARS.
+    """
+    model = getattr(llm, "model", "unknown")
+    encoder = FrameEncoder(model, fmt)
+    timer = GenerationTimer(model)
+    output_tokens = None
+
+    def tokens():
+        nonlocal output_tokens
         for chunk in llm.stream(messages):
+            output_tokens = _output_tokens(chunk) or output_tokens
+            if chunk.content:
+                timer.on_chunk()
+                yield chunk.content
+
+    try:
+        for text in coalesce(tokens()):
+            yield encoder.assistant(text)
+
+        timer.finish(output_tokens)
+        yield encoder.done()
+    except Exception as e:
+        logger.error(f"Streaming error: {e}")
+        yield encoder.error(e)
+
+
+async def astream_generator(
+    llm,
+    messages,
+    request: Request = None,
+    on_complete: Callable[[str], None] = None,
+    fmt: str = "ndjson",
+):
+    """
+    Async variant of stream_generator built on `llm.astream`.
+    Generation stops as soon as the client goes away; closing the stream
+    drops the Ollama connection, which aborts the request upstream.
+    `on_complete` receives the full answer once it has been streamed entirely.
+    """
+    model = getattr(llm, "model", "unknown")
+    encoder = FrameEncoder(model, fmt)
+    timer = GenerationTimer(model)
+    output_tokens = None
+    stream = llm.astream(messages)
+    parts = []
+
+    async def tokens():
+        nonlocal output_tokens
+        async for chunk in stream:
+            output_tokens = _output_tokens(chunk) or output_tokens
             if chunk.content:
-                data = {
-                    "role": "assistant",
-                    "response": chunk.content,
-                    "created_at": datetime.now().isoformat(),
-                    "done": False,
-                    "model": "gemma3:4b",
-                }
-                yield json.dumps(data).encode("utf-8")
-
-        final_data = {
-            "role": "assistant",
-            "response": "",
-            "created_at": datetime.now().isoformat(),
-            "done": True,
-            "model": "gemma3:4b",
-        }
-        yield json.dumps(final_data).encode("utf-8")
+                timer.on_chunk()
+                parts.append(chunk.content)
+                yield chunk.content
+
+    frames = acoalesce(tokens())
+    try:
+        async for text in frames:
+            if request is not None and await request.is_disconnected():
+                logger.info("🔌 Client disconnected, cancelling generation")
+                return
+            yield encoder.assistant(text)
+
+        timer.finish(output_tokens)
+        yield encoder.done()
+        if on_complete is not None:
+            on_complete("".join(parts))
+    except asyncio.CancelledError:
+        logger.info("🔌 Streaming cancelled, stopping generation")
+        raise
     except Exception as e:
         logger.error(f"Streaming error: {e}")
-        error_data = {"error": str(e), "done": True}
-        yield json.dumps(error_data).encode("utf-8")
+        yield encoder.error(e)
+    finally:
+        await frames.aclose()
+        await stream.aclose()
+
+
+def _preview(value, limit: int = AGENT_EVENT_PREVIEW_CHARS) -> str:
+    text = getattr(value, "content", value)
+    text = text if isinstance(text, str) else json.dumps(text, default=str)
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def final_answer(output) -> str:
+    """Final answer of an AgentExecutor ("output") or LangGraph ("messages") run."""
+    if isinstance(output, dict):
+        if "output" in output:
+            return str(output["output"])
+        if output.get("messages"):
+            return str(getattr(output["messages"][-1], "content", ""))
+    return ""
+
+
+async def astream_agent_events(
+    runnable, inputs, request: Request = None, fmt: str = "ndjson"
+):
+    """
+    Stream an agent run as NDJSON frames: `tool_start` / `tool_end` events,
+    answer tokens in the same assistant framing as stream_generator, and a
+    closing `final` frame. Closing the event stream cancels the run, so a
+    client disconnect stops in-flight LLM calls and async tools.
+    """
+    encoder = FrameEncoder(fmt=fmt)
+    stream = runnable.astream_events(inputs, version="v2")
+    streamed_tokens = False
+    try:
+        async for event in stream:
+            if request is not None and await request.is_disconnected():
+                logger.info("🔌 Client disconnected, cancelling agent run")
+                return
+
+            kind = event["event"]
+            if kind == "on_chat_model_stream":
+                content = event["data"]["chunk"].content
+                if content:
+                    streamed_tokens = True
+                    yield encoder.assistant(content)
+            elif kind == "on_chat_model_end":
+                # Separates the model turns around tool calls
+                if streamed_tokens:
+                    yield encoder.event("step_end", run_id=event["run_id"])
+                    streamed_tokens = False
+            elif kind == "on_tool_start":
+                yield encoder.event(
+                    "tool_start",
+                    tool=event["name"],
+                    run_id=event["run_id"],
+                    input=event["data"].get("input"),
+                )
+            elif kind == "on_tool_end":
+                yield encoder.event(
+                    "tool_end",
+                    tool=event["name"],
+                    run_id=event["run_id"],
+                    output=_preview(event["data"].get("output")),
+                )
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                answer = final_answer(event["data"].get("output"))
+                yield encoder.event("final", response=answer)
+
+        yield encoder.done()
+    except asyncio.CancelledError:
+        logger.info("🔌 Agent stream cancelled, stopping run")
+        raise
+    except Exception as e:
+        logger.error(f"Agent streaming error: {e}")
+        yield encoder.error(e)
+    finally:
+        await stream.aclose()
+
+
+async def areplay_generator(answer: str, fmt: str = "ndjson"):
+    """Replay a cached answer with the same framing as astream_generator."""
+    encoder = FrameEncoder(fmt=fmt)
+    yield encoder.assistant(answer)
+    yield encoder.done()
 
 
 def construct_chat_prompt(context: str, user_query: str) -> list:
@@ -1,11 +1,50 @@
-from dotenv import load_dotenv
-load_dotenv()
+import asyncio
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.route import langchain_ai_chat, rag_langchain_ai_chat
-from app.route import web_search_agent
-from app.route import web_search_graph_router
+from fastapi.responses import JSONResponse, Response
+
+import app.core.env  # noqa: F401  # loads .env before any config below is read
+from app.core.async_scraper import scraper
+from app.core.llm_registry import ModelBusyError, llm_registry
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.resources import READY_RESOURCES, preload, readiness, resources_status
+from app.route import (
+    langchain_ai_chat,
+    rag_langchain_ai_chat,
+    web_search_agent,
+    web_search_graph_router,
+)
+from app.service.ingestion_service import (
+    start_ingestion_workers,
+    stop_ingestion_workers,
+)
+from app.service.sync_service import start_bucket_sync, stop_bucket_sync
+
+# Runs in the gunicorn master with --preload, so workers share it after fork
+preload(before_fork=True)
+
+
+async def warm_up():
+    # Liveness (/) is served while this runs; /ready flips once it is done
+    await asyncio.to_thread(preload, READY_RESOURCES)
+    await llm_registry.start()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_ingestion_workers()
+    await start_bucket_sync()
+    warm_up_task = asyncio.create_task(warm_up())
+    yield
+    warm_up_task.cancel()
+    await stop_bucket_sync()
+    await stop_ingestion_workers()
+    if llm_registry.is_loaded:
+        await llm_registry.stop()
+    await scraper.aclose()
+
 
 app = FastAPI(
     debug=True,
@@ -13,6 +52,7 @@ app = FastAPI(
     description="AI based application hands on implementation",
     version="1.0.0",
     root_path="/api",
+    lifespan=lifespan,
 )
 
 origins = [
@@ -27,12 +67,47 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(langchain_ai_chat.langchain_ai_router)
 app.include_router(rag_langchain_ai_chat.rag_langchain_ai_chat_router)
 app.include_router(web_search_agent.agentic_web_router)
 app.include_router(web_search_graph_router.web_search_graph_router)
 
+
+@app.exception_handler(ModelBusyError)
+async def model_busy_handler(request: Request, exc: ModelBusyError):
+    return JSONResponse(
+        status_code=503,
+        content={"status": 503, "message": str(exc)},
+        headers={"Retry-After": "5"},
+    )
+
+
 @app.get("/")
 def health_test():
     return {"message": "Server is running"}
+
+
+@app.get("/ready")
+def readiness_check():
+    status = readiness()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content={"status": 503, "data": status})
+    return {"status": 200, "data": status}
+
+
+@app.get("/resources")
+def list_resources():
+    return {"status": 200, "data": resources_status()}
+
+
+@app.get("/llm-metrics")
+def llm_metrics():
+    return {"status": 200, "data": llm_registry.stats()}
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
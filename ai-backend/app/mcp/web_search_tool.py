@@ -1,11 +1,194 @@
 # app/mcp/web_search_tool.py
-from duckduckgo_search import DDGS
+import abc
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from app.core.logger_config import logger
+
+WEB_SEARCH_BACKEND = os.getenv("WEB_SEARCH_BACKEND", "duckduckgo")
+WEB_SEARCH_CACHE_TTL_SECONDS = float(os.getenv("WEB_SEARCH_CACHE_TTL_SECONDS", "600"))
+WEB_SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("WEB_SEARCH_CACHE_MAX_ENTRIES", "256"))
+# Used by WEB_SEARCH_BACKEND=fake, e.g. pointed at the benchmark web stub
+WEB_SEARCH_FAKE_BASE_URL = os.getenv("WEB_SEARCH_FAKE_BASE_URL", "http://example.com")
+WEB_SEARCH_FAKE_LATENCY_SECONDS = float(
+    os.getenv("WEB_SEARCH_FAKE_LATENCY_SECONDS", "0")
+)
+
+
+class SearchBackend(abc.ABC):
+    """A web search provider returning DDGS-style {title, href, body} dicts."""
+
+    name = "base"
+
+    @abc.abstractmethod
+    def search(self, query: str, max_results: int) -> List[dict]:
+        pass
+
+
+class DuckDuckGoBackend(SearchBackend):
+    name = "duckduckgo"
+
+    def search(self, query: str, max_results: int) -> List[dict]:
+        from duckduckgo_search import DDGS
+
+        with DDGS() as ddgs:
+            return ddgs.text(query, max_results=max_results) or []
+
+
+class FakeSearchBackend(SearchBackend):
+    """
+    Offline backend for tests and benchmarks: deterministic results per query,
+    with an optional artificial `latency` in seconds.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency: float = WEB_SEARCH_FAKE_LATENCY_SECONDS,
+        base_url: str = WEB_SEARCH_FAKE_BASE_URL,
+    ):
+        self.latency = latency
+        self.base_url = base_url.rstrip("/")
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def search(self, query: str, max_results: int) -> List[dict]:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        slug = hashlib.sha1(query.encode("utf-8")).hexdigest()[:12]
+        return [
+            {
+                "title": f"Result {rank} for {query}",
+                "href": f"{self.base_url}/{slug}/{rank}",
+                "body": f"Snippet {rank} about {query}.",
+            }
+            for rank in range(1, max_results + 1)
+        ]
+
+
+SEARCH_BACKENDS = {
+    DuckDuckGoBackend.name: DuckDuckGoBackend,
+    FakeSearchBackend.name: FakeSearchBackend,
+}
+
+
+class SearchResultCache:
+    """
+    TTL + LRU cache of search results with single-flight coalescing:
+    concurrent callers asking for the same key wait on one upstream call
+    instead of issuing their own. Failures are shared but never cached.
+    """
+
+    def __init__(
+        self,
+        ttl: float = WEB_SEARCH_CACHE_TTL_SECONDS,
+        max_entries: int = WEB_SEARCH_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, Tuple[float, List[dict]]] = OrderedDict()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+
+    def get_or_fetch(self, key: Hashable, fetch) -> List[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+                self._misses += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            results = fetch()
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if self.ttl > 0 and self.max_entries > 0:
+                self._entries[key] = (time.monotonic() + self.ttl, results)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        future.set_result(results)
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses + self._coalesced
+            return {
+                "size": len(self._entries),
+                "capacity": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "hit_rate": (
+                    round((self._hits + self._coalesced) / lookups, 4) if lookups else 0
+                ),
+            }
+
+
+search_cache = SearchResultCache()
+_backend: Optional[SearchBackend] = None
+
+
+def get_search_backend() -> SearchBackend:
+    global _backend
+    if _backend is None:
+        if WEB_SEARCH_BACKEND not in SEARCH_BACKENDS:
+            raise ValueError(
+                f"Unknown WEB_SEARCH_BACKEND '{WEB_SEARCH_BACKEND}', "
+                f"expected one of {sorted(SEARCH_BACKENDS)}"
+            )
+        _backend = SEARCH_BACKENDS[WEB_SEARCH_BACKEND]()
+        logger.info(f"🔎 Web search backend: {_backend.name}")
+    return _backend
+
+
+def set_search_backend(backend: SearchBackend):
+    """Swap the search provider (e.g. a FakeSearchBackend) and drop cached results."""
+    global _backend
+    _backend = backend
+    search_cache.clear()
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.split()).casefold()
+
 
 def perform_web_search(query: str, max_results: int = 5):
-    with DDGS() as ddgs:
-        results = ddgs.text(query, max_results=max_results)
-        return {
-            "query": query,
-            "results": results,
-            "total": len(results)
-        }
+    backend = get_search_backend()
+    key = (backend.name, _normalize_query(query), max_results)
+    results = search_cache.get_or_fetch(key, lambda: backend.search(query, max_results))
+    return {"query": query, "results": list(results), "total": len(results)}
@@ -1,17 +1,51 @@
-from fastapi import APIRouter
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Request
 from app.core.logger_config import logger
-from app.core.util import stream_generator
+from app.core.streaming import stream_format, streaming_response
+from app.core.util import areplay_generator, astream_generator
 from app.schema.chat import ChatRequest
 from app.core.common import llm
+from app.service.answer_cache import answer_cache
+from app.service.doc_processor_service import query_embedder
 
 langchain_ai_router = APIRouter(tags=["Langchain AI Router"], prefix="/langchain-ai")
 
 
+def plain_chat_context_key(model: str, history: list) -> tuple:
+    """
+    Cache bucket for a plain chat answer: everything sent to the model besides
+    the query itself, so answers are only replayed for the same model and the
+    same earlier turns.
+    """
+    return ("chat", model, tuple((m["role"], m["content"]) for m in history))
+
+
 @langchain_ai_router.post("/chat")
-async def langchain_chat_conversation(payload: ChatRequest):
+async def langchain_chat_conversation(payload: ChatRequest, request: Request):
     logger.info(f"Initiating LangChain chat stream for: {payload.query}")
+
+    fmt = stream_format(request)
     messages = [{"role": "user", "content": payload.query}]
-    return StreamingResponse(
-        stream_generator(llm, messages), media_type="application/octet-stream"
+    context_key = plain_chat_context_key(llm.model, messages[:-1])
+    query_vector = await query_embedder.aembed_query(payload.query)
+    cached_answer = answer_cache.lookup(query_vector, context_key)
+    if cached_answer is not None:
+        logger.info("♻️ Answer served from the semantic cache")
+        return streaming_response(
+            areplay_generator(cached_answer, fmt=fmt),
+            fmt,
+            headers={"X-Answer-Cache": "hit"},
+        )
+
+    return streaming_response(
+        astream_generator(
+            llm,
+            messages,
+            request,
+            on_complete=lambda answer: answer_cache.store(
+                query_vector, context_key, answer
+            ),
+            fmt=fmt,
+        ),
+        fmt,
+        headers={"X-Answer-Cache": "miss"},
     )
@@ -1,54 +1,180 @@
 import os
-from fastapi import APIRouter, Query, UploadFile, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Query, Request, HTTPException
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from app.core.logger_config import logger
 from app.core.common import llm
-from app.core.util import construct_chat_prompt, stream_generator
+from app.core.metrics import span
+from app.core.streaming import stream_format, streaming_response
+from app.core.util import (
+    areplay_generator,
+    astream_generator,
+    construct_chat_prompt,
+)
 from app.schema.chat import ChatRequest, ChatResponse
-from app.service.doc_processor_service import get_matched_content_from_vector_store
-from app.service.document_service import handle_file_upload
+from app.service.answer_cache import answer_cache
+from app.service.context_packer import pack_context
+from app.service.doc_processor_service import (
+    aget_matched_content_from_vector_store,
+    get_matched_content_from_vector_store,
+    query_embedder,
+    rebuild_sparse_index,
+)
+from app.service.document_service import handle_document_delete, handle_file_upload
+from app.service.ingestion_service import IngestionQueueFullError, get_job
 from app.service.minio_service import list_files_in_bucket
+from app.service.sync_service import SyncInProgressError, sync_bucket
+from app.service.upload_stream import UploadRejectedError
 
 rag_langchain_ai_chat_router = APIRouter(
     tags=["Document Search & Q&A Web App (Beginner)"], prefix="/rag-langchain-ai"
 )
 
 
-@rag_langchain_ai_chat_router.post("/upload-document")
-async def upload_document(file: UploadFile):
-    if not file:
-        logger.error("❌ File not provided in the request payload.")
-        return {"status": 400, "message": "File not provided"}
+# The body is parsed as a stream (see upload_stream.py) rather than through an
+# UploadFile parameter, so the form is described here for the OpenAPI docs
+UPLOAD_DOCUMENT_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
 
+@rag_langchain_ai_chat_router.post(
+    "/upload-document", openapi_extra=UPLOAD_DOCUMENT_BODY
+)
+async def upload_document(request: Request):
     logger.info(f"🗂️ Attempting file upload to bucket")
     try:
-        await handle_file_upload(file=file)
-        return {"status": 201, "message": f"File name is {file.filename}."}
-    except Exception as e:
-        logger.error(
-            f"❌ File upload failed for file '{file.filename}': {e}", exc_info=True
+        job = await handle_file_upload(request)
+        return JSONResponse(
+            status_code=202,
+            content={
+                "status": 202,
+                "message": f"File name is {job['filename']}.",
+                "job_id": job["job_id"],
+            },
         )
+    except UploadRejectedError as e:
+        logger.error(f"❌ Rejecting upload: {e}")
+        return {"status": 400, "message": str(e)}
+    except IngestionQueueFullError as e:
+        logger.warning(f"⏳ Rejecting upload: {e}")
+        return JSONResponse(
+            status_code=503,
+            content={"status": 503, "message": "Ingestion queue is full, retry later"},
+        )
+    except Exception as e:
+        logger.error(f"❌ File upload failed: {e}", exc_info=True)
         return {"status": 500, "message": "File upload failed"}
 
 
+@rag_langchain_ai_chat_router.delete(
+    "/documents/{document_name}", summary="Delete a document and its vectors"
+)
+def delete_document(document_name: str):
+    try:
+        return handle_document_delete(document_name)
+    except Exception as e:
+        logger.exception(f"❌ Deleting document '{document_name}' failed: {e}")
+        raise HTTPException(status_code=500, detail="Document deletion failed")
+
+
+@rag_langchain_ai_chat_router.get(
+    "/jobs/{job_id}", summary="Status of a document ingestion job"
+)
+def get_ingestion_job(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return {"status": 200, "data": job}
+
+
+@rag_langchain_ai_chat_router.get(
+    "/jobs/{job_id}/progress", summary="Chunk progress of a document ingestion job"
+)
+def get_ingestion_job_progress(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return {
+        "status": 200,
+        "data": {
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "chunks_parsed": job["chunks_parsed"],
+            "chunks_embedded": job["chunks_embedded"],
+            "chunks_indexed": job["chunks_indexed"],
+        },
+    }
+
+
 @rag_langchain_ai_chat_router.post("/chat")
-def chat_with_document(request: ChatRequest):
+async def chat_with_document(request: ChatRequest, http_request: Request):
     try:
         # Step 1: Perform vector similarity search
-        retrieved_docs = get_matched_content_from_vector_store(request.query)
+        retrieved_docs = await aget_matched_content_from_vector_store(request.query)
 
-        # Step 2: Concatenate the content of retrieved documents
-        context = "\n\n".join(doc.page_content for doc in retrieved_docs)
+        # Step 2: Pack the retrieved content into the prompt token budget
+        with span("context_packing"):
+            packed = await run_in_threadpool(pack_context, retrieved_docs)
+        context = packed.text
+        logger.info(
+            f"📦 Packed {packed.chunks_used} chunks into "
+            f"{packed.tokens_used}/{packed.token_budget} context tokens "
+            f"({packed.chunks_dropped} dropped, "
+            f"{packed.overlap_chars_removed} overlap chars removed)"
+        )
 
         if not context:
             return ChatResponse(
                 message="No relevant content found in the document.", status="404"
             )
 
-        # Step 3: Ask the LLM with the context + user query
-        messages = construct_chat_prompt(context, request.query)
-        return StreamingResponse(
-            stream_generator(llm, messages), media_type="application/octet-stream"
+        fmt = stream_format(http_request)
+        headers = {
+            "X-Context-Tokens": str(packed.tokens_used),
+            "X-Context-Chunks": str(packed.chunks_used),
+        }
+
+        # Step 3: Replay a cached answer for a similar question over the same chunks
+        # (the query vector comes from the embedding LRU filled by retrieval)
+        query_vector = await query_embedder.aembed_query(request.query)
+        context_key = ("rag", frozenset(d.metadata["point_id"] for d in retrieved_docs))
+        cached_answer = answer_cache.lookup(query_vector, context_key)
+        if cached_answer is not None:
+            logger.info("♻️ Answer served from the semantic cache")
+            return streaming_response(
+                areplay_generator(cached_answer, fmt=fmt),
+                fmt,
+                headers={**headers, "X-Answer-Cache": "hit"},
+            )
+
+        # Step 4: Ask the LLM with the context + user query
+        with span("prompt_build"):
+            messages = construct_chat_prompt(context, request.query)
+        documents = {d.metadata.get("document_name") for d in retrieved_docs}
+        return streaming_response(
+            astream_generator(
+                llm,
+                messages,
+                http_request,
+                on_complete=lambda answer: answer_cache.store(
+                    query_vector, context_key, answer, documents
+                ),
+                fmt=fmt,
+            ),
+            fmt,
+            headers={**headers, "X-Answer-Cache": "miss"},
         )
 
     except Exception as e:
@@ -71,10 +197,51 @@ def get_files():
         files = list_files_in_bucket(bucket_name=bucket_name)
         return {"status": 200, "data": files}
     except Exception as e:
-        logger.exception("❌ File listing failed")
+        logger.exception(f"❌ File listing failed: {e}")
         raise HTTPException(status_code=500, detail="File listing failed")
 
 
+@rag_langchain_ai_chat_router.get(
+    "/embedding-metrics", summary="Query embedding cache and batching metrics"
+)
+def get_embedding_metrics():
+    return {"status": 200, "data": query_embedder.stats()}
+
+
+@rag_langchain_ai_chat_router.get(
+    "/answer-cache-metrics", summary="Semantic answer cache metrics"
+)
+def get_answer_cache_metrics():
+    return {"status": 200, "data": answer_cache.stats()}
+
+
+@rag_langchain_ai_chat_router.post(
+    "/sparse-index/rebuild", summary="Backfill the BM25 index from Qdrant"
+)
+def rebuild_bm25_index():
+    try:
+        indexed = rebuild_sparse_index()
+        return {"status": 200, "data": {"indexed": indexed}}
+    except Exception as e:
+        logger.exception(f"❌ Rebuilding the BM25 index failed: {e}")
+        raise HTTPException(status_code=500, detail="Rebuilding the index failed")
+
+
+@rag_langchain_ai_chat_router.post(
+    "/sync", summary="Re-index new, changed and deleted objects of the bucket"
+)
+def sync_document_bucket(
+    dry_run: bool = Query(False, description="Only report what would change"),
+):
+    try:
+        return {"status": 200, "data": sync_bucket(dry_run=dry_run)}
+    except SyncInProgressError as e:
+        return JSONResponse(status_code=409, content={"status": 409, "message": str(e)})
+    except Exception as e:
+        logger.exception(f"❌ Bucket sync failed: {e}")
+        raise HTTPException(status_code=500, detail="Bucket sync failed")
+
+
 @rag_langchain_ai_chat_router.post("/query", summary="Query into the vector database")
 def get_query_items(
     query: str = Query(
@@ -92,7 +259,7 @@ def get_query_items(
         return {"status": "success", "data": vector_db_response}
 
     except Exception as e:
-        logger.exception("❌ Reading the vector database failed")
+        logger.exception(f"❌ Reading the vector database failed: {e}")
         raise HTTPException(
             status_code=500, detail="Reading the vector database failed"
         )
@@ -1,8 +1,10 @@
 # app/route/web_search_agent.py
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from pydantic import BaseModel
 from app.agents.web_search_agent import agent_executor
+from app.core.streaming import stream_format, streaming_response
+from app.core.util import astream_agent_events
 
 agentic_web_router = APIRouter(prefix="/agentic-web", tags=["Agentic Web Search"])
 
@@ -13,3 +15,14 @@ class AgentRequest(BaseModel):
 def run_web_agent(request: AgentRequest):
     response = agent_executor.run(request.query)
     return {"response": response}
+
+
+@agentic_web_router.post("/stream")
+async def stream_web_agent(request: AgentRequest, http_request: Request):
+    fmt = stream_format(http_request)
+    return streaming_response(
+        astream_agent_events(
+            agent_executor, {"input": request.query}, request=http_request, fmt=fmt
+        ),
+        fmt,
+    )
@@ -1,12 +1,18 @@
+import json
 import logging
-import os
+import uuid
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from langgraph.prebuilt import create_react_agent
-from langchain_ollama import ChatOllama
 
-from app.mcp.web_search_tool import perform_web_search
-from app.core.scrape_links import scrape_url_content
+from app.core.async_scraper import scraper
+from app.core.llm_registry import get_chat_model
+from app.core.page_cache import page_cache
+from app.core.resources import lazy_resource
+from app.core.streaming import stream_format, streaming_response
+from app.core.trace_store import trace_store
+from app.core.util import astream_agent_events
+from app.mcp.web_search_tool import perform_web_search, search_cache
 
 # === Logger Configuration ===
 logger = logging.getLogger(__name__)
@@ -25,11 +31,10 @@ if not logger.handlers:
     logger.addHandler(console_handler)
 
 # === Router Configuration ===
-web_search_graph_router = APIRouter(prefix="/web-search-graph", tags=["Web Search Graph"])
+web_search_graph_router = APIRouter(
+    prefix="/web-search-graph", tags=["Web Search Graph"]
+)
 
-# === LLM Setup ===
-OLLAMA_HOST = os.getenv("OLLAMA_HOST")
-llm = ChatOllama(model="llama3.1:8b", base_url=OLLAMA_HOST)
 
 # === Tools ===
 def search_tool(query: str) -> list[str]:
@@ -44,7 +49,11 @@ def search_tool(query: str) -> list[str]:
         if isinstance(results, list):
             urls = [res.get("href") for res in results if "href" in res]
         else:
-            urls = [item.get("href") for item in results.get("results", []) if "href" in item]
+            urls = [
+                item.get("href")
+                for item in results.get("results", [])
+                if "href" in item
+            ]
         top_urls = urls[:5]
         logger.info(f"Found top {len(top_urls)} URLs: {top_urls}")
         return top_urls
@@ -52,36 +61,120 @@ def search_tool(query: str) -> list[str]:
         logger.error(f"Error in search_tool: {e}", exc_info=True)
         return []
 
-def scrape_tool(urls: list[str]) -> list[dict]:
+
+async def scrape_tool(urls: list[str]) -> list[dict]:
     """
-    Given a list of URLs, scrape the main content from each page and return a list of content dictionaries.
+    Given a list of URLs, scrape the main content from each page and return
+    a list of content dictionaries.
     """
     logger.info(f"Scraping {len(urls)} URLs")
     try:
-        contents = [scrape_url_content(url) for url in urls[:3]]  # scrape top 3 only
+        # Top 3 are fetched concurrently; slow sites are cut off by the deadline
+        contents = await scraper.scrape_many(urls[:3])
         logger.info("Scraping completed")
         return contents
     except Exception as e:
         logger.error(f"Error in scrape_tool: {e}", exc_info=True)
         return []
 
+
 # === Agent Setup ===
-agent = create_react_agent(
-    model=llm,
-    tools=[search_tool, scrape_tool],
-    prompt="You are a helpful assistant that first searches the web then scrapes content from top results.",
-    debug=True
+# Built on first request (see app/core/resources.py)
+agent = lazy_resource(
+    "web_search_graph_agent",
+    lambda: create_react_agent(
+        model=get_chat_model("llama3.1:8b"),
+        tools=[search_tool, scrape_tool],
+        prompt=(
+            "You are a helpful assistant that first searches the web "
+            "then scrapes content from top results."
+        ),
+        debug=True,
+    ),
 )
 
+
+# === Response projection ===
+def _scraped_pages(message) -> list[dict]:
+    content = message.content
+    if isinstance(content, str):
+        try:
+            content = json.loads(content)
+        except ValueError:
+            return []
+    if not isinstance(content, list):
+        return []
+    return [page for page in content if isinstance(page, dict)]
+
+
+def project_result(result: dict) -> dict:
+    """Final answer plus (url, title) citations of the pages scrape_tool fetched."""
+    messages = result.get("messages", [])
+    sources, seen = [], set()
+    for message in messages:
+        if getattr(message, "type", None) != "tool" or message.name != "scrape_tool":
+            continue
+        for page in _scraped_pages(message):
+            url = page.get("url")
+            if url and url not in seen and page.get("title") != "Failed to fetch":
+                seen.add(url)
+                sources.append({"url": url, "title": page.get("title")})
+    answer = messages[-1].content if messages else ""
+    return {"answer": answer, "sources": sources}
+
+
 # === Endpoint ===
 @web_search_graph_router.get("/")
-async def web_search_graph(query: str = Query(..., description="Search query")):
+async def web_search_graph(
+    query: str = Query(..., description="Search query"),
+    trace: bool = Query(False, description="Include the full agent message trace"),
+):
     logger.info(f"Received web search request for query: '{query}'")
-    messages = [{"role": "user", "content": f"Search and scrape content for query: {query}"}]
+    messages = [
+        {"role": "user", "content": f"Search and scrape content for query: {query}"}
+    ]
+    run_id = uuid.uuid4()
     try:
-        result = agent.invoke({"messages": messages})
+        result = await agent.ainvoke({"messages": messages}, config={"run_id": run_id})
         logger.info("Agent execution completed successfully")
-        return {"result": result}
+        trace_store.put(str(run_id), result)
+        response = {"run_id": str(run_id), **project_result(result)}
+        if trace:
+            response["trace"] = result
+        return response
     except Exception as e:
         logger.error(f"Error while running agent: {e}", exc_info=True)
         return {"error": "Internal server error"}
+
+
+@web_search_graph_router.get("/trace/{run_id}")
+async def get_web_search_trace(run_id: str):
+    result = trace_store.get(run_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No trace stored for run {run_id}")
+    return {"run_id": run_id, "result": result}
+
+
+@web_search_graph_router.get("/stream")
+async def web_search_graph_stream(
+    request: Request, query: str = Query(..., description="Search query")
+):
+    logger.info(f"Received streaming web search request for query: '{query}'")
+    messages = [
+        {"role": "user", "content": f"Search and scrape content for query: {query}"}
+    ]
+    fmt = stream_format(request)
+    return streaming_response(
+        astream_agent_events(agent, {"messages": messages}, request=request, fmt=fmt),
+        fmt,
+    )
+
+
+@web_search_graph_router.get("/search-cache-metrics")
+def get_search_cache_metrics():
+    return {"status": 200, "data": search_cache.stats()}
+
+
+@web_search_graph_router.get("/page-cache-metrics")
+def get_page_cache_metrics():
+    return {"status": 200, "data": page_cache.stats()}
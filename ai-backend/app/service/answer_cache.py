@@ -0,0 +1,142 @@
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Optional, Set
+
+import numpy as np
+
+from app.core.logger_config import logger
+
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1024"))
+
+
+@dataclass
+class CachedAnswer:
+    context_key: Hashable
+    vector: np.ndarray
+    answer: str
+    documents: FrozenSet[str]
+    expires_at: float
+
+
+class SemanticAnswerCache:
+    """
+    Reuses LLM answers for near-identical questions.
+
+    Entries are bucketed by a context key (the set of retrieved chunk ids, or
+    the model and earlier turns for plain chat), so an answer is only
+    replayed when the same context would be sent to the model and the query
+    embeddings are at least `similarity` cosine-similar. Entries expire after
+    `ttl` seconds and the least recently used ones are evicted past
+    `max_entries`.
+    """
+
+    def __init__(
+        self,
+        similarity: float = ANSWER_CACHE_SIMILARITY,
+        ttl: float = ANSWER_CACHE_TTL_SECONDS,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+    ):
+        self.similarity = similarity
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._entries: OrderedDict[int, CachedAnswer] = OrderedDict()
+        self._buckets: Dict[Hashable, Set[int]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._invalidated = 0
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        bucket = self._buckets.get(entry.context_key)
+        if bucket is not None:
+            bucket.discard(entry_id)
+            if not bucket:
+                del self._buckets[entry.context_key]
+
+    def lookup(self, query_vector, context_key: Hashable) -> Optional[str]:
+        vector = self._normalize(query_vector)
+        now = time.monotonic()
+        with self._lock:
+            best_id, best_score = None, self.similarity
+            for entry_id in list(self._buckets.get(context_key, ())):
+                entry = self._entries[entry_id]
+                if entry.expires_at <= now:
+                    self._remove(entry_id)
+                    continue
+                score = float(np.dot(vector, entry.vector))
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._entries.move_to_end(best_id)
+            return self._entries[best_id].answer
+
+    def store(
+        self,
+        query_vector,
+        context_key: Hashable,
+        answer: str,
+        documents: Iterable[str] = (),
+    ):
+        if not answer:
+            return
+        entry = CachedAnswer(
+            context_key=context_key,
+            vector=self._normalize(query_vector),
+            answer=answer,
+            documents=frozenset(d for d in documents if d),
+            expires_at=time.monotonic() + self.ttl,
+        )
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = entry
+            self._buckets.setdefault(context_key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_documents(self, document_names: List[str]):
+        """Drop every answer that was generated from one of these documents."""
+        names = set(document_names)
+        with self._lock:
+            stale = [
+                entry_id
+                for entry_id, entry in self._entries.items()
+                if entry.documents & names
+            ]
+            for entry_id in stale:
+                self._remove(entry_id)
+            self._invalidated += len(stale)
+        if stale:
+            logger.info(f"🧹 Invalidated {len(stale)} cached answers for {names}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "capacity": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0,
+                "invalidated": self._invalidated,
+            }
+
+
+answer_cache = SemanticAnswerCache()
@@ -0,0 +1,473 @@
+import argparse
+import contextvars
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+import app.core.env  # noqa: F401  # loads .env before any config below is read
+from app.core.logger_config import logger
+from app.core.metrics import observe_stage, record_stages
+from app.service.doc_processor_service import (
+    SUPPORTED_EXTENSIONS,
+    delete_document_vectors,
+    embed_documents,
+    file_sha256,
+    filter_new_documents,
+    iter_chunk_batches,
+    record_indexed_document,
+    store_embeddings,
+)
+from app.service.ingestion_service import summarize_stages
+from app.service.minio_service import minio_client, upload_path_to_bucket
+
+BULK_PARSE_WORKERS = int(os.getenv("BULK_PARSE_WORKERS", str(os.cpu_count() or 2)))
+# "process" parses in spawned worker processes; "thread" in this process
+BULK_PARSE_EXECUTOR = os.getenv("BULK_PARSE_EXECUTOR", "process")
+# Chunks from several documents are embedded together to keep the encoder busy
+BULK_EMBED_BATCH_SIZE = int(os.getenv("BULK_EMBED_BATCH_SIZE", "256"))
+BULK_UPSERT_BATCH_SIZE = int(os.getenv("BULK_UPSERT_BATCH_SIZE", "64"))
+BULK_UPSERT_WORKERS = int(os.getenv("BULK_UPSERT_WORKERS", "4"))
+BULK_MANIFEST_PATH = os.getenv(
+    "BULK_MANIFEST_PATH", str(Path(os.getcwd()) / "data" / "bulk_ingest_manifest.jsonl")
+)
+
+
+@dataclass
+class Source:
+    """One document to ingest, from a local directory or a MinIO bucket."""
+
+    document_name: str
+    fingerprint: str  # size+mtime of a file or etag of an object; resume key
+    path: Optional[str] = None
+    bucket: Optional[str] = None
+    object_name: Optional[str] = None
+    metadata: dict = field(default_factory=dict)
+
+
+@dataclass
+class ParsedDocument:
+    source: Source
+    document_hash: str
+    chunks: List[Document]
+    pages: int
+    parse_seconds: float
+
+
+@dataclass
+class _Progress:
+    parsed: ParsedDocument
+    pending: int  # chunks not yet upserted
+
+
+def iter_directory_sources(directory: str) -> Iterator[Source]:
+    root = Path(directory)
+    for path in sorted(root.rglob("*")):
+        if not path.is_file() or path.suffix.lower() not in SUPPORTED_EXTENSIONS:
+            continue
+        stat = path.stat()
+        yield Source(
+            document_name=path.relative_to(root).as_posix(),
+            fingerprint=f"{stat.st_size}:{stat.st_mtime_ns}",
+            path=str(path),
+        )
+
+
+def iter_minio_sources(bucket: str, prefix: str = "") -> Iterator[Source]:
+    for obj in minio_client.list_objects(bucket, prefix=prefix, recursive=True):
+        if Path(obj.object_name).suffix.lower() not in SUPPORTED_EXTENSIONS:
+            continue
+        yield Source(
+            document_name=obj.object_name,
+            fingerprint=obj.etag,
+            bucket=bucket,
+            object_name=obj.object_name,
+            # Lets a bucket sync tell which object revision was indexed
+            metadata={
+                "source_etag": obj.etag,
+                "source_last_modified": (
+                    obj.last_modified.isoformat() if obj.last_modified else None
+                ),
+            },
+        )
+
+
+def parse_source(source: Source) -> ParsedDocument:
+    """Download (for MinIO), hash and chunk one document. Runs in a worker process."""
+    started = time.perf_counter()
+    path, tmp_path = source.path, None
+    try:
+        if source.bucket:
+            suffix = Path(source.object_name).suffix
+            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+                tmp_path = path = tmp.name
+            minio_client.fget_object(source.bucket, source.object_name, tmp_path)
+
+        document_hash = file_sha256(path)
+        chunks = [
+            chunk
+            for batch in iter_chunk_batches(
+                path,
+                metadata={
+                    **source.metadata,
+                    "source": source.document_name,
+                    "document_name": source.document_name,
+                    "document_hash": document_hash,
+                },
+            )
+            for chunk in batch
+        ]
+        # Temp paths mean nothing once the file is gone
+        for chunk in chunks:
+            chunk.metadata.pop("file_path", None)
+        pages = len({chunk.metadata.get("page") for chunk in chunks})
+        return ParsedDocument(
+            source, document_hash, chunks, pages, time.perf_counter() - started
+        )
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class Manifest:
+    """
+    Append-only JSONL checkpoint of finished documents. A re-run skips
+    sources whose fingerprint was already ingested, so an interrupted bulk
+    load resumes where it stopped.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.done: Dict[str, str] = {}
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line of an interrupted run
+                    if entry.get("status") == "completed":
+                        self.done[entry["document_name"]] = entry["fingerprint"]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        torn = False
+        if self.path.exists() and self.path.stat().st_size:
+            with open(self.path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+        self._file = open(self.path, "a", encoding="utf-8")
+        if torn:
+            # Terminate the torn line so the next entry starts on its own line
+            self._file.write("\n")
+
+    def is_done(self, source: Source) -> bool:
+        return self.done.get(source.document_name) == source.fingerprint
+
+    def record(self, source: Source, status: str, **fields):
+        entry = {
+            "document_name": source.document_name,
+            "fingerprint": source.fingerprint,
+            "status": status,
+            **fields,
+            "finished_at": datetime.now().isoformat(),
+        }
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class BulkIngestion:
+    """
+    Ingest many documents at once:
+
+    - documents are parsed and chunked across a process pool
+    - new chunks of several documents are embedded in one batch
+    - each embedded batch is upserted as parallel sub-batches while the
+      next batch is being embedded
+    - a document is recorded in the index (and checkpointed in the manifest,
+      if any) once all of its chunks are stored
+    """
+
+    def __init__(
+        self,
+        manifest: Optional[Manifest] = None,
+        parse_workers: int = BULK_PARSE_WORKERS,
+        parse_executor: str = BULK_PARSE_EXECUTOR,
+        embed_batch_size: int = BULK_EMBED_BATCH_SIZE,
+        upsert_batch_size: int = BULK_UPSERT_BATCH_SIZE,
+        upsert_workers: int = BULK_UPSERT_WORKERS,
+        archive_bucket: Optional[str] = None,
+    ):
+        self.manifest = manifest
+        self.parse_workers = parse_workers
+        self.parse_executor = parse_executor
+        self.embed_batch_size = embed_batch_size
+        self.upsert_batch_size = upsert_batch_size
+        self.upsert_workers = upsert_workers
+        self.archive_bucket = archive_bucket
+
+        self._progress: Dict[str, _Progress] = {}
+        self._buffer: List[Tuple[str, Document]] = []
+        self._upserts: Deque[Tuple[Future, Dict[str, int]]] = deque()
+        self.totals = {
+            "documents": 0,
+            "skipped_documents": 0,
+            "failed_documents": 0,
+            "pages": 0,
+            "chunks": 0,
+            "chunks_skipped": 0,
+            "embedding_cache_hits": 0,
+        }
+
+    def run(self, sources: List[Source]) -> dict:
+        todo = []
+        for source in sources:
+            if self.manifest and self.manifest.is_done(source):
+                self.totals["skipped_documents"] += 1
+            else:
+                todo.append(source)
+        logger.info(
+            f"📚 Bulk ingesting {len(todo)} document(s) "
+            f"({self.totals['skipped_documents']} already done), "
+            f"{self.parse_workers} parse worker(s)"
+        )
+
+        started = time.perf_counter()
+        with (
+            record_stages() as timings,
+            self._new_parse_pool() as parse_pool,
+            ThreadPoolExecutor(
+                self.upsert_workers, thread_name_prefix="upsert"
+            ) as self._upsert_pool,
+        ):
+            # Bounded look-ahead so parsed chunks do not pile up in memory
+            queue = iter(todo)
+            in_flight: Deque[Tuple[Source, Future]] = deque()
+
+            def submit_next():
+                source = next(queue, None)
+                if source is not None:
+                    in_flight.append((source, parse_pool.submit(parse_source, source)))
+
+            for _ in range(self.parse_workers * 2):
+                submit_next()
+            while in_flight:
+                source, future = in_flight.popleft()
+                try:
+                    parsed = future.result()
+                except Exception as e:
+                    self._fail(source, e)
+                else:
+                    observe_stage("chunking", parsed.parse_seconds)
+                    self._add(parsed)
+                submit_next()
+                self._reap(block=False)
+
+            self._flush()
+            self._reap(block=True)
+
+        wall = time.perf_counter() - started
+        summary = {
+            **self.totals,
+            "wall_seconds": round(wall, 3),
+            "pages_per_second": round(self.totals["pages"] / wall, 3) if wall else 0,
+            "stage_seconds": summarize_stages(timings),
+        }
+        logger.info(f"✅ Bulk ingestion finished: {summary}")
+        return summary
+
+    def _new_parse_pool(self) -> Executor:
+        if self.parse_executor == "thread":
+            return ThreadPoolExecutor(self.parse_workers, thread_name_prefix="parse")
+        # spawn keeps torch / qdrant state of this process out of the workers
+        ctx = multiprocessing.get_context("spawn")
+        return ProcessPoolExecutor(self.parse_workers, mp_context=ctx)
+
+    def _fail(self, source: Source, error: Exception):
+        logger.error(f"❌ Bulk ingestion failed for {source.document_name}: {error}")
+        self.totals["failed_documents"] += 1
+        if self.manifest:
+            self.manifest.record(source, "failed", error=str(error))
+
+    def _add(self, parsed: ParsedDocument):
+        name = parsed.source.document_name
+        try:
+            chunks = filter_new_documents(parsed.chunks)
+        except Exception as e:
+            self._fail(parsed.source, e)
+            return
+        self.totals["chunks_skipped"] += len(parsed.chunks) - len(chunks)
+        self._progress[name] = _Progress(parsed, pending=len(chunks))
+        if not chunks:
+            self._complete(name)
+            return
+        self._buffer.extend((name, chunk) for chunk in chunks)
+        while len(self._buffer) >= self.embed_batch_size:
+            self._flush(self.embed_batch_size)
+
+    def _flush(self, size: Optional[int] = None):
+        if not self._buffer:
+            return
+        size = size or len(self._buffer)
+        batch, self._buffer = self._buffer[:size], self._buffer[size:]
+        documents = [chunk for _, chunk in batch]
+        try:
+            embeddings, hits = embed_documents(documents)
+        except Exception as e:
+            for name in {name for name, _ in batch}:
+                self._abandon(name, e)
+            return
+        self.totals["embedding_cache_hits"] += hits
+
+        for start in range(0, len(batch), self.upsert_batch_size):
+            part = batch[start : start + self.upsert_batch_size]
+            counts: Dict[str, int] = {}
+            for name, _ in part:
+                counts[name] = counts.get(name, 0) + 1
+            future = self._upsert_pool.submit(
+                # Carries the stage recorder into the upsert thread
+                contextvars.copy_context().run,
+                store_embeddings,
+                [chunk for _, chunk in part],
+                embeddings[start : start + self.upsert_batch_size],
+            )
+            self._upserts.append((future, counts))
+
+    def _reap(self, block: bool):
+        """Account finished upserts in submission order; complete documents."""
+        while self._upserts and (block or self._upserts[0][0].done()):
+            future, counts = self._upserts.popleft()
+            error = future.exception()
+            for name, count in counts.items():
+                if error is not None:
+                    self._abandon(name, error)
+                    continue
+                progress = self._progress.get(name)
+                if progress is None:
+                    continue
+                progress.pending -= count
+                if progress.pending == 0:
+                    self._complete(name)
+
+    def _abandon(self, name: str, error: Exception):
+        progress = self._progress.pop(name, None)
+        if progress is not None:
+            self._fail(progress.parsed.source, error)
+
+    def _complete(self, name: str):
+        parsed = self._progress.pop(name).parsed
+        source = parsed.source
+        bucket = source.bucket
+        etag = source.metadata.get("source_etag")
+        last_modified = source.metadata.get("source_last_modified")
+        try:
+            # Drop vectors of earlier revisions of the same document
+            if parsed.chunks:
+                delete_document_vectors(name, keep_hash=parsed.document_hash)
+            if self.archive_bucket and source.path:
+                uploaded = upload_path_to_bucket(source.path, name, self.archive_bucket)
+                bucket, etag, last_modified = self.archive_bucket, uploaded.etag, None
+            record_indexed_document(
+                name,
+                parsed.document_hash,
+                len(parsed.chunks),
+                source_bucket=bucket,
+                source_etag=etag,
+                source_last_modified=last_modified,
+            )
+        except Exception as e:
+            self._fail(source, e)
+            return
+        self.totals["documents"] += 1
+        self.totals["pages"] += parsed.pages
+        self.totals["chunks"] += len(parsed.chunks)
+        if self.manifest:
+            self.manifest.record(
+                source,
+                "completed",
+                document_hash=parsed.document_hash,
+                pages=parsed.pages,
+                chunks=len(parsed.chunks),
+            )
+        logger.info(f"✅ Ingested {name} ({parsed.pages} pages)")
+
+
+def bulk_ingest(
+    directory: Optional[str] = None,
+    bucket: Optional[str] = None,
+    prefix: str = "",
+    manifest_path: str = BULK_MANIFEST_PATH,
+    **options,
+) -> dict:
+    if bool(directory) == bool(bucket):
+        raise ValueError("Pass exactly one of a directory or a MinIO bucket")
+    sources = list(
+        iter_directory_sources(directory)
+        if directory
+        else iter_minio_sources(bucket, prefix)
+    )
+    manifest = Manifest(manifest_path)
+    try:
+        return BulkIngestion(manifest, **options).run(sources)
+    finally:
+        manifest.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Bulk ingest a directory or a MinIO prefix into the RAG index"
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--dir", help="Directory to ingest recursively")
+    source.add_argument(
+        "--minio-prefix",
+        metavar="BUCKET[/PREFIX]",
+        help="Ingest objects of a MinIO bucket, optionally under a prefix",
+    )
+    parser.add_argument("--manifest", default=BULK_MANIFEST_PATH)
+    parser.add_argument("--parse-workers", type=int, default=BULK_PARSE_WORKERS)
+    parser.add_argument(
+        "--parse-executor", choices=["process", "thread"], default=BULK_PARSE_EXECUTOR
+    )
+    parser.add_argument("--embed-batch-size", type=int, default=BULK_EMBED_BATCH_SIZE)
+    parser.add_argument("--upsert-batch-size", type=int, default=BULK_UPSERT_BATCH_SIZE)
+    parser.add_argument("--upsert-workers", type=int, default=BULK_UPSERT_WORKERS)
+    parser.add_argument(
+        "--archive",
+        action="store_true",
+        help="Also upload ingested files to MINIO_DOCUMENT_BUCKET (--dir only)",
+    )
+    args = parser.parse_args()
+
+    bucket, _, prefix = (args.minio_prefix or "").partition("/")
+    summary = bulk_ingest(
+        directory=args.dir,
+        bucket=bucket or None,
+        prefix=prefix,
+        manifest_path=args.manifest,
+        parse_workers=args.parse_workers,
+        parse_executor=args.parse_executor,
+        embed_batch_size=args.embed_batch_size,
+        upsert_batch_size=args.upsert_batch_size,
+        upsert_workers=args.upsert_workers,
+        archive_bucket=(
+            os.getenv("MINIO_DOCUMENT_BUCKET") if args.archive and args.dir else None
+        ),
+    )
+    print(json.dumps(summary, indent=2))
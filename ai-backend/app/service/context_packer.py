@@ -0,0 +1,121 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, List
+
+from langchain_core.documents import Document
+
+from app.core.logger_config import logger
+from app.service.embedding_service import EMBEDDING_MODEL_PATH
+
+RAG_CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "2048"))
+# HF tokenizer directory of the chat model (e.g. gemma3); without it the local
+# embedding model's tokenizer is used as a close approximation
+CONTEXT_TOKENIZER_PATH = os.getenv("CONTEXT_TOKENIZER_PATH")
+
+# Overlaps shorter than this are treated as coincidental, not splitter overlap
+_MIN_OVERLAP_CHARS = 20
+_MAX_OVERLAP_CHARS = 400
+_SEPARATOR = "\n\n"
+
+
+@dataclass
+class PackedContext:
+    text: str
+    tokens_used: int
+    token_budget: int
+    chunks_used: int
+    chunks_dropped: int
+    overlap_chars_removed: int
+
+
+@lru_cache(maxsize=1)
+def get_token_counter() -> Callable[[str], int]:
+    from transformers import AutoTokenizer
+
+    path = CONTEXT_TOKENIZER_PATH or str(EMBEDDING_MODEL_PATH)
+    logger.info(f"🔢 Loading context tokenizer from {path}")
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+
+
+def _overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of `left` that is a prefix of `right`."""
+    longest = min(len(left), len(right), _MAX_OVERLAP_CHARS)
+    for size in range(longest, _MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _neighbour_key(doc: Document, offset: int):
+    meta = doc.metadata
+    if meta.get("chunk_index") is None:
+        return None
+    return (
+        meta.get("document_name") or meta.get("source"),
+        meta.get("page"),
+        meta["chunk_index"] + offset,
+    )
+
+
+def pack_context(
+    documents: List[Document],
+    token_budget: int = RAG_CONTEXT_TOKEN_BUDGET,
+    count_tokens: Callable[[str], int] = None,
+) -> PackedContext:
+    """
+    Greedily fill `token_budget` with the highest scoring chunks.
+    Text that the splitter duplicated between adjacent chunks of the same
+    page is kept only once, and chunks that no longer fit are dropped.
+    The chosen chunks are laid out by document (best ranked first) and by
+    position within it, so a trimmed chunk always follows the text it
+    was trimmed against.
+    """
+    count_tokens = count_tokens or get_token_counter()
+    separator_tokens = count_tokens(_SEPARATOR)
+    ranked = sorted(
+        documents, key=lambda doc: doc.metadata.get("score") or 0, reverse=True
+    )
+
+    selected: dict = {}  # neighbour key -> text kept for that chunk
+    groups: dict = {}  # document -> output order
+    parts: List[tuple] = []  # (group, position, text)
+    tokens_used = dropped = overlap_removed = 0
+    for doc in ranked:
+        text = doc.page_content.strip()
+        previous = selected.get(_neighbour_key(doc, -1))
+        following = selected.get(_neighbour_key(doc, 1))
+        if previous:
+            cut = _overlap(previous, text)
+            text, overlap_removed = text[cut:], overlap_removed + cut
+        if following:
+            cut = _overlap(text, following)
+            text, overlap_removed = text[: len(text) - cut], overlap_removed + cut
+        text = text.strip()
+        if not text:
+            continue
+
+        cost = count_tokens(text) + (separator_tokens if parts else 0)
+        if tokens_used + cost > token_budget:
+            dropped += 1
+            continue
+        tokens_used += cost
+        key = _neighbour_key(doc, 0)
+        if key is not None:
+            selected[key] = doc.page_content.strip()
+            group = groups.setdefault(key[0], len(groups))
+            parts.append((group, (key[1] or 0, key[2]), text))
+        else:
+            # Nothing to line it up with: it keeps its rank
+            parts.append((groups.setdefault(id(doc), len(groups)), (0, 0), text))
+
+    parts.sort(key=lambda part: part[:2])
+    return PackedContext(
+        text=_SEPARATOR.join(text for _, _, text in parts),
+        tokens_used=tokens_used,
+        token_budget=token_budget,
+        chunks_used=len(parts),
+        chunks_dropped=dropped,
+        overlap_chars_removed=overlap_removed,
+    )
@@ -1,70 +1,270 @@
+import asyncio
+import hashlib
 import os
-import tempfile
-from typing import List
-from fastapi import UploadFile
-from langchain_community.document_loaders import PyMuPDFLoader
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import pymupdf
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
-from app.core.logger_config import logger
-from sentence_transformers import SentenceTransformer
-from pathlib import Path
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    Distance,
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    MatchValue,
+    PayloadSchemaType,
+    PointStruct,
+    VectorParams,
+)
 
+from app.core.logger_config import logger
+from app.core.metrics import span
+from app.core.resources import lazy_resource
+from app.service.embedding_cache import (
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBEDDING_CACHE_PATH,
+    EmbeddingCache,
+)
+from app.service.embedding_service import (
+    QueryEmbeddingService,
+    embedding_model_id,
+    load_embedding_model,
+)
+from app.service.local_qdrant import SerializedQdrantClient
+from app.service.sparse_index import SparseIndex, reciprocal_rank_fusion
 
 qdrant_url = os.getenv("QDRANT_ENDPOINT")
 collection_name = os.getenv("RAG_VECTOR_DB_COLLECTION_NAME")
-model_path = Path(os.getcwd()) / "models" / "all-MiniLM-L6-v2"
-embed_model = SentenceTransformer(str(model_path), trust_remote_code=True)
-client = QdrantClient(url=qdrant_url)
+# Heavy clients are built on first use (see app/core/resources.py)
+# Only weights: safe to build in the master before forking workers
+embed_model = lazy_resource("embed_model", load_embedding_model, fork_safe=True)
+embedding_cache = lazy_resource(
+    "embedding_cache",
+    lambda: EmbeddingCache(
+        EMBEDDING_CACHE_PATH,
+        os.getenv("EMBEDDING_MODEL_ID", embedding_model_id()),
+        EMBEDDING_CACHE_MAX_ENTRIES,
+    ),
+)
+# Cheap to build; the model loads and the batcher thread starts on first query
+query_embedder = QueryEmbeddingService(embed_model)
+
+
+def _build_qdrant_client():
+    # ":memory:" runs Qdrant embedded in this process (benchmarks, offline dev)
+    if qdrant_url == ":memory:":
+        return SerializedQdrantClient(QdrantClient(location=":memory:"))
+    return QdrantClient(url=qdrant_url)
+
+
+def _build_async_qdrant_client():
+    if qdrant_url == ":memory:":
+        return client.get().aio
+    return AsyncQdrantClient(url=qdrant_url)
+
+
+client = lazy_resource("qdrant_client", _build_qdrant_client)
+async_client = lazy_resource("qdrant_async_client", _build_async_qdrant_client)
+
+
+def _sparse_index_path() -> str:
+    path = os.getenv("SPARSE_INDEX_PATH")
+    if path:
+        return path
+    if not collection_name:
+        raise ValueError(
+            "Missing SPARSE_INDEX_PATH or RAG_VECTOR_DB_COLLECTION_NAME in env"
+        )
+    return str(Path(os.getcwd()) / "data" / f"{collection_name}_bm25.sqlite3")
+
+
+sparse_index = lazy_resource("sparse_index", lambda: SparseIndex(_sparse_index_path()))
+
+UPLOAD_BLOCK_SIZE = int(os.getenv("UPLOAD_BLOCK_SIZE", str(1024 * 1024)))
+CHUNK_BATCH_SIZE = int(os.getenv("CHUNK_BATCH_SIZE", "64"))
+
+splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+
+# Fixed namespace so a (document name, document hash, chunk index) triple
+# always maps to one point
+POINT_ID_NAMESPACE = uuid.UUID("6f9c1a52-4d0b-4c5e-9a8e-2b7d3f1e0c44")
+# Stored on every point. Version 1 ids left out the document name, so
+# documents with identical content shared (and overwrote) each other's points
+POINT_ID_VERSION = 2
+
+
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while block := f.read(UPLOAD_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
 
 
 # Step 1: Chunk PDF into text segments
-async def create_file_chunk(file: UploadFile) -> List[Document]:
-    try:
-        logger.info(f"📄 Chunking file: {file.filename}")
+def iter_pdf_pages(file_path: str, metadata: dict = None) -> Iterator[Document]:
+    """
+    Yield one Document per PDF page, opening the file only once.
+    Metadata mirrors what PyMuPDFLoader attaches to each page, with
+    `metadata` merged on top (e.g. source / document_name / document_hash).
+    """
+    with pymupdf.open(file_path) as pdf:
+        doc_metadata = {
+            k.lower(): v
+            for k, v in (pdf.metadata or {}).items()
+            if isinstance(v, (str, int))
+        }
+        for page in pdf:
+            yield Document(
+                page_content=page.get_text(),
+                metadata={
+                    **doc_metadata,
+                    "source": file_path,
+                    "file_path": file_path,
+                    "page": page.number,
+                    "total_pages": pdf.page_count,
+                    **(metadata or {}),
+                },
+            )
 
-        # Save the uploaded file to a temporary location
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            content = await file.read()
-            tmp.write(content)
-            tmp_path = tmp.name
 
-        # Load and split the document
-        loader = PyMuPDFLoader(file_path=tmp_path)
-        pages = loader.load()
-        splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        chunks = splitter.split_documents(pages)
+def iter_text_pages(file_path: str, metadata: dict = None) -> Iterator[Document]:
+    """Plain text and markdown files are a single page."""
+    with open(file_path, encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    yield Document(
+        page_content=text,
+        metadata={
+            "source": file_path,
+            "file_path": file_path,
+            "page": 0,
+            "total_pages": 1,
+            **(metadata or {}),
+        },
+    )
 
-        logger.info(f"✅ Created {len(chunks)} chunks for {file.filename}")
-        return chunks
 
-    except Exception:
-        logger.exception("❌ Failed to create chunks from uploaded file")
-        raise
-    finally:
-        if "tmp_path" in locals() and os.path.exists(tmp_path):
-            os.remove(tmp_path)
+def iter_unstructured_pages(
+    file_path: str, metadata: dict = None
+) -> Iterator[Document]:
+    """Any other format (docx, pptx, html, ...) is parsed by `unstructured`."""
+    from unstructured.partition.auto import partition
+
+    pages: dict = {}
+    for element in partition(filename=file_path):
+        page = (getattr(element.metadata, "page_number", None) or 1) - 1
+        pages.setdefault(page, []).append(str(element))
+    for page, texts in sorted(pages.items()):
+        yield Document(
+            page_content="\n\n".join(texts),
+            metadata={
+                "source": file_path,
+                "file_path": file_path,
+                "page": page,
+                "total_pages": len(pages),
+                **(metadata or {}),
+            },
+        )
+
+
+TEXT_EXTENSIONS = {".txt", ".md", ".markdown"}
+UNSTRUCTURED_EXTENSIONS = {
+    ".docx", ".doc", ".pptx", ".ppt", ".odt", ".rtf", ".epub",
+    ".html", ".htm", ".xml", ".eml", ".msg", ".csv", ".tsv", ".xlsx", ".rst",
+}  # fmt: skip
+SUPPORTED_EXTENSIONS = {".pdf"} | TEXT_EXTENSIONS | UNSTRUCTURED_EXTENSIONS
+
+
+def iter_document_pages(
+    file_path: str, metadata: dict = None, extension: str = None
+) -> Iterator[Document]:
+    """
+    Yield the pages of a document by file type. `extension` overrides the
+    one of `file_path` (temp files of uploads keep the original suffix).
+    """
+    extension = (extension or Path(file_path).suffix).lower()
+    if extension == ".pdf":
+        return iter_pdf_pages(file_path, metadata=metadata)
+    if extension in TEXT_EXTENSIONS:
+        return iter_text_pages(file_path, metadata=metadata)
+    if extension in UNSTRUCTURED_EXTENSIONS:
+        return iter_unstructured_pages(file_path, metadata=metadata)
+    raise ValueError(f"Unsupported document type '{extension}'")
+
+
+def iter_chunk_batches(
+    file_path: str, metadata: dict = None, batch_size: int = CHUNK_BATCH_SIZE
+) -> Iterator[List[Document]]:
+    """
+    Split pages as they are read and yield chunks in batches of ~batch_size,
+    so peak memory depends on the batch size rather than the document size.
+    Every chunk gets a document-wide `chunk_index`.
+    """
+    batch: List[Document] = []
+    chunk_index = 0
+    for page in iter_document_pages(file_path, metadata=metadata):
+        for chunk in splitter.split_documents([page]):
+            chunk.metadata["chunk_index"] = chunk_index
+            chunk_index += 1
+            batch.append(chunk)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def split_document_file(file_path: str, metadata: dict = None) -> List[Document]:
+    return [
+        chunk
+        for batch in iter_chunk_batches(file_path, metadata=metadata)
+        for chunk in batch
+    ]
 
 
 # Step 2: Embed and store in Qdrant
-def create_embedding_from_chunk(documents: List[Document]):
-    try:
-        logger.info(f"🧠 Creating embeddings from {len(documents)} chunks")
+_collection_ready = False
+# Upserts run on several threads (bulk ingestion); only one creates collections
+_collection_lock = threading.Lock()
 
-        texts = [doc.page_content for doc in documents]
 
-        # ✅ Generate embeddings
+def embed_documents(documents: List[Document]):
+    """Return (embeddings, cache_hits); only cache misses are encoded."""
+    texts = [doc.page_content for doc in documents]
 
-        # logger.info("============================= texts to be embedded ==================")
-        logger.error("Texts to be embedded :: %s", texts)
-        # logger.info("============================= texts to be embedded completed ===================")
+    # ✅ Generate embeddings
+    with span("embedding"):
+        embeddings, cache_hits = embedding_cache.encode(embed_model, texts)
 
-        embeddings = embed_model.encode(texts)
+    logger.info(f"♻️ Embedding cache hits: {cache_hits}/{len(texts)}")
+    return embeddings, cache_hits
 
-        # logger.info("============================= Embedding initiated ==================")
-        logger.info("Created embeddings :: %s", embeddings)
-        # logger.info("============================= Embedding completed ===================")
+
+def _create_collection(name: str, **config):
+    """Create `name` if missing. Never recreates: that would drop its points."""
+    if client.collection_exists(name):
+        return
+    try:
+        client.create_collection(collection_name=name, **config)
+    except Exception:
+        # Another ingestion process created it between the check and the create
+        if not client.collection_exists(name):
+            raise
+
+
+def ensure_collection(vector_size: int):
+    global _collection_ready
+    if _collection_ready:
+        return
+
+    with _collection_lock:
+        if _collection_ready:
+            return
 
         # ✅ Ensure config exists
         if not qdrant_url or not collection_name:
@@ -73,61 +273,388 @@ def create_embedding_from_chunk(documents: List[Document]):
             )
 
         # ✅ Create collection if missing
-        existing = [c.name for c in client.get_collections().collections]
-        if collection_name not in existing:
-            client.recreate_collection(
+        _create_collection(
+            collection_name,
+            vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
+        )
+        # Document-level replace / delete filters on these fields
+        for field in ("document_name", "document_hash"):
+            client.create_payload_index(
                 collection_name=collection_name,
-                vectors_config=VectorParams(
-                    size=len(embeddings[0]), distance=Distance.COSINE
-                ),
+                field_name=field,
+                field_schema=PayloadSchemaType.KEYWORD,
             )
+        _collection_ready = True
+
+
+def point_id_for(doc: Document) -> str:
+    document_name = doc.metadata.get("document_name")
+    document_hash = doc.metadata.get("document_hash")
+    chunk_index = doc.metadata.get("chunk_index")
+    if document_name is None or document_hash is None or chunk_index is None:
+        # Untracked chunks still get a stable id from their own content
+        key = hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+    else:
+        # Same-content documents under different names own separate points
+        key = f"{document_name}:{document_hash}:{chunk_index}"
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, key))
+
 
-        # ✅ Upload to Qdrant
-        client.upload_collection(
+def filter_new_documents(documents: List[Document]) -> List[Document]:
+    """Drop chunks whose deterministic point id is already in the collection."""
+    if not documents or not collection_name:
+        return documents
+    existing = [c.name for c in client.get_collections().collections]
+    if collection_name not in existing:
+        return documents
+
+    ids = [point_id_for(doc) for doc in documents]
+    with span("dedup"):
+        retrieved = client.retrieve(
             collection_name=collection_name,
-            vectors=embeddings,
-            payload=[
-                {
-                    **doc.metadata,  # existing metadata fields
-                    "page_content": doc.page_content,  # add page content here explicitly
-                }
-                for doc in documents
+            ids=ids,
+            with_payload=False,
+            with_vectors=False,
+        )
+    present = {str(point.id) for point in retrieved}
+    return [doc for doc, point_id in zip(documents, ids) if point_id not in present]
+
+
+def store_embeddings(documents: List[Document], embeddings):
+    ensure_collection(len(embeddings[0]))
+
+    # ✅ Upsert to Qdrant; deterministic ids make re-uploads idempotent
+    with span("qdrant_upsert"):
+        client.upsert(
+            collection_name=collection_name,
+            points=[
+                PointStruct(
+                    id=point_id_for(doc),
+                    vector=list(map(float, vector)),
+                    payload={
+                        **doc.metadata,  # existing metadata fields
+                        # add page content here explicitly
+                        "page_content": doc.page_content,
+                        "point_id_version": POINT_ID_VERSION,
+                    },
+                )
+                for doc, vector in zip(documents, embeddings)
             ],
-            ids=None,
-            batch_size=64,
+        )
+    # ✅ Keep the lexical index in step with the vectors
+    with span("sparse_index"):
+        sparse_index.add_documents(
+            (
+                point_id_for(doc),
+                doc.metadata.get("document_name"),
+                doc.metadata.get("document_hash"),
+                doc.page_content,
+            )
+            for doc in documents
         )
 
+
+def delete_document_vectors(document_name: str, keep_hash: Optional[str] = None):
+    """
+    Delete every point of `document_name`. With `keep_hash`, points of that
+    document revision are kept, which turns a re-upload into a replace.
+    Points stored under an older id scheme are never kept, so re-ingesting a
+    document also migrates it.
+    """
+    condition = Filter(
+        must=[
+            FieldCondition(key="document_name", match=MatchValue(value=document_name))
+        ]
+    )
+    if keep_hash:
+        keep = Filter(
+            must=[
+                FieldCondition(key="document_hash", match=MatchValue(value=keep_hash)),
+                FieldCondition(
+                    key="point_id_version", match=MatchValue(value=POINT_ID_VERSION)
+                ),
+            ]
+        )
+        condition.must_not = [keep]
+    client.delete(
+        collection_name=collection_name,
+        points_selector=FilterSelector(filter=condition),
+    )
+    sparse_index.delete_document(document_name, keep_hash=keep_hash)
+    if not keep_hash:
+        _forget_indexed_document(document_name)
+    logger.info(f"🗑️ Deleted stale vectors of document '{document_name}'")
+
+
+# One payload-only point per indexed document recording which revision is in
+# the collection (content hash, source object etag), so a bucket sync can diff
+# MinIO against the index without scanning every chunk
+document_collection_name = os.getenv("RAG_DOCUMENT_COLLECTION_NAME") or (
+    f"{collection_name}_documents" if collection_name else None
+)
+_document_collection_ready = False
+
+
+def _check_document_collection_name():
+    if not document_collection_name:
+        raise ValueError(
+            "Missing RAG_DOCUMENT_COLLECTION_NAME or "
+            "RAG_VECTOR_DB_COLLECTION_NAME in env"
+        )
+
+
+def _document_collection_exists() -> bool:
+    _check_document_collection_name()
+    return client.collection_exists(document_collection_name)
+
+
+def _document_point_id(document_name: str) -> str:
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"document:{document_name}"))
+
+
+def record_indexed_document(
+    document_name: str,
+    document_hash: str,
+    chunks: int,
+    source_bucket: Optional[str] = None,
+    source_etag: Optional[str] = None,
+    source_last_modified: Optional[str] = None,
+):
+    global _document_collection_ready
+    _check_document_collection_name()
+    if not _document_collection_ready:
+        with _collection_lock:
+            _create_collection(document_collection_name, vectors_config={})
+            _document_collection_ready = True
+
+    client.upsert(
+        collection_name=document_collection_name,
+        points=[
+            PointStruct(
+                id=_document_point_id(document_name),
+                vector={},
+                payload={
+                    "document_name": document_name,
+                    "document_hash": document_hash,
+                    "chunks": chunks,
+                    "source_bucket": source_bucket,
+                    "source_etag": source_etag.strip('"') if source_etag else None,
+                    "source_last_modified": source_last_modified,
+                    "indexed_at": datetime.now().isoformat(),
+                },
+            )
+        ],
+    )
+
+
+def list_indexed_documents(batch_size: int = 1024) -> Dict[str, dict]:
+    """document_name -> record of every document in the collection."""
+    if not _document_collection_exists():
+        return {}
+    documents, offset = {}, None
+    while True:
+        points, offset = client.scroll(
+            collection_name=document_collection_name,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False,
+        )
+        for point in points:
+            documents[point.payload["document_name"]] = point.payload
+        if offset is None:
+            return documents
+
+
+def _forget_indexed_document(document_name: str):
+    if not _document_collection_exists():
+        return
+    # By filter: embedded (":memory:") Qdrant raises on ids it does not hold
+    client.delete(
+        collection_name=document_collection_name,
+        points_selector=FilterSelector(
+            filter=Filter(
+                must=[
+                    FieldCondition(
+                        key="document_name", match=MatchValue(value=document_name)
+                    )
+                ]
+            )
+        ),
+    )
+
+
+def create_embedding_from_chunk(documents: List[Document]):
+    try:
+        logger.info(f"🧠 Creating embeddings from {len(documents)} chunks")
+
+        documents = filter_new_documents(documents)
+        if not documents:
+            logger.info("✅ All chunks are already stored in Qdrant")
+            return {"status": "success", "vector_count": 0, "embedding_cache_hits": 0}
+
+        embeddings, cache_hits = embed_documents(documents)
+        store_embeddings(documents, embeddings)
+
         logger.info("✅ Embeddings successfully stored in Qdrant")
-        return {"status": "success", "vector_count": len(documents)}
+        return {
+            "status": "success",
+            "vector_count": len(documents),
+            "embedding_cache_hits": cache_hits,
+        }
 
     except Exception:
         logger.exception("❌ Embedding creation failed.")
         raise
 
 
-def get_matched_content_from_vector_store(query: str):
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "5"))
+RAG_DENSE_TOP_K = int(os.getenv("RAG_DENSE_TOP_K", "20"))
+RAG_SPARSE_TOP_K = int(os.getenv("RAG_SPARSE_TOP_K", "20"))
+RAG_RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+
+
+def _point_to_document(point, **scores) -> Document:
+    # Create a LangChain Document with page_content and metadata
+    payload = dict(point.payload or {})
+    doc = Document(
+        page_content=payload.pop("page_content", ""),
+        metadata=payload,
+    )
+    doc.metadata["point_id"] = str(point.id)
+    doc.metadata.update(scores)
+    return doc
+
+
+def _fuse_results(dense_hits, sparse_hits, sparse_points, top_k: int):
+    """
+    Reciprocal-rank-fuse dense and BM25 rankings into the final top_k.
+    `score` in the metadata is the fused score; per-stage scores are kept.
+    """
+    dense_by_id = {str(hit.id): hit for hit in dense_hits}
+    points = {**{str(p.id): p for p in sparse_points}, **dense_by_id}
+    sparse_scores = dict(sparse_hits)
+
+    fused = reciprocal_rank_fusion(
+        [list(dense_by_id), [point_id for point_id, _ in sparse_hits]], k=RAG_RRF_K
+    )
+    results = []
+    for point_id, score in fused:
+        if point_id not in points:
+            continue  # indexed lexically but no longer in Qdrant
+        dense = dense_by_id.get(point_id)
+        results.append(
+            _point_to_document(
+                points[point_id],
+                score=score,
+                dense_score=dense.score if dense else None,
+                sparse_score=sparse_scores.get(point_id),
+            )
+        )
+        if len(results) == top_k:
+            break
+    return results
+
+
+def get_matched_content_from_vector_store(
+    query: str,
+    top_k: int = RAG_TOP_K,
+    dense_k: int = RAG_DENSE_TOP_K,
+    sparse_k: int = RAG_SPARSE_TOP_K,
+):
     try:
 
         logger.info(f"🧠 Extracting query from the database {query}")
 
-        top_k = 5
-        query_vector = embed_model.encode(query).tolist()
-        search_result = client.search(
-            collection_name=collection_name, query_vector=query_vector, limit=top_k
-        )
+        with span("query_embedding"):
+            query_vector = query_embedder.embed_query(query)
+        with span("retrieval"):
+            dense_hits = client.search(
+                collection_name=collection_name,
+                query_vector=query_vector,
+                limit=dense_k,
+            )
+            sparse_hits = sparse_index.search(query, sparse_k)
 
-        results = []
-        for item in search_result:
-            # Create a LangChain Document with page_content and metadata
-            doc = Document(
-                page_content=item.payload.get("page_content", ""),
-                metadata=item.payload.get("metadata") or {},
+            dense_ids = {str(hit.id) for hit in dense_hits}
+            missing = [pid for pid, _ in sparse_hits if pid not in dense_ids]
+            sparse_points = (
+                client.retrieve(collection_name=collection_name, ids=missing)
+                if missing
+                else []
             )
-            # Optionally add score to metadata
-            doc.metadata["score"] = item.score
-            results.append(doc)
-        return results
+            return _fuse_results(dense_hits, sparse_hits, sparse_points, top_k)
 
     except Exception as e:
         logger.error(f"🧠 Extracting query from the database failed, error: {e}")
         raise e
+
+
+async def aget_matched_content_from_vector_store(
+    query: str,
+    top_k: int = RAG_TOP_K,
+    dense_k: int = RAG_DENSE_TOP_K,
+    sparse_k: int = RAG_SPARSE_TOP_K,
+):
+    """
+    Async twin of get_matched_content_from_vector_store: the query is
+    embedded on the batcher thread and Qdrant is queried without blocking
+    the event loop, while BM25 runs on a worker thread.
+    """
+    try:
+
+        logger.info(f"🧠 Extracting query from the database {query}")
+
+        with span("query_embedding"):
+            query_vector = await query_embedder.aembed_query(query)
+        with span("retrieval"):
+            dense_hits, sparse_hits = await asyncio.gather(
+                async_client.search(
+                    collection_name=collection_name,
+                    query_vector=query_vector,
+                    limit=dense_k,
+                ),
+                asyncio.to_thread(sparse_index.search, query, sparse_k),
+            )
+
+            dense_ids = {str(hit.id) for hit in dense_hits}
+            missing = [pid for pid, _ in sparse_hits if pid not in dense_ids]
+            sparse_points = (
+                await async_client.retrieve(
+                    collection_name=collection_name, ids=missing
+                )
+                if missing
+                else []
+            )
+            return _fuse_results(dense_hits, sparse_hits, sparse_points, top_k)
+
+    except Exception as e:
+        logger.error(f"🧠 Extracting query from the database failed, error: {e}")
+        raise e
+
+
+def rebuild_sparse_index(batch_size: int = 256) -> int:
+    """Backfill the BM25 index from every point already stored in Qdrant."""
+    indexed = 0
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False,
+        )
+        indexed += sparse_index.add_documents(
+            (
+                str(point.id),
+                point.payload.get("document_name"),
+                point.payload.get("document_hash"),
+                point.payload.get("page_content", ""),
+            )
+            for point in points
+        )
+        if offset is None:
+            break
+    logger.info(f"✅ Added {indexed} chunks to the BM25 index")
+    return indexed
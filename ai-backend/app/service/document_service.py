@@ -1,30 +1,51 @@
-from typing import List
-from fastapi import UploadFile
+import os
+
+from starlette.requests import Request
+
 from app.core.logger_config import logger
-from app.service.doc_processor_service import (
-    create_embedding_from_chunk,
-    create_file_chunk,
+from app.service.answer_cache import answer_cache
+from app.service.doc_processor_service import delete_document_vectors
+from app.service.ingestion_service import (
+    check_ingestion_capacity,
+    submit_ingestion_job,
 )
-from app.service.minio_service import upload_files_to_bucket
-import os
-from langchain_core.documents import Document
+from app.service.minio_service import delete_file_from_bucket
+from app.service.upload_stream import receive_upload
 
 
-async def handle_file_upload(file: UploadFile):
+async def handle_file_upload(request: Request) -> dict:
+    logger.info("Initiating the file upload processing")
 
+    bucket_name = os.getenv("MINIO_DOCUMENT_BUCKET")
+    logger.info(f"🗂️ Attempting file upload to bucket: {bucket_name}")
+
+    # Refuse before the body is read and streamed to the bucket
+    check_ingestion_capacity()
+    upload = await receive_upload(request, bucket_name)
+    # The worker process owns the temp file once the job is queued
     try:
-        logger.info("Initiating the file upload processing")
-
-        bucket_name = os.getenv("MINIO_DOCUMENT_BUCKET")
-        logger.info(f"🗂️ Attempting file upload to bucket: {bucket_name}")
-        # 1. Chreating the chunks first
-        chunks: List[Document] = await create_file_chunk(file)
-        # 2. Embedding creating fromt the chunks
-        create_embedding_from_chunk(chunks)
-
-        # 3. Uploading the files to the minio buckets
-        upload_files_to_bucket(file=file, bucket_name=bucket_name)
-        return {"status": 201, "message": f"File name is {file.filename}."}
+        return submit_ingestion_job(
+            file_path=upload.file_path,
+            filename=upload.filename,
+            content_type=upload.content_type,
+            bucket_name=bucket_name,
+            document_hash=upload.document_hash,
+            stored=upload.stored,
+        )
     except Exception as e:
-        logger.info("File upload processing failed", e)
-        raise e
+        # The object may still land in the bucket; the bucket sync indexes it
+        logger.error(f"File upload processing failed: {e}")
+        os.remove(upload.file_path)
+        raise
+
+
+def handle_document_delete(document_name: str):
+    logger.info(f"Deleting document '{document_name}' from the index and bucket")
+
+    bucket_name = os.getenv("MINIO_DOCUMENT_BUCKET")
+    # Object first: a bucket sync running in between then sees a removed
+    # document rather than an unindexed one it would re-ingest
+    delete_file_from_bucket(object_name=document_name, bucket_name=bucket_name)
+    delete_document_vectors(document_name)
+    answer_cache.invalidate_documents([document_name])
+    return {"status": 200, "message": f"Document {document_name} deleted."}
@@ -0,0 +1,288 @@
+import argparse
+import asyncio
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from pathlib import Path
+from typing import List
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from app.core.logger_config import logger
+from app.service.embedding_cache import normalize_text
+
+EMBEDDING_MODEL_PATH = Path(os.getcwd()) / "models" / "all-MiniLM-L6-v2"
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+EMBEDDING_MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "32"))
+
+# Upper bounds of the batch-size histogram buckets
+_BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+# Only the transformer module changes between backends; tokenization and the
+# 1_Pooling (mean) / 2_Normalize modules are loaded from modules.json as-is.
+EMBEDDING_BACKENDS = {
+    "torch": {},
+    "openvino": {
+        "backend": "openvino",
+        "model_kwargs": {"file_name": "openvino/openvino_model.xml"},
+    },
+    "openvino-int8": {
+        "backend": "openvino",
+        "model_kwargs": {"file_name": "openvino/openvino_model_qint8_quantized.xml"},
+    },
+}
+
+
+def load_embedding_model(backend: str = EMBEDDING_BACKEND) -> SentenceTransformer:
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Unknown EMBEDDING_BACKEND '{backend}', "
+            f"expected one of {', '.join(EMBEDDING_BACKENDS)}"
+        )
+    logger.info(f"🧠 Loading embedding model with '{backend}' backend")
+    return SentenceTransformer(
+        str(EMBEDDING_MODEL_PATH), trust_remote_code=True, **EMBEDDING_BACKENDS[backend]
+    )
+
+
+def embedding_model_id(backend: str = EMBEDDING_BACKEND) -> str:
+    # Backends produce slightly different vectors, so they must not share cache rows
+    name = EMBEDDING_MODEL_PATH.name
+    return name if backend == "torch" else f"{name}:{backend}"
+
+
+def check_embedding_parity(
+    texts: List[str], backend: str, baseline: str = "torch"
+) -> dict:
+    """
+    Encode `texts` with `backend` and the fp32 `baseline` and report how far
+    the backend drifts, as cosine similarity between paired embeddings.
+    """
+    reference = load_embedding_model(baseline).encode(texts, normalize_embeddings=True)
+    candidate = load_embedding_model(backend).encode(texts, normalize_embeddings=True)
+    cosine = np.sum(reference * candidate, axis=1)
+    return {
+        "backend": backend,
+        "baseline": baseline,
+        "texts": len(texts),
+        "cosine_mean": round(float(cosine.mean()), 6),
+        "cosine_min": round(float(cosine.min()), 6),
+        "max_drift": round(float(1 - cosine.min()), 6),
+    }
+
+
+def _percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct * (len(ordered) - 1))))]
+
+
+class QueryEmbeddingService:
+    """
+    Sits in front of the embedding model for query-time encoding.
+
+    Repeated queries are answered from an in-memory LRU cache. Cache misses
+    are queued, and a single batcher thread gathers the requests that arrive
+    within `window_ms` (up to `max_batch_size`) into one `model.encode` call.
+    """
+
+    def __init__(
+        self,
+        model,
+        cache_size: int = QUERY_EMBEDDING_CACHE_SIZE,
+        window_ms: float = EMBEDDING_BATCH_WINDOW_MS,
+        max_batch_size: int = EMBEDDING_MAX_BATCH_SIZE,
+    ):
+        self.model = model
+        self.cache_size = cache_size
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+
+        self._cache: OrderedDict[str, List[float]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._pending: queue.Queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._batches = 0
+        self._queries_encoded = 0
+        self._batch_size_histogram = {bucket: 0 for bucket in _BATCH_SIZE_BUCKETS}
+        self._batch_size_histogram["+Inf"] = 0
+        self._encode_ms = deque(maxlen=1000)
+        self._wait_ms = deque(maxlen=1000)
+
+    # ---- cache ----
+    def _cache_get(self, key: str):
+        with self._cache_lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+            return vector
+
+    def _cache_put(self, key: str, vector: List[float]):
+        with self._cache_lock:
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # ---- batching ----
+    def _ensure_worker(self):
+        # Started on first use so processes that never embed queries
+        # (e.g. ingestion workers) don't carry an idle thread
+        if self._worker is None:
+            with self._worker_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(
+                        target=self._run, name="query-embedding-batcher", daemon=True
+                    )
+                    self._worker.start()
+
+    def _collect_batch(self) -> list:
+        batch = [self._pending.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Awaiters that went away (e.g. client disconnects) cancelled their
+            # futures; claiming the rest keeps them from being cancelled later
+            batch = [
+                item
+                for item in self._collect_batch()
+                if item[2].set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+            try:
+                self._encode_batch(batch)
+            except Exception as e:
+                # One bad batch must not end the thread every query waits on
+                logger.error(f"❌ Batched query embedding failed: {e}")
+                for _, _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _encode_batch(self, batch: list):
+        # Identical queries inside one window share a single row
+        keys = list(dict.fromkeys(key for key, _, _, _ in batch))
+        texts = {key: text for key, text, _, _ in batch}
+        started = time.perf_counter()
+        vectors = self.model.encode([texts[key] for key in keys])
+        encode_ms = (time.perf_counter() - started) * 1000
+
+        by_key = {key: vector.tolist() for key, vector in zip(keys, vectors)}
+        for key, vector in by_key.items():
+            self._cache_put(key, vector)
+        for key, _, future, _ in batch:
+            future.set_result(by_key[key])
+        self._record_batch(batch, len(keys), encode_ms, started)
+
+    def _record_batch(self, batch: list, encoded: int, encode_ms: float, started):
+        with self._stats_lock:
+            self._batches += 1
+            self._queries_encoded += encoded
+            bucket = next((b for b in _BATCH_SIZE_BUCKETS if encoded <= b), "+Inf")
+            self._batch_size_histogram[bucket] += 1
+            self._encode_ms.append(encode_ms)
+            for _, _, _, enqueued in batch:
+                self._wait_ms.append((started - enqueued) * 1000)
+
+    # ---- public API ----
+    def submit(self, query: str) -> Future:
+        key = normalize_text(query)
+        future: Future = Future()
+
+        vector = self._cache_get(key)
+        with self._stats_lock:
+            if vector is not None:
+                self._cache_hits += 1
+            else:
+                self._cache_misses += 1
+        if vector is not None:
+            future.set_result(vector)
+            return future
+
+        self._ensure_worker()
+        self._pending.put((key, query, future, time.perf_counter()))
+        return future
+
+    def embed_query(self, query: str) -> List[float]:
+        return self.submit(query).result()
+
+    async def aembed_query(self, query: str) -> List[float]:
+        # The batcher thread does the encoding; the event loop only awaits
+        return await asyncio.wrap_future(self.submit(query))
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            lookups = self._cache_hits + self._cache_misses
+            return {
+                "cache": {
+                    "size": len(self._cache),
+                    "capacity": self.cache_size,
+                    "hits": self._cache_hits,
+                    "misses": self._cache_misses,
+                    "hit_rate": round(self._cache_hits / lookups, 4) if lookups else 0,
+                },
+                "batches": self._batches,
+                "queries_encoded": self._queries_encoded,
+                "avg_batch_size": (
+                    round(self._queries_encoded / self._batches, 2)
+                    if self._batches
+                    else 0
+                ),
+                "batch_size_histogram": {
+                    str(k): v for k, v in self._batch_size_histogram.items()
+                },
+                "encode_ms": {
+                    "p50": round(_percentile(self._encode_ms, 0.5), 2),
+                    "p95": round(_percentile(self._encode_ms, 0.95), 2),
+                    "max": round(max(self._encode_ms, default=0), 2),
+                },
+                "queue_wait_ms": {
+                    "p50": round(_percentile(self._wait_ms, 0.5), 2),
+                    "p95": round(_percentile(self._wait_ms, 0.95), 2),
+                    "max": round(max(self._wait_ms, default=0), 2),
+                },
+            }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare an embedding backend against the fp32 PyTorch model"
+    )
+    parser.add_argument("--backend", default="openvino-int8")
+    parser.add_argument("--pdf", help="Use the chunks of this PDF as parity texts")
+    args = parser.parse_args()
+
+    if args.pdf:
+        from app.service.doc_processor_service import split_document_file
+
+        parity_texts = [chunk.page_content for chunk in split_document_file(args.pdf)]
+    else:
+        parity_texts = [
+            "Whoever commits murder shall be punished with death or imprisonment.",
+            "What does Section 303 say about theft?",
+            "Fundamental rights guaranteed by the Constitution of India",
+            "The President shall be elected by the members of an electoral college.",
+        ]
+    print(check_embedding_parity(parity_texts, args.backend))
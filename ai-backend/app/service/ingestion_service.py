@@ -0,0 +1,436 @@
+import asyncio
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Optional
+
+from app.core.logger_config import logger
+from app.core.metrics import (
+    StageTimings,
+    observe_stages,
+    record_stages,
+    timed_iterator,
+)
+from app.core.util import prefetch_iterator
+from app.service.answer_cache import answer_cache
+from app.service.doc_processor_service import (
+    delete_document_vectors,
+    embed_documents,
+    file_sha256,
+    filter_new_documents,
+    iter_chunk_batches,
+    record_indexed_document,
+    store_embeddings,
+)
+from app.service.minio_service import upload_path_to_bucket
+
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", "2"))
+INGESTION_QUEUE_SIZE = int(os.getenv("INGESTION_QUEUE_SIZE", "16"))
+# "process" (default) isolates parsing and embedding from the API process;
+# "thread" runs jobs in-process, e.g. against an embedded ":memory:" Qdrant
+INGESTION_EXECUTOR = os.getenv("INGESTION_EXECUTOR", "process")
+# Re-runs of a job whose worker process died; a crash also fails every other
+# job running in the same pool, so those get another chance on a fresh pool
+INGESTION_CRASH_RETRIES = int(os.getenv("INGESTION_CRASH_RETRIES", "1"))
+# Finished jobs stay queryable this long, and at most this many are kept
+INGESTION_JOB_TTL_SECONDS = float(os.getenv("INGESTION_JOB_TTL_SECONDS", "3600"))
+INGESTION_MAX_FINISHED_JOBS = int(os.getenv("INGESTION_MAX_FINISHED_JOBS", "1000"))
+
+_manager = None
+_jobs = None  # job_id -> job record, shared with the worker processes
+_queue: Optional[asyncio.Queue] = None
+_pool: Optional[Executor] = None
+_dispatchers: list[asyncio.Task] = []
+# job_id -> MinIO put of a streamed upload, still running in the API process
+_stored_uploads: dict[str, asyncio.Future] = {}
+
+
+class IngestionQueueFullError(Exception):
+    pass
+
+
+def update_job(jobs, job_id: str, **fields):
+    # Manager proxies only see re-assigned values, not in-place mutations
+    job = jobs[job_id]
+    job.update(fields)
+    jobs[job_id] = job
+
+
+def run_ingestion_job(
+    jobs,
+    job_id: str,
+    file_path: str,
+    filename: str,
+    content_type: Optional[str],
+    bucket_name: str,
+    document_hash: Optional[str] = None,
+    upload_file: bool = True,
+):
+    """
+    Chunk, embed, index and archive one uploaded document.
+    Runs inside a worker process so the API event loop is never blocked.
+
+    With `upload_file=False` the file was already streamed to the bucket by
+    the API process, which completes the job once that upload has finished.
+
+    Returns the final job record and the stage timings, which the API
+    process feeds into its metrics registry.
+    """
+    update_job(jobs, job_id, status="running", started_at=datetime.now().isoformat())
+    with record_stages() as timings:
+        _run_ingestion_stages(
+            jobs,
+            job_id,
+            file_path,
+            filename,
+            content_type,
+            bucket_name,
+            document_hash,
+            upload_file,
+        )
+    update_job(jobs, job_id, stage_seconds=summarize_stages(timings))
+    return dict(jobs[job_id]), timings
+
+
+def summarize_stages(timings: StageTimings) -> dict:
+    totals = {}
+    for stage, seconds in timings:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return {stage: round(seconds, 4) for stage, seconds in totals.items()}
+
+
+def _run_ingestion_stages(
+    jobs,
+    job_id: str,
+    file_path: str,
+    filename: str,
+    content_type: Optional[str],
+    bucket_name: str,
+    document_hash: Optional[str],
+    upload_file: bool,
+):
+    try:
+        logger.info(f"⚙️ Ingestion job {job_id} started for {filename}")
+
+        # Streamed uploads were hashed while they were received
+        document_hash = document_hash or file_sha256(file_path)
+        update_job(jobs, job_id, document_hash=document_hash)
+
+        # 1. Chunk batches are parsed in a background thread while the
+        #    previous batch is being embedded and indexed
+        parsed = embedded = indexed = skipped = cache_hits = 0
+        batches = iter_chunk_batches(
+            file_path,
+            metadata={
+                "source": filename,
+                "document_name": filename,
+                "document_hash": document_hash,
+            },
+        )
+        for chunks in prefetch_iterator(timed_iterator(batches, "chunking")):
+            parsed += len(chunks)
+            update_job(jobs, job_id, chunks_parsed=parsed)
+
+            # Chunks of an identical, already indexed revision are skipped
+            new_chunks = filter_new_documents(chunks)
+            skipped += len(chunks) - len(new_chunks)
+            update_job(jobs, job_id, chunks_skipped=skipped)
+            if not new_chunks:
+                continue
+
+            # 2. Embedding creation from the chunks
+            embeddings, hits = embed_documents(new_chunks)
+            embedded += len(new_chunks)
+            cache_hits += hits
+            update_job(
+                jobs,
+                job_id,
+                chunks_embedded=embedded,
+                embedding_cache_hits=cache_hits,
+                embedding_cache_hit_rate=round(cache_hits / embedded, 4),
+            )
+
+            store_embeddings(new_chunks, embeddings)
+            indexed += len(new_chunks)
+            update_job(jobs, job_id, chunks_indexed=indexed)
+
+        # Drop vectors of earlier revisions of the same document
+        if parsed:
+            delete_document_vectors(filename, keep_hash=document_hash)
+
+        if not upload_file:
+            update_job(jobs, job_id, status="indexed")
+            logger.info(f"✅ Ingestion job {job_id} indexed {filename}")
+            return
+
+        # 3. Uploading the file to the minio bucket
+        uploaded = upload_path_to_bucket(
+            file_path=file_path,
+            object_name=filename,
+            bucket_name=bucket_name,
+            content_type=content_type,
+        )
+        # The bucket sync compares this etag with the object's current one
+        record_indexed_document(
+            filename,
+            document_hash,
+            chunks=parsed,
+            source_bucket=bucket_name,
+            source_etag=uploaded.etag,
+            source_last_modified=(
+                uploaded.last_modified.isoformat() if uploaded.last_modified else None
+            ),
+        )
+
+        update_job(
+            jobs, job_id, status="completed", finished_at=datetime.now().isoformat()
+        )
+        logger.info(f"✅ Ingestion job {job_id} completed for {filename}")
+    except Exception as e:
+        logger.exception(f"❌ Ingestion job {job_id} failed for {filename}")
+        update_job(
+            jobs,
+            job_id,
+            status="failed",
+            error=str(e),
+            finished_at=datetime.now().isoformat(),
+        )
+    finally:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+async def _finish_streamed_upload(job: dict, stored: asyncio.Future) -> dict:
+    """Complete an indexed job once its object put has finished as well."""
+    job_id = job["job_id"]
+    try:
+        uploaded = await stored
+    except Exception as e:
+        logger.error(f"❌ Upload of '{job['filename']}' to the bucket failed: {e}")
+        if job["status"] == "indexed":
+            # Do not answer from a document that is not in the bucket
+            await asyncio.to_thread(delete_document_vectors, job["filename"])
+        update_job(
+            _jobs,
+            job_id,
+            status="failed",
+            error=f"Upload to the bucket failed: {e}",
+            finished_at=datetime.now().isoformat(),
+        )
+        return dict(_jobs[job_id])
+
+    if job["status"] == "indexed":
+        await asyncio.to_thread(
+            record_indexed_document,
+            job["filename"],
+            job["document_hash"],
+            chunks=job["chunks_parsed"],
+            source_bucket=uploaded.bucket_name,
+            source_etag=uploaded.etag,
+            source_last_modified=(
+                uploaded.last_modified.isoformat() if uploaded.last_modified else None
+            ),
+        )
+        update_job(
+            _jobs, job_id, status="completed", finished_at=datetime.now().isoformat()
+        )
+        logger.info(f"✅ Ingestion job {job_id} completed for {job['filename']}")
+    return dict(_jobs[job_id])
+
+
+def _new_pool() -> Executor:
+    if INGESTION_EXECUTOR == "thread":
+        return ThreadPoolExecutor(
+            max_workers=INGESTION_WORKERS, thread_name_prefix="ingestion"
+        )
+    # spawn keeps torch / qdrant state of the API process out of the workers
+    ctx = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=INGESTION_WORKERS, mp_context=ctx)
+
+
+def _replace_broken_pool(broken: Executor):
+    global _pool
+    # Every dispatcher with a job in the broken pool gets here; rebuild once
+    if _pool is broken:
+        logger.warning("♻️ Ingestion worker pool is broken, starting a new one")
+        broken.shutdown(wait=False, cancel_futures=True)
+        _pool = _new_pool()
+
+
+async def _run_job(job_id: str, job_args: tuple):
+    loop = asyncio.get_running_loop()
+    for attempt in range(INGESTION_CRASH_RETRIES + 1):
+        pool = _pool
+        try:
+            return await loop.run_in_executor(
+                pool, run_ingestion_job, _jobs, job_id, *job_args
+            )
+        except BrokenProcessPool:
+            _replace_broken_pool(pool)
+            if attempt == INGESTION_CRASH_RETRIES:
+                raise
+            logger.warning(f"🔁 Retrying ingestion job {job_id} on a new worker")
+
+
+async def _dispatch_jobs():
+    while True:
+        job_id, job_args = await _queue.get()
+        stored = _stored_uploads.pop(job_id, None)
+        try:
+            job, timings = await _run_job(job_id, job_args)
+            if INGESTION_EXECUTOR == "process":
+                # Worker threads already recorded into this process' registry
+                observe_stages(timings)
+            if stored is not None:
+                job = await _finish_streamed_upload(job, stored)
+            if job["status"] == "completed":
+                # Answers built from the previous revision are now stale
+                answer_cache.invalidate_documents([job["filename"]])
+        except Exception as e:
+            # The worker process itself died (e.g. OOM) before reporting back
+            logger.error(f"❌ Ingestion worker crashed on job {job_id}: {e}")
+            update_job(
+                _jobs,
+                job_id,
+                status="failed",
+                error=str(e),
+                finished_at=datetime.now().isoformat(),
+            )
+            # The dead worker never reached its own cleanup
+            file_path = job_args[0]
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        finally:
+            _queue.task_done()
+
+
+async def start_ingestion_workers():
+    global _manager, _jobs, _queue, _pool, _dispatchers
+
+    logger.info(
+        f"🚀 Starting {INGESTION_WORKERS} ingestion {INGESTION_EXECUTOR} worker(s), "
+        f"queue size {INGESTION_QUEUE_SIZE}"
+    )
+    _queue = asyncio.Queue(maxsize=INGESTION_QUEUE_SIZE)
+    if INGESTION_EXECUTOR == "thread":
+        _jobs = {}
+    else:
+        _manager = multiprocessing.get_context("spawn").Manager()
+        _jobs = _manager.dict()
+    _pool = _new_pool()
+    _dispatchers = [
+        asyncio.create_task(_dispatch_jobs()) for _ in range(INGESTION_WORKERS)
+    ]
+
+
+async def stop_ingestion_workers():
+    logger.info("🛑 Stopping ingestion workers")
+    for task in _dispatchers:
+        task.cancel()
+    await asyncio.gather(*_dispatchers, return_exceptions=True)
+    _dispatchers.clear()
+    if _pool:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    if _manager:
+        _manager.shutdown()
+
+
+def check_ingestion_capacity():
+    if _queue is None:
+        raise RuntimeError("Ingestion workers are not running")
+    if _queue.full():
+        raise IngestionQueueFullError(
+            f"Ingestion queue is full ({INGESTION_QUEUE_SIZE} jobs pending)"
+        )
+
+
+def _prune_jobs():
+    """Forget finished jobs past their TTL, and the oldest beyond the cap."""
+    now = datetime.now()
+    finished = sorted(
+        (job["finished_at"], job_id)
+        for job_id, job in list(_jobs.items())
+        if job["status"] in ("completed", "failed") and job["finished_at"]
+    )
+    expired = [
+        job_id
+        for finished_at, job_id in finished
+        if (now - datetime.fromisoformat(finished_at)).total_seconds()
+        > INGESTION_JOB_TTL_SECONDS
+    ]
+    overflow = len(finished) - len(expired) - INGESTION_MAX_FINISHED_JOBS
+    if overflow > 0:
+        expired += [job_id for _, job_id in finished[len(expired) :]][:overflow]
+    for job_id in expired:
+        _jobs.pop(job_id, None)
+
+
+def submit_ingestion_job(
+    file_path: str,
+    filename: str,
+    content_type: Optional[str],
+    bucket_name: str,
+    document_hash: Optional[str] = None,
+    stored: Optional[asyncio.Future] = None,
+) -> dict:
+    """
+    Queue a document for ingestion. `stored` is the still running MinIO put
+    of a streamed upload; the job then skips its own upload of the file.
+    """
+    check_ingestion_capacity()
+    _prune_jobs()
+
+    job_id = uuid.uuid4().hex
+    job = {
+        "job_id": job_id,
+        "filename": filename,
+        "status": "queued",
+        "chunks_parsed": 0,
+        "chunks_embedded": 0,
+        "chunks_indexed": 0,
+        "chunks_skipped": 0,
+        "document_hash": document_hash,
+        "embedding_cache_hits": 0,
+        "embedding_cache_hit_rate": 0.0,
+        "stage_seconds": {},
+        "error": None,
+        "created_at": datetime.now().isoformat(),
+        "started_at": None,
+        "finished_at": None,
+    }
+    _jobs[job_id] = job
+    job_args = (
+        file_path,
+        filename,
+        content_type,
+        bucket_name,
+        document_hash,
+        stored is None,
+    )
+    if stored is not None:
+        _stored_uploads[job_id] = stored
+    _queue.put_nowait((job_id, job_args))
+
+    logger.info(f"🗂️ Queued ingestion job {job_id} for {filename}")
+    return job
+
+
+def active_documents() -> set[str]:
+    """Names of documents with an unfinished ingestion job."""
+    if _jobs is None:
+        return set()
+    return {
+        job["filename"]
+        for job in list(_jobs.values())
+        if job["status"] not in ("completed", "failed")
+    }
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    if _jobs is None:
+        return None
+    job = _jobs.get(job_id)
+    return dict(job) if job is not None else None
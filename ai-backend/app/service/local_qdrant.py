@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+from qdrant_client import QdrantClient
+
+
+class SerializedQdrantClient:
+    """
+    Embedded (":memory:") Qdrant shared by the sync and async call sites.
+
+    The local mode keeps its data per client object and is not thread-safe,
+    so every call goes through one lock; `aio` offers the same methods as
+    coroutines run on a worker thread, standing in for AsyncQdrantClient.
+    """
+
+    def __init__(self, qdrant: QdrantClient):
+        self._qdrant = qdrant
+        self._lock = threading.Lock()
+        self.aio = _AsyncFacade(self)
+
+    def __getattr__(self, name):
+        method = getattr(self._qdrant, name)
+
+        def call(*args, **kwargs):
+            with self._lock:
+                return method(*args, **kwargs)
+
+        return call
+
+
+class _AsyncFacade:
+    def __init__(self, serialized: SerializedQdrantClient):
+        self._serialized = serialized
+
+    def __getattr__(self, name):
+        call = getattr(self._serialized, name)
+
+        async def acall(*args, **kwargs):
+            return await asyncio.to_thread(call, *args, **kwargs)
+
+        return acall
@@ -1,48 +1,91 @@
 from minio import Minio
 import os
-from fastapi import UploadFile
+from typing import BinaryIO
 from app.core.logger_config import logger
+from app.core.metrics import span
+from app.core.resources import lazy_resource
 from minio.error import S3Error
 
-minio_client = Minio(
-    os.getenv("MINIO_ENDPOINT"),
-    access_key=os.getenv("MINIO_ROOT_USER"),
-    secret_key=os.getenv("MINIO_ROOT_PASSWORD"),
-    secure=False,
+minio_client = lazy_resource(
+    "minio_client",
+    lambda: Minio(
+        os.getenv("MINIO_ENDPOINT"),
+        access_key=os.getenv("MINIO_ROOT_USER"),
+        secret_key=os.getenv("MINIO_ROOT_PASSWORD"),
+        secure=False,
+    ),
 )
 
+# Size of one multipart upload part; S3 requires at least 5 MiB
+MINIO_PART_SIZE = int(os.getenv("MINIO_PART_SIZE", str(16 * 1024 * 1024)))
 
-def upload_files_to_bucket(file: UploadFile, bucket_name: str):
+
+def upload_stream_to_bucket(
+    data: BinaryIO, object_name: str, bucket_name: str, content_type: str = None
+):
+    """
+    Upload a stream of unknown length. MinIO sends it as a multipart upload
+    of MINIO_PART_SIZE parts, so only one part is held in memory at a time.
+    """
     try:
-        logger.info(f"📦 Uploading file '{file.filename}' to bucket '{bucket_name}'")
+        logger.info(f"📦 Streaming file '{object_name}' to bucket '{bucket_name}'")
 
         if not minio_client.bucket_exists(bucket_name):
             minio_client.make_bucket(bucket_name)
 
-        # Reset file pointer just in case
-        file.file.seek(0)
-
-        # Get file size from UploadFile (you can get from headers or content_length)
-        # If not available, you might need to read the bytes first (less efficient).
-        file.file.seek(0, 2)  # Move to end of file
-        file_size = file.file.tell()
-        file.file.seek(0)  # Reset to start
-
-        # Upload using put_object: bucket, object_name, data, length, content_type
-        minio_client.put_object(
-            bucket_name=bucket_name,
-            object_name=file.filename,
-            data=file.file,
-            length=file_size,
-            content_type=file.content_type or "application/octet-stream",
+        with span("minio_put"):
+            result = minio_client.put_object(
+                bucket_name=bucket_name,
+                object_name=object_name,
+                data=data,
+                length=-1,
+                part_size=MINIO_PART_SIZE,
+                content_type=content_type or "application/octet-stream",
+            )
+
+        logger.info(
+            f"✅ File '{object_name}' uploaded successfully to bucket '{bucket_name}'"
         )
+        return result
+
+    except Exception as e:
+        logger.error(f"❌ File upload failed for file '{object_name}': {e}")
+        raise
+
+
+def upload_path_to_bucket(
+    file_path: str, object_name: str, bucket_name: str, content_type: str = None
+):
+    try:
+        logger.info(f"📦 Uploading file '{object_name}' to bucket '{bucket_name}'")
+
+        if not minio_client.bucket_exists(bucket_name):
+            minio_client.make_bucket(bucket_name)
+
+        with span("minio_put"):
+            result = minio_client.fput_object(
+                bucket_name=bucket_name,
+                object_name=object_name,
+                file_path=file_path,
+                content_type=content_type or "application/octet-stream",
+            )
 
         logger.info(
-            f"✅ File '{file.filename}' uploaded successfully to bucket '{bucket_name}'"
+            f"✅ File '{object_name}' uploaded successfully to bucket '{bucket_name}'"
         )
+        return result
 
     except Exception as e:
-        logger.error(f"❌ File upload failed for file '{file.filename}': {e}")
+        logger.error(f"❌ File upload failed for file '{object_name}': {e}")
+        raise
+
+
+def delete_file_from_bucket(object_name: str, bucket_name: str):
+    try:
+        logger.info(f"🗑️ Removing file '{object_name}' from bucket '{bucket_name}'")
+        minio_client.remove_object(bucket_name=bucket_name, object_name=object_name)
+    except Exception as e:
+        logger.error(f"❌ File removal failed for file '{object_name}': {e}")
         raise
 
 
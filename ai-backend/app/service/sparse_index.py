@@ -0,0 +1,165 @@
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from app.core.logger_config import logger
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or shall "
+    "that the this to was were which with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    # Numbers are kept as tokens so "Section 303" matches exactly
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class SparseIndex:
+    """
+    Incremental BM25 inverted index stored in SQLite next to the Qdrant
+    collection. Postings are keyed by Qdrant point id, so lexical hits can
+    be fused with dense hits and documents can be replaced or dropped.
+    """
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS docs (
+                point_id TEXT PRIMARY KEY,
+                document_name TEXT,
+                document_hash TEXT,
+                length INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS docs_document_name ON docs (document_name);
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                point_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, point_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_point_id ON postings (point_id);
+            CREATE TABLE IF NOT EXISTS stats (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO stats VALUES ('doc_count', 0), ('total_length', 0);
+            """)
+        self._conn.commit()
+
+    def _stats(self) -> Tuple[int, int]:
+        rows = dict(self._conn.execute("SELECT key, value FROM stats").fetchall())
+        return rows["doc_count"], rows["total_length"]
+
+    def _bump_stats(self, docs: int, length: int):
+        self._conn.execute(
+            "UPDATE stats SET value = value + ? WHERE key = 'doc_count'", (docs,)
+        )
+        self._conn.execute(
+            "UPDATE stats SET value = value + ? WHERE key = 'total_length'", (length,)
+        )
+
+    def add_documents(
+        self, entries: Iterable[Tuple[str, Optional[str], Optional[str], str]]
+    ) -> int:
+        """
+        Index (point_id, document_name, document_hash, text) entries.
+        Point ids that are already indexed are left untouched.
+        """
+        added = 0
+        with self._lock:
+            for point_id, document_name, document_hash, text in entries:
+                terms = Counter(tokenize(text))
+                length = sum(terms.values())
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO docs VALUES (?, ?, ?, ?)",
+                    (point_id, document_name, document_hash, length),
+                )
+                if cursor.rowcount == 0:
+                    continue
+                self._conn.executemany(
+                    "INSERT INTO postings VALUES (?, ?, ?)",
+                    [(term, point_id, tf) for term, tf in terms.items()],
+                )
+                self._bump_stats(1, length)
+                added += 1
+            self._conn.commit()
+        return added
+
+    def delete_document(self, document_name: str, keep_hash: Optional[str] = None):
+        """Drop a document's postings, optionally keeping one revision."""
+        with self._lock:
+            if keep_hash:
+                rows = self._conn.execute(
+                    "SELECT point_id, length FROM docs "
+                    "WHERE document_name = ? AND document_hash IS NOT ?",
+                    (document_name, keep_hash),
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT point_id, length FROM docs WHERE document_name = ?",
+                    (document_name,),
+                ).fetchall()
+            if not rows:
+                return 0
+            ids = [(point_id,) for point_id, _ in rows]
+            self._conn.executemany("DELETE FROM postings WHERE point_id = ?", ids)
+            self._conn.executemany("DELETE FROM docs WHERE point_id = ?", ids)
+            self._bump_stats(-len(rows), -sum(length for _, length in rows))
+            self._conn.commit()
+        logger.info(f"🗑️ Removed {len(rows)} chunks of '{document_name}' from BM25")
+        return len(rows)
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Return the top-k (point_id, bm25 score) pairs for `query`."""
+        terms = set(tokenize(query))
+        if not terms or k <= 0:
+            return []
+
+        scores: Counter = Counter()
+        with self._lock:
+            doc_count, total_length = self._stats()
+            if doc_count == 0:
+                return []
+            avg_length = total_length / doc_count
+            for term in terms:
+                rows = self._conn.execute(
+                    "SELECT p.point_id, p.tf, d.length FROM postings p "
+                    "JOIN docs d ON d.point_id = p.point_id WHERE p.term = ?",
+                    (term,),
+                ).fetchall()
+                if not rows:
+                    continue
+                df = len(rows)
+                idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                for point_id, tf, length in rows:
+                    norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[point_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores.most_common(k)
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._stats()[0] == 0
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[List[str]], k: int = 60
+) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists: score(id) = sum over lists of 1 / (k + rank)."""
+    fused: Counter = Counter()
+    for ranking in rankings:
+        for rank, point_id in enumerate(ranking, start=1):
+            fused[point_id] += 1 / (k + rank)
+    return fused.most_common()
@@ -0,0 +1,160 @@
+import asyncio
+import fcntl
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from app.core.logger_config import logger
+from app.service.answer_cache import answer_cache
+from app.service.bulk_ingestion_service import (
+    BulkIngestion,
+    Source,
+    iter_minio_sources,
+)
+from app.service.doc_processor_service import (
+    delete_document_vectors,
+    list_indexed_documents,
+)
+from app.service.ingestion_service import active_documents
+
+# Seconds between background syncs of MINIO_DOCUMENT_BUCKET; 0 disables them
+SYNC_INTERVAL_SECONDS = float(os.getenv("SYNC_INTERVAL_SECONDS", "0"))
+SYNC_PARSE_WORKERS = int(os.getenv("SYNC_PARSE_WORKERS", "2"))
+# Keeps the API workers of one host from syncing the same bucket at once
+SYNC_LOCK_PATH = os.getenv(
+    "SYNC_LOCK_PATH", str(Path(os.getcwd()) / "data" / "bucket_sync.lock")
+)
+
+_thread_lock = threading.Lock()
+_sync_task: Optional[asyncio.Task] = None
+
+
+class SyncInProgressError(Exception):
+    pass
+
+
+@contextmanager
+def _sync_lock() -> Iterator[None]:
+    if not _thread_lock.acquire(blocking=False):
+        raise SyncInProgressError("A bucket sync is already running")
+    try:
+        Path(SYNC_LOCK_PATH).parent.mkdir(parents=True, exist_ok=True)
+        with open(SYNC_LOCK_PATH, "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise SyncInProgressError("A bucket sync is already running")
+            yield
+    finally:
+        _thread_lock.release()
+
+
+def _is_stale(record: dict, source: Source) -> bool:
+    if record.get("source_etag"):
+        return record["source_etag"] != source.fingerprint
+    # The upload reported no etag: fall back to the modification time
+    last_modified = record.get("source_last_modified")
+    return last_modified is None or (
+        last_modified != source.metadata["source_last_modified"]
+    )
+
+
+def sync_bucket(bucket: Optional[str] = None, dry_run: bool = False) -> dict:
+    """
+    Reconcile the index with a MinIO bucket: ingest new and changed objects
+    and drop the vectors of deleted ones. Only object listings and one
+    record per document are compared, so untouched documents cost nothing
+    beyond their listing entry.
+    """
+    bucket = bucket or os.getenv("MINIO_DOCUMENT_BUCKET")
+    if not bucket:
+        raise ValueError("Missing MINIO_DOCUMENT_BUCKET in env")
+
+    with _sync_lock():
+        started = time.perf_counter()
+        sources = {
+            source.document_name: source for source in iter_minio_sources(bucket)
+        }
+        indexed = list_indexed_documents()
+        # Uploads in flight are indexed before their object lands in the bucket
+        busy = active_documents()
+
+        new, changed = [], []
+        for name, source in sources.items():
+            if name in busy:
+                continue
+            record = indexed.get(name)
+            if record is None:
+                new.append(source)
+            elif _is_stale(record, source):
+                changed.append(source)
+        removed = [
+            name
+            for name, record in indexed.items()
+            if record.get("source_bucket") == bucket
+            and name not in sources
+            and name not in busy
+        ]
+
+        summary = {
+            "bucket": bucket,
+            "objects": len(sources),
+            "indexed_documents": len(indexed),
+            "new": [source.document_name for source in new],
+            "changed": [source.document_name for source in changed],
+            "removed": removed,
+            "skipped_in_flight": sorted(busy & (sources.keys() | indexed.keys())),
+            "dry_run": dry_run,
+        }
+        logger.info(
+            f"🔄 Bucket sync of '{bucket}': {len(new)} new, {len(changed)} changed, "
+            f"{len(removed)} removed of {len(sources)} object(s)"
+        )
+        if dry_run:
+            return summary
+
+        for name in removed:
+            delete_document_vectors(name)
+        todo = new + changed
+        if todo:
+            workers = max(1, min(SYNC_PARSE_WORKERS, len(todo)))
+            summary["ingestion"] = BulkIngestion(parse_workers=workers).run(todo)
+        # Answers built from replaced or deleted revisions are now stale
+        stale = removed + summary["changed"]
+        if stale:
+            answer_cache.invalidate_documents(stale)
+
+        summary["seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(f"✅ Bucket sync of '{bucket}' finished in {summary['seconds']}s")
+        return summary
+
+
+async def _sync_periodically():
+    while True:
+        await asyncio.sleep(SYNC_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(sync_bucket)
+        except SyncInProgressError:
+            logger.info("⏭️ Skipping scheduled bucket sync, one is already running")
+        except Exception as e:
+            logger.error(f"❌ Scheduled bucket sync failed: {e}")
+
+
+async def start_bucket_sync():
+    global _sync_task
+    if SYNC_INTERVAL_SECONDS <= 0:
+        return
+    logger.info(f"🔄 Syncing the document bucket every {SYNC_INTERVAL_SECONDS}s")
+    _sync_task = asyncio.create_task(_sync_periodically())
+
+
+async def stop_bucket_sync():
+    global _sync_task
+    if _sync_task is None:
+        return
+    _sync_task.cancel()
+    await asyncio.gather(_sync_task, return_exceptions=True)
+    _sync_task = None
@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from starlette.requests import Request
+
+try:
+    import python_multipart as multipart
+    from python_multipart.multipart import parse_options_header
+except ModuleNotFoundError:  # python-multipart < 0.0.13
+    import multipart
+    from multipart.multipart import parse_options_header
+
+from app.core.logger_config import logger
+from app.service.doc_processor_service import SUPPORTED_EXTENSIONS
+from app.service.minio_service import upload_stream_to_bucket
+
+# Request chunks (~64 KB each) buffered between the request and the MinIO put
+UPLOAD_PIPE_DEPTH = int(os.getenv("UPLOAD_PIPE_DEPTH", "64"))
+
+
+class UploadRejectedError(ValueError):
+    pass
+
+
+@dataclass
+class StreamedUpload:
+    filename: str
+    content_type: Optional[str]
+    file_path: str  # local copy for parsing; owned by the ingestion job
+    document_hash: str
+    size: int
+    # Resolves to the ObjectWriteResult once the object is stored in MinIO
+    stored: asyncio.Future
+
+
+class _Pipe:
+    """
+    Blocking, file-like read end for `put_object` running on a worker thread,
+    fed from the event loop. The bounded queue applies backpressure to the
+    request when MinIO is slower than the client.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, depth: int):
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=depth)
+        self._pending = b""
+        self._eof = False
+        self.reader: Optional[asyncio.Future] = None
+
+    async def _send(self, item):
+        if not self._queue.full():
+            self._queue.put_nowait(item)
+            return
+        put = asyncio.ensure_future(self._queue.put(item))
+        await asyncio.wait({put, self.reader}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            # The put gave up (failed) and stopped reading
+            put.cancel()
+            await self.reader
+
+    async def write(self, data: bytes):
+        if self.reader.done():
+            await self.reader  # surfaces the upload error
+        await self._send(data)
+
+    async def close(self, error: Optional[BaseException] = None):
+        if not self.reader.done():
+            await self._send(error)
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._pending and not self._eof:
+            item = asyncio.run_coroutine_threadsafe(
+                self._queue.get(), self._loop
+            ).result()
+            if item is None:
+                self._eof = True
+            elif isinstance(item, BaseException):
+                raise item
+            else:
+                self._pending = item
+        if size < 0 or size >= len(self._pending):
+            data, self._pending = self._pending, b""
+        else:
+            data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+
+@dataclass
+class _Part:
+    headers: List[Tuple[bytes, bytes]] = field(default_factory=list)
+    field_name: Optional[str] = None
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+
+
+class _PartEvents:
+    """python-multipart callbacks, queued to be handled by async code."""
+
+    def __init__(self):
+        self.events: list = []
+        self._part = _Part()
+        self._header_name = b""
+        self._header_value = b""
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self):
+        self._part = _Part()
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._part.headers.append((self._header_name.lower(), self._header_value))
+        self._header_name = self._header_value = b""
+
+    def on_headers_finished(self):
+        headers = dict(self._part.headers)
+        _, options = parse_options_header(headers.get(b"content-disposition", b""))
+        if b"name" in options:
+            self._part.field_name = options[b"name"].decode("utf-8", "replace")
+        if b"filename" in options:
+            self._part.filename = options[b"filename"].decode("utf-8", "replace")
+        if b"content-type" in headers:
+            self._part.content_type = headers[b"content-type"].decode("latin-1")
+        self.events.append(("begin", self._part))
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        self.events.append(("data", data[start:end]))
+
+    def on_part_end(self):
+        self.events.append(("end", None))
+
+    def drain(self) -> list:
+        events, self.events = self.events, []
+        return events
+
+
+async def receive_upload(
+    request: Request, bucket_name: str, field_name: str = "file"
+) -> StreamedUpload:
+    """
+    Read a multipart upload in one pass. Each chunk of the file part is
+    written to a temp file for parsing, hashed, and piped into a MinIO put
+    running on a worker thread. The put may still be finishing when this
+    returns, so the document can be chunked and embedded meanwhile.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type"))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise UploadRejectedError("Expected a multipart/form-data upload")
+
+    loop = asyncio.get_running_loop()
+    events = _PartEvents()
+    parser = multipart.MultipartParser(params[b"boundary"], events.callbacks())
+
+    part = tmp = pipe = None
+    digest = hashlib.sha256()
+    size = 0
+    in_file = done = False
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for event, value in events.drain():
+                if event == "begin" and not done:
+                    in_file = value.field_name == field_name and bool(value.filename)
+                    if not in_file:
+                        continue
+                    part = value
+                    extension = Path(part.filename).suffix.lower()
+                    if extension not in SUPPORTED_EXTENSIONS:
+                        raise UploadRejectedError(
+                            f"Unsupported document type '{extension}'"
+                        )
+                    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=extension)
+                    pipe = _Pipe(loop, UPLOAD_PIPE_DEPTH)
+                    pipe.reader = asyncio.ensure_future(
+                        asyncio.to_thread(
+                            upload_stream_to_bucket,
+                            pipe,
+                            part.filename,
+                            bucket_name,
+                            part.content_type,
+                        )
+                    )
+                elif event == "data" and in_file:
+                    tmp.write(value)
+                    digest.update(value)
+                    size += len(value)
+                    await pipe.write(value)
+                elif event == "end" and in_file:
+                    in_file, done = False, True
+                    tmp.close()
+                    await pipe.close()
+        parser.finalize()
+        if not done:
+            raise UploadRejectedError("File not provided")
+    except BaseException as e:
+        if pipe is not None:
+            # Aborts the multipart upload instead of storing a partial object
+            await pipe.close(e)
+            await asyncio.gather(pipe.reader, return_exceptions=True)
+        if tmp is not None:
+            tmp.close()
+            os.remove(tmp.name)
+        raise
+
+    # Retrieved by the ingestion dispatcher; this only silences the warning
+    # about an unretrieved error if the job never gets that far
+    pipe.reader.add_done_callback(lambda f: f.cancelled() or f.exception())
+    logger.info(f"📥 Received '{part.filename}' ({size} bytes)")
+    return StreamedUpload(
+        filename=part.filename,
+        content_type=part.content_type,
+        file_path=tmp.name,
+        document_hash=digest.hexdigest(),
+        size=size,
+        stored=pipe.reader,
+    )
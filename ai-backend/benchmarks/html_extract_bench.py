@@ -0,0 +1,85 @@
+"""
+Compare the streaming page-field extractor against the previous full
+BeautifulSoup parse on the saved HTML fixtures.
+
+    python -m benchmarks.html_extract_bench [--repeat 50] [--article-chars 2000]
+"""
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from app.core.html_extract import extract_page_fields
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "html"
+
+
+def bs4_extract_page_fields(html: str) -> dict:
+    # Implementation used by scrape_links before the streaming extractor
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.string if soup.title else "No title"
+    description = ""
+    desc_tag = soup.find("meta", attrs={"name": "description"})
+    if desc_tag and desc_tag.get("content"):
+        description = desc_tag["content"]
+    else:
+        p = soup.find("p")
+        description = p.get_text() if p else "No description"
+    return {"title": title, "description": description}
+
+
+def time_per_call(fn, html: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(html)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def fields_match(expected: dict, actual: dict) -> bool:
+    return all(
+        (expected[key] or "").strip() == (actual[key] or "").strip()
+        for key in ("title", "description")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--article-chars", type=int, default=0)
+    args = parser.parse_args()
+
+    print(
+        f"{'fixture':<28}{'size KB':>9}{'bs4 ms':>10}{'fast ms':>10}"
+        f"{'speedup':>9}  match"
+    )
+    total_bs4 = total_fast = 0.0
+
+    def fast(html: str) -> dict:
+        return extract_page_fields(html, article_chars=args.article_chars)
+
+    for path in sorted(FIXTURES_DIR.glob("*.html")):
+        html = path.read_text(encoding="utf-8")
+
+        bs4_ms = time_per_call(bs4_extract_page_fields, html, args.repeat)
+        fast_ms = time_per_call(fast, html, args.repeat)
+        total_bs4 += bs4_ms
+        total_fast += fast_ms
+        match = fields_match(bs4_extract_page_fields(html), fast(html))
+        print(
+            f"{path.name:<28}{len(html) / 1024:>9.1f}{bs4_ms:>10.3f}{fast_ms:>10.3f}"
+            f"{bs4_ms / fast_ms:>8.1f}x  {'yes' if match else 'NO'}"
+        )
+
+    print(
+        f"{'total':<37}{total_bs4:>10.3f}{total_fast:>10.3f}"
+        f"{total_bs4 / total_fast:>8.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
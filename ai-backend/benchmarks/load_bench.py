@@ -0,0 +1,445 @@
+"""
+End-to-end load benchmark of the API against local stand-ins.
+
+    python -m benchmarks.load_bench run [--concurrency 8] [--requests 40]
+        [--scenarios upload,rag_chat,chat,web_search] [--tokens-per-second 50]
+        [--base-url http://127.0.0.1:8000]
+    python -m benchmarks.load_bench compare BASE [HEAD] [--threshold 10]
+
+`run` starts the stubs from benchmarks/stubs.py, launches uvicorn against
+them (embedded Qdrant, thread ingestion executor, fake search backend) and
+drives each scenario at the given concurrency. With --base-url an already
+running API is used as-is. Results are saved per git commit under
+benchmarks/results/, and `compare` diffs two of them (a path or a commit
+prefix; HEAD defaults to the newest result).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import pymupdf
+
+from benchmarks.stubs import WORDS, start_stubs, stub_env
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).parent / "results"
+SCENARIOS = ("upload", "rag_chat", "chat", "web_search")
+QUESTIONS = [
+    f"How does {a} affect {b} in the {c} pipeline?"
+    for a, b, c in zip(WORDS, reversed(WORDS), WORDS[3:] + WORDS[:3])
+]
+# Lower is better for every metric but these
+HIGHER_IS_BETTER = {"throughput_rps", "pages_per_second"}
+
+
+@dataclass
+class Sample:
+    ok: bool
+    latency: float
+    ttft: Optional[float] = None
+    pages: int = 0
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+
+
+def percentiles(values: List[float]) -> dict:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))]
+
+    return {
+        "p50": round(pick(0.50) * 1000, 2),
+        "p95": round(pick(0.95) * 1000, 2),
+        "p99": round(pick(0.99) * 1000, 2),
+        "mean": round(statistics.fmean(values) * 1000, 2),
+        "max": round(ordered[-1] * 1000, 2),
+    }
+
+
+def summarize(samples: List[Sample], wall: float) -> dict:
+    ok = [s for s in samples if s.ok]
+    summary = {
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(ok) / wall, 3) if wall else 0.0,
+        "latency_ms": percentiles([s.latency for s in ok]),
+    }
+    ttfts = [s.ttft for s in ok if s.ttft is not None]
+    if ttfts:
+        summary["ttft_ms"] = percentiles(ttfts)
+    pages = sum(s.pages for s in ok)
+    if pages:
+        summary["pages"] = pages
+        summary["pages_per_second"] = round(pages / wall, 3)
+        stages: Dict[str, float] = {}
+        for sample in ok:
+            for stage, seconds in sample.stage_seconds.items():
+                stages[stage] = stages.get(stage, 0.0) + seconds
+        summary["stage_seconds"] = {k: round(v, 3) for k, v in sorted(stages.items())}
+    return summary
+
+
+def make_pdf(pages: int, seed: int) -> bytes:
+    rng = random.Random(seed)
+    doc = pymupdf.open()
+    for number in range(pages):
+        page = doc.new_page()
+        text = "\n".join(
+            " ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(40)
+        )
+        page.insert_text((36, 48), f"Section {number + 1}\n{text}", fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+async def timed_stream(client: httpx.AsyncClient, method: str, url: str, **kwargs):
+    started = time.perf_counter()
+    ttft = None
+    async with client.stream(method, url, **kwargs) as response:
+        async for chunk in response.aiter_bytes():
+            if ttft is None and chunk:
+                ttft = time.perf_counter() - started
+        ok = response.status_code == 200
+    return Sample(ok=ok, latency=time.perf_counter() - started, ttft=ttft)
+
+
+async def chat(client, index: int, args) -> Sample:
+    question = QUESTIONS[index % len(QUESTIONS)] + f" ({index})"
+    return await timed_stream(
+        client, "POST", "/langchain-ai/chat", json={"query": question}
+    )
+
+
+async def rag_chat(client, index: int, args) -> Sample:
+    question = QUESTIONS[index % len(QUESTIONS)] + f" ({index})"
+    return await timed_stream(
+        client, "POST", "/rag-langchain-ai/chat", json={"query": question}
+    )
+
+
+async def web_search(client, index: int, args) -> Sample:
+    # A few distinct queries, so the search and page caches see repeats
+    question = QUESTIONS[index % args.distinct_searches]
+    started = time.perf_counter()
+    response = await client.get("/web-search-graph/", params={"query": question})
+    return Sample(ok=response.status_code == 200, latency=time.perf_counter() - started)
+
+
+async def upload(client, index: int, args) -> Sample:
+    pdf = make_pdf(args.pages, seed=index)
+    started = time.perf_counter()
+    response = await client.post(
+        "/rag-langchain-ai/upload-document",
+        files={"file": (f"benchmark-{index}.pdf", pdf, "application/pdf")},
+    )
+    if response.status_code != 202:
+        return Sample(ok=False, latency=time.perf_counter() - started)
+    job_id = response.json()["job_id"]
+    while True:
+        await asyncio.sleep(0.1)
+        job = (await client.get(f"/rag-langchain-ai/jobs/{job_id}")).json()["data"]
+        if job["status"] in ("completed", "failed"):
+            break
+    return Sample(
+        ok=job["status"] == "completed",
+        latency=time.perf_counter() - started,
+        pages=args.pages,
+        stage_seconds=job.get("stage_seconds") or {},
+    )
+
+
+SCENARIO_FUNCS = {
+    "upload": upload,
+    "rag_chat": rag_chat,
+    "chat": chat,
+    "web_search": web_search,
+}
+
+
+async def run_scenario(client: httpx.AsyncClient, name: str, args) -> dict:
+    func = SCENARIO_FUNCS[name]
+    requests = args.uploads if name == "upload" else args.requests
+    indexes = iter(range(requests))
+    samples: List[Sample] = []
+
+    async def worker():
+        for index in indexes:
+            try:
+                samples.append(await func(client, index, args))
+            except httpx.HTTPError as e:
+                print(f"  {name} #{index} failed: {e!r}", file=sys.stderr)
+                samples.append(Sample(ok=False, latency=0.0))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    return summarize(samples, time.perf_counter() - started)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def launch_api(env: Dict[str, str], workdir: str) -> (subprocess.Popen, str):
+    port = free_port()
+    RESULTS_DIR.mkdir(exist_ok=True)
+    log = open(RESULTS_DIR / "api.log", "w")
+    env = {
+        **os.environ,
+        **env,
+        # Cold, isolated caches per run so results do not depend on history
+        "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embeddings.sqlite3"),
+        "PAGE_CACHE_PATH": os.path.join(workdir, "pages.sqlite3"),
+        "SPARSE_INDEX_PATH": os.path.join(workdir, "bm25.sqlite3"),
+        # Every question is new to the model; cache hits would hide LLM cost
+        "ANSWER_CACHE_SIMILARITY": "2",
+        "READY_RESOURCES": "embed_model",
+    }
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=ROOT,
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def wait_ready(base_url: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/ready")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.5)
+    raise TimeoutError(f"API at {base_url} was not ready after {timeout}s")
+
+
+def git_revision() -> dict:
+    def git(*cmd) -> str:
+        return subprocess.run(
+            ["git", *cmd], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+
+    return {
+        "sha": git("rev-parse", "HEAD"),
+        "dirty": bool(git("status", "--porcelain")),
+    }
+
+
+async def run_all(args, base_url: str) -> dict:
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    timeout = httpx.Timeout(args.timeout)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=timeout
+    ) as client:
+        for name in args.scenarios:
+            print(f"▶ {name} (concurrency {args.concurrency})")
+            results[name] = await run_scenario(client, name, args)
+            print_summary(name, results[name])
+    return results
+
+
+def print_summary(name: str, summary: dict):
+    latency = summary.get("latency_ms", {})
+    line = (
+        f"  {name:<11} ok {summary['requests'] - summary['errors']}/"
+        f"{summary['requests']}  {summary['throughput_rps']:.2f} req/s  "
+        f"p50 {latency.get('p50', '-')} ms  p95 {latency.get('p95', '-')} ms  "
+        f"p99 {latency.get('p99', '-')} ms"
+    )
+    if "ttft_ms" in summary:
+        line += f"  ttft p50 {summary['ttft_ms']['p50']} ms"
+    if "pages_per_second" in summary:
+        line += f"  {summary['pages_per_second']:.2f} pages/s"
+    print(line)
+
+
+def command_run(args):
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"Unknown scenarios {sorted(unknown)}, expected {SCENARIOS}")
+
+    stubs = process = None
+    workdir = tempfile.TemporaryDirectory(prefix="load-bench-")
+    try:
+        if args.base_url:
+            base_url = args.base_url
+        else:
+            stubs = start_stubs(
+                args.tokens_per_second,
+                args.tokens,
+                args.first_token_delay,
+                args.web_latency,
+            )
+            process, base_url = launch_api(stub_env(stubs), workdir.name)
+            print(f"🚀 API at {base_url}, logs in {RESULTS_DIR / 'api.log'}")
+        asyncio.run(wait_ready(base_url, args.ready_timeout))
+        scenarios = asyncio.run(run_all(args, base_url))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        for stub in (stubs or {}).values():
+            stub.close()
+        workdir.cleanup()
+
+    revision = git_revision()
+    result = {
+        **revision,
+        "created_at": datetime.now().isoformat(),
+        "config": {
+            key: getattr(args, key)
+            for key in (
+                "concurrency",
+                "requests",
+                "uploads",
+                "pages",
+                "tokens_per_second",
+                "tokens",
+                "first_token_delay",
+                "web_latency",
+                "distinct_searches",
+                "base_url",
+            )
+        },
+        "scenarios": scenarios,
+    }
+    RESULTS_DIR.mkdir(exist_ok=True)
+    name = revision["sha"][:12] + ("-dirty" if revision["dirty"] else "")
+    path = Path(args.output) if args.output else RESULTS_DIR / f"{name}.json"
+    path.write_text(json.dumps(result, indent=2))
+    print(f"💾 Saved {path}")
+
+
+def load_result(ref: Optional[str]) -> (Path, dict):
+    if ref is None:
+        candidates = sorted(RESULTS_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        if not candidates:
+            sys.exit(f"No results in {RESULTS_DIR}")
+        path = candidates[-1]
+    elif Path(ref).is_file():
+        path = Path(ref)
+    else:
+        matches = sorted(RESULTS_DIR.glob(f"{ref}*.json"))
+        if len(matches) != 1:
+            sys.exit(f"Expected one result matching '{ref}', found {len(matches)}")
+        path = matches[0]
+    return path, json.loads(path.read_text())
+
+
+def flatten(summary: dict) -> Dict[str, float]:
+    metrics = {}
+    for key in ("throughput_rps", "pages_per_second", "errors"):
+        if key in summary:
+            metrics[key] = summary[key]
+    for group in ("latency_ms", "ttft_ms"):
+        for quantile in ("p50", "p95", "p99"):
+            if quantile in summary.get(group, {}):
+                metrics[f"{group}.{quantile}"] = summary[group][quantile]
+    return metrics
+
+
+def command_compare(args):
+    base_path, base = load_result(args.base)
+    head_path, head = load_result(args.head)
+    print(f"base {base_path.name}  →  head {head_path.name}")
+    if base["config"] != head["config"]:
+        print("⚠️ Runs used different configurations; deltas may not be comparable")
+
+    regressions = 0
+    print(f"{'scenario':<12}{'metric':<18}{'base':>12}{'head':>12}{'change':>10}")
+    for scenario in head["scenarios"]:
+        if scenario not in base["scenarios"]:
+            continue
+        before = flatten(base["scenarios"][scenario])
+        after = flatten(head["scenarios"][scenario])
+        for metric in after:
+            if metric not in before:
+                continue
+            old, new = before[metric], after[metric]
+            change = (new - old) / old * 100 if old else 0.0
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = ""
+            if metric == "errors":
+                flag = "  ⚠️" if new > old else ""
+            elif worse > args.threshold:
+                flag = "  ⚠️"
+            regressions += bool(flag)
+            print(f"{scenario:<12}{metric:<18}{old:>12}{new:>12}{change:>+9.1f}%{flag}")
+    if regressions:
+        print(f"⚠️ {regressions} metric(s) regressed by more than {args.threshold}%")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the load benchmark")
+    run.add_argument(
+        "--scenarios",
+        type=lambda value: [s.strip() for s in value.split(",") if s.strip()],
+        default=list(SCENARIOS),
+    )
+    run.add_argument("--concurrency", type=int, default=8)
+    run.add_argument("--requests", type=int, default=40, help="per chat scenario")
+    run.add_argument("--uploads", type=int, default=8)
+    run.add_argument("--pages", type=int, default=20, help="pages per uploaded PDF")
+    run.add_argument("--tokens-per-second", type=float, default=50)
+    run.add_argument("--tokens", type=int, default=64)
+    run.add_argument("--first-token-delay", type=float, default=0.05)
+    run.add_argument("--web-latency", type=float, default=0.0)
+    run.add_argument("--distinct-searches", type=int, default=4)
+    run.add_argument("--timeout", type=float, default=120)
+    run.add_argument("--ready-timeout", type=float, default=300)
+    run.add_argument("--base-url", help="benchmark an already running API instead")
+    run.add_argument("--output", help="result file (default: results/<sha>.json)")
+    run.set_defaults(func=command_run)
+
+    compare = commands.add_parser("compare", help="Diff two saved results")
+    compare.add_argument("base", help="result file or commit prefix")
+    compare.add_argument("head", nargs="?", help="default: newest result")
+    compare.add_argument("--threshold", type=float, default=10.0, help="percent")
+    compare.set_defaults(func=command_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,435 @@
+"""
+Local stand-ins for the services the backend talks to, so load benchmarks
+run offline and are repeatable:
+
+- FakeOllamaHandler: /api/chat streaming at a configurable token rate, with
+  one tool call per agent turn when tools are offered
+- FakeS3Handler: the subset of the S3 API the MinIO client uses
+- FakeWebHandler: HTML pages for the fake search backend's result URLs
+
+    python -m benchmarks.stubs [--tokens-per-second 50] [--tokens 64]
+
+starts all three and prints the environment to point the API at them.
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Type
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+S3_NS = "http://s3.amazonaws.com/doc/2006-03-01/"
+WORDS = (
+    "latency throughput vector index chunk embedding retrieval cache model "
+    "token stream batch query context answer document page search agent"
+).split()
+
+
+class StubServer:
+    """A ThreadingHTTPServer on a free local port, served from a daemon thread."""
+
+    def __init__(self, handler: Type[BaseHTTPRequestHandler], port: int = 0, **config):
+        # Each server gets its own handler subclass so state is not shared
+        self.handler = type(handler.__name__, (handler,), {"config": config})
+        self.handler.state = {}
+        self.handler.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self.handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config: dict = {}
+    state: dict = {}
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def reply(self, status: int, body: bytes = b"", headers: Dict[str, str] = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def write_chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+
+class FakeOllamaHandler(_Handler):
+    """
+    Streams `tokens` tokens per chat at `tokens_per_second` after a
+    `first_token_delay`. When the request offers tools and the last message
+    is not a tool result, the first tool is called with the user's question,
+    so ReAct agents take one tool round trip before answering.
+    """
+
+    def do_GET(self):
+        if self.path == "/api/ps":
+            with self.lock:
+                loaded = sorted(self.state.setdefault("loaded", set()))
+            body = {"models": [{"name": m, "model": m} for m in loaded]}
+        elif self.path == "/api/tags":
+            body = {"models": []}
+        else:
+            self.reply(200, b"Ollama is running")
+            return
+        self.reply(200, json.dumps(body).encode())
+
+    def do_POST(self):
+        request = json.loads(self.read_body() or b"{}")
+        model = request.get("model", "")
+        with self.lock:
+            self.state.setdefault("loaded", set()).add(model)
+        if self.path == "/api/generate":
+            body = {"model": model, "response": "", "done": True}
+            self.reply(200, json.dumps(body).encode())
+        elif self.path == "/api/chat":
+            self.stream_chat(request)
+        else:
+            self.reply(404, b'{"error": "not found"}')
+
+    def frame(self, request: dict, message: dict, done: bool = False, **extra):
+        data = {
+            "model": request.get("model"),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", **message},
+            "done": done,
+            **extra,
+        }
+        return json.dumps(data).encode() + b"\n"
+
+    def stream_chat(self, request: dict):
+        tokens = int(self.config.get("tokens", 64))
+        rate = float(self.config.get("tokens_per_second", 50))
+        messages = request.get("messages") or [{}]
+        tools = request.get("tools") or []
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(float(self.config.get("first_token_delay", 0.05)))
+
+        if tools and messages[-1].get("role") != "tool":
+            function = tools[0]["function"]
+            argument = next(iter(function.get("parameters", {}).get("required", [])))
+            question = next(
+                (m.get("content") for m in messages if m.get("role") == "user"), ""
+            )
+            call = {"function": {"name": function["name"], "arguments": {}}}
+            call["function"]["arguments"][argument] = question
+            self.write_chunk(self.frame(request, {"content": "", "tool_calls": [call]}))
+            tokens = 0
+        else:
+            for i in range(tokens):
+                if i:
+                    time.sleep(1 / rate)
+                word = WORDS[i % len(WORDS)]
+                self.write_chunk(self.frame(request, {"content": f" {word}"}))
+
+        self.write_chunk(
+            self.frame(
+                request,
+                {"content": ""},
+                done=True,
+                done_reason="stop",
+                prompt_eval_count=1,
+                eval_count=tokens,
+            )
+        )
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class FakeS3Handler(_Handler):
+    """
+    In-memory buckets supporting what app/service/minio_service.py and the
+    MinIO client need: bucket head/create/location, object put (single and
+    multipart), head, get, delete and ListObjectsV2. Signatures are ignored.
+    """
+
+    def split(self):
+        parts = urlsplit(self.path)
+        bucket, _, key = parts.path.lstrip("/").partition("/")
+        query = parse_qs(parts.query, keep_blank_values=True)
+        query = {name: values[0] for name, values in query.items()}
+        return unquote(bucket), unquote(key), query
+
+    @property
+    def buckets(self) -> Dict[str, Dict[str, dict]]:
+        return self.state.setdefault("buckets", {})
+
+    def xml(self, status: int, body: str):
+        payload = f'<?xml version="1.0" encoding="UTF-8"?>\n{body}'.encode()
+        self.reply(status, payload, {"Content-Type": "application/xml"})
+
+    def error(self, status: int, code: str):
+        if self.command == "HEAD":
+            self.reply(status)
+        else:
+            self.xml(
+                status, f"<Error><Code>{code}</Code><Message>{code}</Message></Error>"
+            )
+
+    def object_headers(self, obj: dict) -> Dict[str, str]:
+        return {
+            "ETag": f'"{obj["etag"]}"',
+            "Last-Modified": formatdate(obj["mtime"], usegmt=True),
+            "Content-Type": obj["content_type"],
+        }
+
+    def do_HEAD(self):
+        bucket, key, _ = self.split()
+        with self.lock:
+            objects = self.buckets.get(bucket)
+            obj = objects.get(key) if objects is not None and key else None
+        if objects is None:
+            self.error(404, "NoSuchBucket")
+        elif not key:
+            self.reply(200)
+        elif obj is None:
+            self.error(404, "NoSuchKey")
+        else:
+            self.send_response(200)
+            for name, value in self.object_headers(obj).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(obj["data"])))
+            self.end_headers()
+
+    def do_GET(self):
+        bucket, key, query = self.split()
+        with self.lock:
+            objects = self.buckets.get(bucket)
+            if objects is not None and not key:
+                listing = sorted(objects.items())
+            obj = objects.get(key) if objects is not None and key else None
+        if "location" in query:
+            self.xml(200, f'<LocationConstraint xmlns="{S3_NS}"></LocationConstraint>')
+        elif objects is None:
+            self.error(404, "NoSuchBucket")
+        elif not key:
+            self.list_objects(bucket, listing, query)
+        elif obj is None:
+            self.error(404, "NoSuchKey")
+        else:
+            self.reply(200, obj["data"], self.object_headers(obj))
+
+    def list_objects(self, bucket: str, listing, query: dict):
+        prefix = query.get("prefix", "")
+        after = query.get("start-after") or query.get("continuation-token") or ""
+        limit = int(query.get("max-keys") or 1000)
+        matched = [(k, o) for k, o in listing if k.startswith(prefix) and k > after]
+        page, truncated = matched[:limit], len(matched) > limit
+        contents = "".join(
+            f"<Contents><Key>{escape(key)}</Key>"
+            f"<LastModified>{datetime.fromtimestamp(obj['mtime'], timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')}</LastModified>"  # noqa: E501
+            f"<ETag>&quot;{obj['etag']}&quot;</ETag><Size>{len(obj['data'])}</Size>"
+            f"<StorageClass>STANDARD</StorageClass></Contents>"
+            for key, obj in page
+        )
+        token = (
+            f"<NextContinuationToken>{escape(page[-1][0])}</NextContinuationToken>"
+            if truncated
+            else ""
+        )
+        self.xml(
+            200,
+            f'<ListBucketResult xmlns="{S3_NS}"><Name>{escape(bucket)}</Name>'
+            f"<Prefix>{escape(prefix)}</Prefix><KeyCount>{len(page)}</KeyCount>"
+            f"<MaxKeys>{limit}</MaxKeys>"
+            f"<IsTruncated>{'true' if truncated else 'false'}</IsTruncated>"
+            f"{token}{contents}</ListBucketResult>",
+        )
+
+    def store(self, bucket: str, key: str, data: bytes, etag: str = None) -> dict:
+        obj = {
+            "data": data,
+            "etag": etag or hashlib.md5(data).hexdigest(),
+            "mtime": time.time(),
+            "content_type": self.headers.get(
+                "Content-Type", "application/octet-stream"
+            ),
+        }
+        with self.lock:
+            self.buckets[bucket][key] = obj
+        return obj
+
+    def do_PUT(self):
+        bucket, key, query = self.split()
+        data = self.read_body()
+        if not key:
+            with self.lock:
+                self.buckets.setdefault(bucket, {})
+            self.reply(200)
+            return
+        if bucket not in self.buckets:
+            self.error(404, "NoSuchBucket")
+            return
+        if "uploadId" in query:
+            with self.lock:
+                upload = self.state.get("uploads", {}).get(query["uploadId"])
+                if upload is not None:
+                    upload["parts"][int(query["partNumber"])] = data
+            if upload is None:
+                self.error(404, "NoSuchUpload")
+                return
+            self.reply(200, headers={"ETag": f'"{hashlib.md5(data).hexdigest()}"'})
+            return
+        obj = self.store(bucket, key, data)
+        self.reply(200, headers={"ETag": f'"{obj["etag"]}"'})
+
+    def do_POST(self):
+        bucket, key, query = self.split()
+        self.read_body()
+        if "uploads" in query:
+            upload_id = uuid.uuid4().hex
+            with self.lock:
+                self.state.setdefault("uploads", {})[upload_id] = {
+                    "parts": {},
+                    "content_type": self.headers.get("Content-Type"),
+                }
+            self.xml(
+                200,
+                f'<InitiateMultipartUploadResult xmlns="{S3_NS}">'
+                f"<Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>"
+                f"<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>",
+            )
+        elif "uploadId" in query:
+            with self.lock:
+                upload = self.state.get("uploads", {}).pop(query["uploadId"], None)
+            if upload is None:
+                self.error(404, "NoSuchUpload")
+                return
+            parts = [upload["parts"][n] for n in sorted(upload["parts"])]
+            digest = hashlib.md5(
+                b"".join(hashlib.md5(part).digest() for part in parts)
+            ).hexdigest()
+            obj = self.store(bucket, key, b"".join(parts), f"{digest}-{len(parts)}")
+            obj["content_type"] = upload["content_type"] or obj["content_type"]
+            self.xml(
+                200,
+                f'<CompleteMultipartUploadResult xmlns="{S3_NS}">'
+                f"<Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>"
+                f"<ETag>&quot;{obj['etag']}&quot;</ETag>"
+                f"</CompleteMultipartUploadResult>",
+            )
+        else:
+            self.error(400, "InvalidRequest")
+
+    def do_DELETE(self):
+        bucket, key, query = self.split()
+        with self.lock:
+            if "uploadId" in query:
+                self.state.get("uploads", {}).pop(query["uploadId"], None)
+            else:
+                self.buckets.get(bucket, {}).pop(key, None)
+        self.reply(204)
+
+
+class FakeWebHandler(_Handler):
+    """Deterministic article pages, so scraping exercises the real extractor."""
+
+    def do_GET(self):
+        seed = int(hashlib.sha1(self.path.encode()).hexdigest(), 16)
+        paragraphs = int(self.config.get("paragraphs", 20))
+        text = "".join(
+            "<p>"
+            + " ".join(WORDS[(seed + i * 7 + j) % len(WORDS)] for j in range(60))
+            + ".</p>"
+            for i in range(paragraphs)
+        )
+        html = (
+            f"<html><head><title>Page {seed % 10000}</title>"
+            f'<meta name="description" content="Stub page for {escape(self.path)}">'
+            f"</head><body><article>{text}</article></body></html>"
+        ).encode()
+        time.sleep(float(self.config.get("latency", 0)))
+        self.reply(
+            200,
+            html,
+            {"Content-Type": "text/html; charset=utf-8", "Cache-Control": "max-age=60"},
+        )
+
+
+def start_stubs(
+    tokens_per_second: float = 50,
+    tokens: int = 64,
+    first_token_delay: float = 0.05,
+    web_latency: float = 0.0,
+) -> Dict[str, StubServer]:
+    return {
+        "ollama": StubServer(
+            FakeOllamaHandler,
+            tokens_per_second=tokens_per_second,
+            tokens=tokens,
+            first_token_delay=first_token_delay,
+        ).start(),
+        "s3": StubServer(FakeS3Handler).start(),
+        "web": StubServer(FakeWebHandler, latency=web_latency).start(),
+    }
+
+
+def stub_env(stubs: Dict[str, StubServer]) -> Dict[str, str]:
+    """Environment pointing the API at the stubs and an embedded Qdrant."""
+    return {
+        "OLLAMA_HOSTS": stubs["ollama"].url,
+        "MINIO_ENDPOINT": stubs["s3"].url.removeprefix("http://"),
+        "MINIO_ROOT_USER": "benchmark",
+        "MINIO_ROOT_PASSWORD": "benchmark",
+        "MINIO_DOCUMENT_BUCKET": "benchmark-documents",
+        "QDRANT_ENDPOINT": ":memory:",
+        "RAG_VECTOR_DB_COLLECTION_NAME": "benchmark",
+        "INGESTION_EXECUTOR": "thread",
+        "WEB_SEARCH_BACKEND": "fake",
+        "WEB_SEARCH_FAKE_BASE_URL": stubs["web"].url,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--tokens", type=int, default=64)
+    parser.add_argument("--first-token-delay", type=float, default=0.05)
+    parser.add_argument("--web-latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    stubs = start_stubs(
+        args.tokens_per_second, args.tokens, args.first_token_delay, args.web_latency
+    )
+    for name, value in stub_env(stubs).items():
+        print(f"export {name}={value}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        for stub in stubs.values():
+            stub.close()
+
+
+if __name__ == "__main__":
+    main()
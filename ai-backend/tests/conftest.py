@@ -0,0 +1,33 @@
+import os
+import tempfile
+
+import pytest
+
+# Module-level config is read at import time, so point the app at local
+# stand-ins before any test imports it
+_data_dir = tempfile.mkdtemp(prefix="ai-backend-tests-")
+os.environ.setdefault("QDRANT_ENDPOINT", ":memory:")
+os.environ.setdefault("RAG_VECTOR_DB_COLLECTION_NAME", "tests")
+os.environ.setdefault(
+    "SPARSE_INDEX_PATH", os.path.join(_data_dir, "tests_bm25.sqlite3")
+)
+os.environ.setdefault(
+    "EMBEDDING_CACHE_PATH", os.path.join(_data_dir, "embeddings.sqlite3")
+)
+
+
+@pytest.fixture
+def empty_index():
+    """Drop the chunk and document-record collections of the in-memory Qdrant."""
+    from app.service import doc_processor_service
+
+    client = doc_processor_service.client
+    for name in (
+        doc_processor_service.collection_name,
+        doc_processor_service.document_collection_name,
+    ):
+        if client.collection_exists(name):
+            client.delete_collection(name)
+    doc_processor_service._collection_ready = False
+    doc_processor_service._document_collection_ready = False
+    return doc_processor_service
@@ -0,0 +1,109 @@
+import asyncio
+
+import httpx
+
+from app.core.async_scraper import AsyncScraper
+from app.core.html_extract import PageFieldExtractor
+
+HEAD = (
+    b"<html><head><title>Example page</title>"
+    b'<meta name="description" content="A short summary"></head><body>'
+)
+
+
+class CountingStream(httpx.AsyncByteStream):
+    """Response body served in fixed blocks, counting how many were pulled."""
+
+    def __init__(self, head: bytes, blocks: int, block: bytes = b"x" * 1024):
+        self.head = head
+        self.blocks = blocks
+        self.block = block
+        self.served = 0
+
+    async def __aiter__(self):
+        self.served += 1
+        yield self.head
+        for _ in range(self.blocks):
+            self.served += 1
+            yield self.block
+
+
+def _scraper(handler, **kwargs) -> AsyncScraper:
+    return AsyncScraper(transport=httpx.MockTransport(handler), cache=None, **kwargs)
+
+
+def test_extractor_stops_once_the_fields_are_known():
+    extractor = PageFieldExtractor()
+    assert extractor.feed(HEAD.decode())
+    # Anything fed afterwards is ignored
+    assert extractor.feed("<p>never parsed</p>")
+    assert extractor.fields() == {
+        "title": "Example page",
+        "description": "A short summary",
+    }
+
+
+def test_body_paragraph_is_the_fallback_description():
+    extractor = PageFieldExtractor()
+    assert not extractor.feed("<html><head><title>T</title></head>")
+    assert extractor.feed("<body><p>First <b>paragraph</b></p><p>second</p>")
+    assert extractor.fields()["description"] == "First paragraph"
+
+
+def test_download_stops_when_the_extractor_is_done():
+    body = CountingStream(HEAD, blocks=1000)
+    scraper = _scraper(lambda request: httpx.Response(200, stream=body))
+
+    page = asyncio.run(scraper.fetch("https://example.com/"))
+
+    assert page == {
+        "url": "https://example.com/",
+        "title": "Example page",
+        "description": "A short summary",
+    }
+    assert body.served == 1
+
+
+def test_download_stops_at_the_byte_cap():
+    # No title ever arrives, so only the cap ends the download
+    body = CountingStream(b"<html><body>", blocks=1000)
+    scraper = _scraper(lambda request: httpx.Response(200, stream=body), max_bytes=4096)
+
+    page = asyncio.run(scraper.fetch("https://example.com/"))
+
+    assert page["title"] == "No title"
+    assert body.served <= 5
+
+
+def test_slow_pages_are_cut_off_at_the_deadline():
+    async def handler(request):
+        if request.url.host == "slow.example.com":
+            await asyncio.sleep(10)
+        return httpx.Response(200, stream=CountingStream(HEAD, blocks=0))
+
+    scraper = _scraper(handler)
+    urls = ["https://slow.example.com/", "https://fast.example.com/"]
+
+    async def scenario():
+        started = asyncio.get_running_loop().time()
+        pages = await scraper.scrape_many(urls, deadline=0.2)
+        return pages, asyncio.get_running_loop().time() - started
+
+    (slow, fast), elapsed = asyncio.run(scenario())
+
+    assert elapsed < 2
+    assert slow == {
+        "url": "https://slow.example.com/",
+        "title": "Failed to fetch",
+        "description": "Deadline exceeded",
+    }
+    assert fast["title"] == "Example page"
+
+
+def test_http_errors_become_failed_pages():
+    scraper = _scraper(lambda request: httpx.Response(503))
+
+    page = asyncio.run(scraper.fetch("https://example.com/"))
+
+    assert page["title"] == "Failed to fetch"
+    assert "503" in page["description"]
@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+from app.service import bulk_ingestion_service
+from app.service.bulk_ingestion_service import (
+    BulkIngestion,
+    Manifest,
+    iter_directory_sources,
+)
+
+
+class Interrupted(BaseException):
+    """Stands in for Ctrl+C / SIGTERM: not caught as a document failure."""
+
+
+def _write_documents(directory, count: int = 3):
+    for i in range(count):
+        # Distinct text per document, ~3 chunks each
+        sentence = f"Document {i} talks about topic {i} in some detail. "
+        (directory / f"doc-{i}.txt").write_text(sentence * 50)
+
+
+def _ingest(sources, manifest=None, **options) -> dict:
+    options = {"parse_workers": 2, "parse_executor": "thread", **options}
+    return BulkIngestion(manifest, **options).run(sources)
+
+
+@pytest.fixture
+def embed_calls(monkeypatch):
+    calls = []
+    embed = bulk_ingestion_service.embed_documents
+
+    def recording_embed(documents):
+        calls.append([d.metadata["document_name"] for d in documents])
+        return embed(documents)
+
+    monkeypatch.setattr(bulk_ingestion_service, "embed_documents", recording_embed)
+    return calls
+
+
+def test_chunks_of_several_documents_share_embedding_batches(
+    tmp_path, empty_index, embed_calls
+):
+    _write_documents(tmp_path)
+    sources = list(iter_directory_sources(str(tmp_path)))
+
+    summary = _ingest(sources, embed_batch_size=4, upsert_batch_size=2)
+
+    assert summary["documents"] == 3
+    assert summary["failed_documents"] == 0
+    assert summary["chunks"] == sum(len(batch) for batch in embed_calls)
+    assert all(len(batch) <= 4 for batch in embed_calls)
+    assert any(len(set(batch)) > 1 for batch in embed_calls)
+    records = empty_index.list_indexed_documents()
+    assert sorted(records) == ["doc-0.txt", "doc-1.txt", "doc-2.txt"]
+    assert records["doc-1.txt"]["chunks"] == summary["chunks"] // 3
+
+
+def test_failed_documents_are_counted_and_recorded(tmp_path, empty_index):
+    _write_documents(tmp_path, count=2)
+    (tmp_path / "broken.pdf").write_bytes(b"not a pdf")
+    manifest = Manifest(str(tmp_path / "manifest.jsonl"))
+
+    summary = _ingest(list(iter_directory_sources(str(tmp_path))), manifest)
+    manifest.close()
+
+    assert (summary["documents"], summary["failed_documents"]) == (2, 1)
+    entries = [
+        json.loads(line)
+        for line in (tmp_path / "manifest.jsonl").read_text().splitlines()
+    ]
+    statuses = {entry["document_name"]: entry["status"] for entry in entries}
+    assert statuses == {
+        "broken.pdf": "failed",
+        "doc-0.txt": "completed",
+        "doc-1.txt": "completed",
+    }
+    assert "broken.pdf" not in empty_index.list_indexed_documents()
+
+
+def test_interrupted_run_resumes_from_the_manifest(
+    tmp_path, empty_index, embed_calls, monkeypatch
+):
+    documents = tmp_path / "documents"
+    documents.mkdir()
+    _write_documents(documents)
+    sources = list(iter_directory_sources(str(documents)))
+    manifest_path = str(tmp_path / "manifest.jsonl")
+
+    record = bulk_ingestion_service.record_indexed_document
+    recorded = []
+
+    def record_then_stop(name, *args, **kwargs):
+        if recorded:
+            raise Interrupted()
+        recorded.append(name)
+        return record(name, *args, **kwargs)
+
+    monkeypatch.setattr(
+        bulk_ingestion_service, "record_indexed_document", record_then_stop
+    )
+    manifest = Manifest(manifest_path)
+    with pytest.raises(Interrupted):
+        _ingest(sources, manifest, parse_workers=1, embed_batch_size=1)
+    manifest.close()
+    # The process died halfway through writing the next entry
+    with open(manifest_path, "a") as f:
+        f.write('{"document_name": "doc-')
+
+    monkeypatch.setattr(bulk_ingestion_service, "record_indexed_document", record)
+    embed_calls.clear()
+    manifest = Manifest(manifest_path)
+    summary = _ingest(sources, manifest)
+    manifest.close()
+
+    (finished,) = recorded
+    assert summary["skipped_documents"] == 1
+    assert summary["documents"] == 2
+    assert finished not in {name for batch in embed_calls for name in batch}
+    assert len(empty_index.list_indexed_documents()) == 3
+    # A third run finds nothing left to do
+    manifest = Manifest(manifest_path)
+    assert _ingest(sources, manifest)["skipped_documents"] == 3
+    manifest.close()
@@ -0,0 +1,76 @@
+from langchain_core.documents import Document
+
+from app.service.context_packer import pack_context
+
+# One token per word; the "\n\n" separator is free
+count_words = lambda text: len(text.split())  # noqa: E731
+
+# A page split into three chunks, each repeating the tail of the one before
+OVERLAP_1 = "the retention period starts at closing"
+OVERLAP_2 = "unless a hold is placed on the records"
+CHUNK_0 = f"Records must be kept for seven years and {OVERLAP_1}"
+CHUNK_1 = f"{OVERLAP_1} of the account, {OVERLAP_2}"
+CHUNK_2 = f"{OVERLAP_2} by the legal team."
+
+
+def _chunk(text: str, score: float, index: int = None, name: str = "policy.pdf"):
+    metadata = {"score": score, "document_name": name, "page": 1}
+    if index is not None:
+        metadata["chunk_index"] = index
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_overlap_between_neighbours_is_kept_once_in_reading_order():
+    # The middle chunk ranks first, so both neighbours are trimmed against it
+    documents = [
+        _chunk(CHUNK_2, 0.7, 2),
+        _chunk(CHUNK_1, 0.9, 1),
+        _chunk(CHUNK_0, 0.8, 0),
+    ]
+
+    packed = pack_context(documents, token_budget=100, count_tokens=count_words)
+
+    assert packed.text.split("\n\n") == [
+        "Records must be kept for seven years and",
+        CHUNK_1,
+        "by the legal team.",
+    ]
+    assert packed.overlap_chars_removed == len(OVERLAP_1) + len(OVERLAP_2)
+    assert (packed.chunks_used, packed.chunks_dropped) == (3, 0)
+    assert packed.tokens_used == count_words(packed.text)
+
+
+def test_chunks_that_do_not_fit_are_dropped():
+    documents = [
+        _chunk("one two three four five six", 0.9),
+        _chunk("seven eight nine ten eleven twelve thirteen", 0.8),
+        _chunk("fourteen fifteen", 0.7),
+        _chunk("sixteen seventeen eighteen", 0.6),
+    ]
+
+    packed = pack_context(documents, token_budget=10, count_tokens=count_words)
+
+    assert packed.text == "one two three four five six\n\nfourteen fifteen"
+    assert (packed.tokens_used, packed.token_budget) == (8, 10)
+    assert (packed.chunks_used, packed.chunks_dropped) == (2, 2)
+
+
+def test_documents_are_laid_out_best_ranked_first():
+    documents = [
+        _chunk("guide part two", 0.5, 4, name="guide.pdf"),
+        _chunk("policy part one", 0.4, 0),
+        _chunk("guide part one", 0.95, 3, name="guide.pdf"),
+        _chunk("policy part two", 0.9, 8),
+        _chunk("loose snippet", 0.6),
+    ]
+
+    packed = pack_context(documents, token_budget=100, count_tokens=count_words)
+
+    assert packed.text.split("\n\n") == [
+        "guide part one",
+        "guide part two",
+        "policy part one",
+        "policy part two",
+        "loose snippet",
+    ]
+    assert packed.overlap_chars_removed == 0
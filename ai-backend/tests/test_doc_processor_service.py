@@ -0,0 +1,152 @@
+import threading
+import uuid
+
+import pytest
+from langchain_core.documents import Document
+from qdrant_client.models import PointStruct
+
+from app.service import doc_processor_service
+
+
+class CountingClient:
+    def __init__(self, client):
+        self._client = client
+        self.created = 0
+
+    def create_collection(self, *args, **kwargs):
+        self.created += 1
+        return self._client.create_collection(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def test_concurrent_ensure_collection_creates_once_and_keeps_points(monkeypatch):
+    name = doc_processor_service.collection_name
+    real = doc_processor_service.client.get()
+    if real.collection_exists(name):
+        real.delete_collection(name)
+    counting = CountingClient(real)
+    monkeypatch.setattr(doc_processor_service, "client", counting)
+    monkeypatch.setattr(doc_processor_service, "_collection_ready", False)
+
+    threads = 8
+    barrier = threading.Barrier(threads)
+
+    def upsert(point_id: int):
+        barrier.wait()
+        doc_processor_service.ensure_collection(vector_size=4)
+        counting.upsert(
+            collection_name=name,
+            points=[PointStruct(id=point_id, vector=[1.0, 0.0, 0.0, 0.0])],
+        )
+
+    workers = [threading.Thread(target=upsert, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert counting.created == 1
+    assert real.count(name).count == threads
+
+
+def test_create_collection_tolerates_an_existing_collection():
+    client = doc_processor_service.client.get()
+    client.create_collection("tests_existing", vectors_config={})
+    doc_processor_service._create_collection("tests_existing", vectors_config={})
+    assert client.collection_exists("tests_existing")
+
+
+def _chunks(document_name: str, document_hash: str = "same-content"):
+    return [
+        Document(
+            page_content=f"shared chunk {i}",
+            metadata={
+                "document_name": document_name,
+                "document_hash": document_hash,
+                "chunk_index": i,
+            },
+        )
+        for i in range(3)
+    ]
+
+
+def _names_in_index() -> list:
+    points, _ = doc_processor_service.client.scroll(
+        doc_processor_service.collection_name, limit=100, with_payload=True
+    )
+    return sorted(point.payload["document_name"] for point in points)
+
+
+def _reset_collection():
+    client = doc_processor_service.client
+    if client.collection_exists(doc_processor_service.collection_name):
+        client.delete_collection(doc_processor_service.collection_name)
+    doc_processor_service._collection_ready = False
+
+
+def test_identical_documents_under_different_names_do_not_share_points():
+    _reset_collection()
+    for name in ("a.pdf", "b.pdf"):
+        chunks = _chunks(name)
+        doc_processor_service.store_embeddings(chunks, [[1.0, 0.0]] * len(chunks))
+    assert _names_in_index() == ["a.pdf"] * 3 + ["b.pdf"] * 3
+
+    doc_processor_service.delete_document_vectors("a.pdf")
+    assert _names_in_index() == ["b.pdf"] * 3
+
+
+def test_replacing_a_revision_drops_points_of_the_old_id_scheme():
+    _reset_collection()
+    chunks = _chunks("a.pdf")
+    doc_processor_service.ensure_collection(vector_size=2)
+    doc_processor_service.client.upsert(
+        doc_processor_service.collection_name,
+        points=[
+            PointStruct(
+                id=str(uuid.uuid5(doc_processor_service.POINT_ID_NAMESPACE, f"x:{i}")),
+                vector=[1.0, 0.0],
+                payload={"document_name": "a.pdf", "document_hash": "same-content"},
+            )
+            for i in range(3)
+        ],
+    )
+    doc_processor_service.store_embeddings(chunks, [[1.0, 0.0]] * len(chunks))
+
+    doc_processor_service.delete_document_vectors("a.pdf", keep_hash="same-content")
+
+    points, _ = doc_processor_service.client.scroll(
+        doc_processor_service.collection_name, limit=100
+    )
+    assert sorted(str(point.id) for point in points) == sorted(
+        doc_processor_service.point_id_for(chunk) for chunk in chunks
+    )
+
+
+def test_sparse_index_path_requires_a_collection_name(monkeypatch):
+    monkeypatch.delenv("SPARSE_INDEX_PATH", raising=False)
+    monkeypatch.setattr(doc_processor_service, "collection_name", None)
+    with pytest.raises(ValueError):
+        doc_processor_service._sparse_index_path()
+
+    monkeypatch.setattr(doc_processor_service, "collection_name", "docs")
+    assert doc_processor_service._sparse_index_path().endswith("docs_bm25.sqlite3")
+
+
+def test_document_records_require_a_collection_name(monkeypatch):
+    monkeypatch.setattr(doc_processor_service, "document_collection_name", None)
+    with pytest.raises(ValueError):
+        doc_processor_service.list_indexed_documents()
+    with pytest.raises(ValueError):
+        doc_processor_service.record_indexed_document("a.pdf", "hash", 1)
+
+
+def test_forgetting_a_document_without_a_record_is_a_no_op(empty_index):
+    empty_index.ensure_collection(vector_size=2)
+    empty_index.record_indexed_document("kept.pdf", "hash", 1)
+
+    empty_index.delete_document_vectors("never-indexed.pdf")
+    empty_index.delete_document_vectors("kept.pdf")
+
+    assert empty_index.list_indexed_documents() == {}
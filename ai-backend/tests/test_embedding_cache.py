@@ -0,0 +1,73 @@
+import itertools
+import types
+
+import numpy as np
+import pytest
+
+from app.service import embedding_cache
+from app.service.embedding_cache import EmbeddingCache
+
+
+class CountingModel:
+    """Encodes each text as [len(text), n] where n counts encode calls."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts):
+        self.encoded.extend(texts)
+        return np.array([[len(text), len(self.encoded)] for text in texts], "f4")
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    # A strictly increasing clock, so recency never ties
+    ticks = itertools.count(1)
+    monkeypatch.setattr(
+        embedding_cache, "time", types.SimpleNamespace(time=lambda: next(ticks))
+    )
+
+
+def _cache(tmp_path, model_id="model-a", max_entries=100) -> EmbeddingCache:
+    return EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), model_id, max_entries)
+
+
+def test_hits_and_misses_are_counted(tmp_path):
+    cache, model = _cache(tmp_path), CountingModel()
+
+    vectors, hits = cache.encode(model, ["alpha", "beta", "alpha"])
+    assert hits == 0
+    # The repeated text within one call is encoded once
+    assert model.encoded == ["alpha", "beta"]
+    assert np.array_equal(vectors[0], vectors[2])
+
+    # Texts differing only in whitespace share an entry
+    again, hits = cache.encode(model, ["beta", "  alpha ", "gamma"])
+    assert hits == 2
+    assert model.encoded == ["alpha", "beta", "gamma"]
+    assert np.array_equal(again[:2], vectors[[1, 0]])
+    assert cache.encode(model, [])[1] == 0
+
+
+def test_another_model_does_not_share_entries(tmp_path):
+    model = CountingModel()
+    _cache(tmp_path, "model-a").encode(model, ["alpha"])
+
+    # Same file, new model id: the stored vector belongs to the old model
+    _, hits = _cache(tmp_path, "model-b").encode(model, ["alpha"])
+
+    assert hits == 0
+    assert model.encoded == ["alpha", "alpha"]
+    assert _cache(tmp_path, "model-a").encode(model, ["alpha"])[1] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache, model = _cache(tmp_path, max_entries=3), CountingModel()
+    cache.encode(model, ["a", "b", "c"])
+    cache.encode(model, ["a"])  # "b" is now the least recently used
+
+    cache.encode(model, ["d"])
+    cache.encode(model, ["e"])
+
+    found = cache.get_many([cache.key(text) for text in "abcde"])
+    assert sorted(found) == sorted(cache.key(text) for text in "ade")
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from app.service.embedding_service import QueryEmbeddingService
+
+
+class SlowModel:
+    def __init__(self, delay: float = 0.0, fail_on: str = None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(list(texts))
+        time.sleep(self.delay)
+        if self.fail_on in texts:
+            raise RuntimeError("encode failed")
+        return np.array([[float(len(text)), 1.0] for text in texts])
+
+
+def test_identical_queries_share_one_batch_row():
+    model = SlowModel()
+    service = QueryEmbeddingService(model, window_ms=20)
+
+    async def scenario():
+        return await asyncio.gather(
+            service.aembed_query("same question"),
+            service.aembed_query("same question"),
+        )
+
+    first, second = asyncio.run(scenario())
+    assert first == second == [13.0, 1.0]
+    assert model.calls == [["same question"]]
+
+
+def test_cancelled_awaiter_does_not_stop_the_batcher():
+    service = QueryEmbeddingService(SlowModel(delay=0.1), window_ms=1)
+
+    async def scenario():
+        busy = asyncio.ensure_future(service.aembed_query("keeps the batcher busy"))
+        await asyncio.sleep(0.02)
+
+        # Cancelled while queued behind the running batch
+        queued = asyncio.ensure_future(service.aembed_query("cancelled while queued"))
+        await asyncio.sleep(0)
+        queued.cancel()
+        # Cancelled while its own batch is being encoded
+        running = asyncio.ensure_future(service.aembed_query("cancelled mid-encode"))
+        await asyncio.sleep(0.15)
+        running.cancel()
+
+        await busy
+        return await asyncio.wait_for(service.aembed_query("still answered"), 2)
+
+    assert asyncio.run(scenario()) == [14.0, 1.0]
+
+
+def test_failed_batch_does_not_stop_the_batcher():
+    service = QueryEmbeddingService(SlowModel(fail_on="boom"), window_ms=1)
+
+    with pytest.raises(RuntimeError):
+        service.embed_query("boom")
+    assert service.embed_query("fine") == [4.0, 1.0]
@@ -0,0 +1,83 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+from app.service import ingestion_service
+
+
+class CrashOnceJobs:
+    """Job table whose first write kills the worker process holding it."""
+
+    def __init__(self, marker: str, jobs: dict):
+        self.marker = marker
+        self.jobs = jobs
+
+    def __getitem__(self, job_id):
+        return self.jobs[job_id]
+
+    def __setitem__(self, job_id, job):
+        if not os.path.exists(self.marker):
+            open(self.marker, "w").close()
+            os._exit(1)
+        self.jobs[job_id] = job
+
+
+def _job(job_id: str, status: str = "queued", finished_at: datetime = None) -> dict:
+    return {
+        "job_id": job_id,
+        "filename": f"{job_id}.pdf",
+        "status": status,
+        "finished_at": finished_at.isoformat() if finished_at else None,
+    }
+
+
+def test_crashed_worker_pool_is_replaced_and_the_job_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingestion_service, "INGESTION_EXECUTOR", "process")
+    monkeypatch.setattr(ingestion_service, "INGESTION_WORKERS", 1)
+    monkeypatch.setattr(ingestion_service, "INGESTION_CRASH_RETRIES", 1)
+    jobs = CrashOnceJobs(str(tmp_path / "crashed"), {"job": _job("job")})
+    monkeypatch.setattr(ingestion_service, "_jobs", jobs)
+    original = ingestion_service._new_pool()
+    monkeypatch.setattr(ingestion_service, "_pool", original)
+
+    # A missing file fails inside the stages, i.e. without another crash
+    job_args = (str(tmp_path / "missing.pdf"), "job.pdf", None, "bucket")
+    try:
+        job, _ = asyncio.run(ingestion_service._run_job("job", job_args))
+    finally:
+        ingestion_service._pool.shutdown(wait=True)
+
+    assert os.path.exists(tmp_path / "crashed")
+    assert ingestion_service._pool is not original
+    assert job["status"] == "failed"
+    assert "missing.pdf" in job["error"]
+
+
+def test_finished_jobs_expire_after_the_ttl(monkeypatch):
+    now = datetime.now()
+    jobs = {
+        "old": _job("old", "completed", now - timedelta(hours=2)),
+        "recent": _job("recent", "failed", now - timedelta(minutes=1)),
+        "running": _job("running", "running"),
+    }
+    monkeypatch.setattr(ingestion_service, "_jobs", jobs)
+    monkeypatch.setattr(ingestion_service, "INGESTION_JOB_TTL_SECONDS", 3600)
+
+    ingestion_service._prune_jobs()
+
+    assert set(jobs) == {"recent", "running"}
+
+
+def test_oldest_finished_jobs_are_evicted_beyond_the_cap(monkeypatch):
+    now = datetime.now()
+    jobs = {
+        f"done-{i}": _job(f"done-{i}", "completed", now - timedelta(seconds=10 - i))
+        for i in range(5)
+    }
+    jobs["queued"] = _job("queued")
+    monkeypatch.setattr(ingestion_service, "_jobs", jobs)
+    monkeypatch.setattr(ingestion_service, "INGESTION_MAX_FINISHED_JOBS", 2)
+
+    ingestion_service._prune_jobs()
+
+    assert set(jobs) == {"done-3", "done-4", "queued"}
@@ -0,0 +1,17 @@
+import numpy as np
+
+from app.route.langchain_ai_chat import plain_chat_context_key
+from app.service.answer_cache import SemanticAnswerCache
+
+
+def test_plain_chat_answers_are_not_shared_across_models_or_histories():
+    cache = SemanticAnswerCache(similarity=0.95, ttl=60, max_entries=8)
+    vector = np.array([1.0, 0.0])
+    cache.store(vector, plain_chat_context_key("gemma3:4b", []), "gemma answer")
+
+    assert cache.lookup(vector, plain_chat_context_key("gemma3:4b", [])) == (
+        "gemma answer"
+    )
+    assert cache.lookup(vector, plain_chat_context_key("llama3.1:8b", [])) is None
+    history = [{"role": "user", "content": "Answer in French"}]
+    assert cache.lookup(vector, plain_chat_context_key("gemma3:4b", history)) is None
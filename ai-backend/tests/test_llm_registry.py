@@ -0,0 +1,151 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.llm_registry import ConcurrencyLimiter, LLMRegistry, ModelBusyError
+from app.main import app
+from benchmarks.stubs import FakeOllamaHandler, StubServer
+
+MODEL = "tiny:1b"
+
+
+@pytest.fixture
+def ollama():
+    server = StubServer(
+        FakeOllamaHandler, tokens=4, tokens_per_second=1000, first_token_delay=0
+    ).start()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def registry(ollama):
+    return LLMRegistry(hosts=[ollama.url], timeout=10)
+
+
+async def _enter(limiter: ConcurrencyLimiter):
+    async with limiter.aslot():
+        await asyncio.sleep(0)
+
+
+def test_queued_requests_enter_in_arrival_order():
+    limiter = ConcurrencyLimiter(MODEL, max_concurrency=1, max_queue=8)
+    entered = []
+
+    async def request(name: str):
+        async with limiter.aslot():
+            entered.append(name)
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        tasks = []
+        for name in "abcde":
+            tasks.append(asyncio.create_task(request(name)))
+            await asyncio.sleep(0)  # queue them one after another
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+    assert entered == list("abcde")
+    stats = limiter.stats()
+    assert (stats["active"], stats["queued"], stats["completed"]) == (0, 0, 5)
+
+
+def test_requests_beyond_the_queue_are_rejected():
+    limiter = ConcurrencyLimiter(MODEL, max_concurrency=1, max_queue=1)
+
+    async def scenario():
+        async with limiter.aslot():
+            queued = asyncio.create_task(_enter(limiter))
+            await asyncio.sleep(0)
+            with pytest.raises(ModelBusyError, match="1 requests queued"):
+                await _enter(limiter)
+        await queued
+
+    asyncio.run(scenario())
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_waiting_past_the_queue_timeout_raises_model_busy():
+    limiter = ConcurrencyLimiter(
+        MODEL, max_concurrency=1, max_queue=4, queue_timeout=0.05
+    )
+
+    async def scenario():
+        async with limiter.aslot():
+            with pytest.raises(ModelBusyError, match="timed out"):
+                await _enter(limiter)
+        # The slot freed above is not handed to the request that gave up
+        await asyncio.wait_for(_enter(limiter), 1)
+
+    asyncio.run(scenario())
+    stats = limiter.stats()
+    assert (stats["active"], stats["queued"], stats["rejected"]) == (0, 0, 1)
+
+
+def test_cancelled_queued_request_gives_up_its_place():
+    limiter = ConcurrencyLimiter(MODEL, max_concurrency=1, max_queue=4)
+
+    async def scenario():
+        async with limiter.aslot():
+            cancelled = asyncio.create_task(_enter(limiter))
+            await asyncio.sleep(0)
+            assert limiter.stats()["queued"] == 1
+            cancelled.cancel()
+            await asyncio.gather(cancelled, return_exceptions=True)
+            assert limiter.stats()["queued"] == 0
+        await asyncio.wait_for(_enter(limiter), 1)
+
+    asyncio.run(scenario())
+    assert limiter.stats()["active"] == 0
+
+
+def test_model_busy_is_reported_as_503():
+    def busy():
+        raise ModelBusyError(MODEL, "8 requests queued")
+
+    app.add_api_route("/tests/busy", busy)
+    try:
+        response = TestClient(app).get("/tests/busy")
+    finally:
+        app.router.routes.pop()
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
+    assert response.json() == {
+        "status": 503,
+        "message": f"Model '{MODEL}' is busy: 8 requests queued",
+    }
+
+
+def test_models_and_limiters_are_shared(registry):
+    model = registry.get_chat_model(MODEL)
+
+    assert registry.get_chat_model(MODEL) is model
+    tuned = registry.get_chat_model(MODEL, temperature=0)
+    assert tuned is not model
+    # Every variant of a model waits in the same line
+    assert tuned._limiter is model._limiter is registry.limiter(MODEL)
+
+
+def test_chat_is_served_through_the_limiter(registry):
+    model = registry.get_chat_model(MODEL)
+
+    reply = model.invoke("hi")
+    chunks = [chunk.content for chunk in model.stream("hi")]
+
+    assert reply.content == " latency throughput vector index"
+    assert "".join(chunks) == reply.content
+    stats = registry.stats()
+    assert stats["models"][MODEL]["completed"] == 2
+    assert stats["models"][MODEL]["active"] == 0
+
+
+def test_warm_up_loads_the_models(ollama, registry):
+    asyncio.run(registry.warm_up([MODEL]))
+
+    assert ollama.handler.state["loaded"] == {MODEL}
+    (node,) = registry.balancer.nodes
+    assert node.loaded_models == {MODEL}
+    assert node.outstanding == 0
@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.core.metrics import (
+    observe_stages,
+    record_stages,
+    span,
+    timed_iterator,
+)
+from app.main import app
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def _stage(stage: str, suffix: str = "count") -> float:
+    return _sample(f"rag_stage_duration_seconds_{suffix}", stage=stage)
+
+
+def _requests(route: str, status: str = "200", suffix: str = "count") -> float:
+    return _sample(
+        f"http_request_duration_seconds_{suffix}",
+        method="GET",
+        route=route,
+        status=status,
+    )
+
+
+@pytest.fixture
+def test_routes():
+    """Routes added by a test are removed again afterwards."""
+    count = len(app.router.routes)
+    yield app
+    del app.router.routes[count:]
+
+
+def test_spans_are_recorded_in_the_stage_histogram():
+    count, total = _stage("tests_span"), _stage("tests_span", "sum")
+
+    with span("tests_span"):
+        time.sleep(0.02)
+    with pytest.raises(ValueError):
+        with span("tests_span"):
+            raise ValueError("failed stages are timed too")
+
+    assert _stage("tests_span") == count + 2
+    assert _stage("tests_span", "sum") - total >= 0.02
+
+
+def test_worker_timings_are_collected_and_replayed():
+    before = _stage("tests_worker")
+
+    # What an ingestion worker does: record, including from a helper thread
+    with record_stages() as timings:
+        with span("tests_worker"):
+            pass
+        items = timed_iterator(iter([1, 2]), "tests_worker")
+        consumer = threading.Thread(target=list, args=(items,))
+        consumer.start()
+        consumer.join()
+    with span("tests_worker"):
+        pass  # outside the context: not shipped back
+
+    # One span, plus the iterator's two items and its final StopIteration
+    assert [stage for stage, _ in timings] == ["tests_worker"] * 4
+    assert all(seconds >= 0 for _, seconds in timings)
+    # The API process replays them into the registry /metrics exports
+    observe_stages(timings)
+    assert _stage("tests_worker") == before + 5 + len(timings)
+
+
+def test_requests_are_labelled_with_the_route_template(test_routes):
+    @app.get("/tests/items/{item_id}")
+    def item(item_id: int):
+        return {"status": 200, "data": item_id}
+
+    template = "/tests/items/{item_id}"
+    ok, invalid = _requests(template), _requests(template, "422")
+    unmatched = _requests("unmatched", "404")
+    client = TestClient(app)
+
+    for item_id in ("1", "2", "3", "x"):
+        client.get(f"/tests/items/{item_id}")
+    client.get("/tests/no-such-route")
+
+    assert _requests(template) == ok + 3
+    assert _requests(template, "422") == invalid + 1
+    assert _requests("unmatched", "404") == unmatched + 1
+    exported = client.get("/metrics").text
+    assert 'route="/tests/items/{item_id}"' in exported
+    assert 'route="/tests/items/1"' not in exported
+
+
+def test_streaming_requests_are_timed_until_the_last_chunk(test_routes):
+    @app.get("/tests/stream")
+    def stream():
+        def body():
+            for _ in range(3):
+                time.sleep(0.05)
+                yield b"chunk\n"
+
+        return StreamingResponse(body())
+
+    total = _requests("/tests/stream", suffix="sum")
+
+    assert TestClient(app).get("/tests/stream").text == "chunk\n" * 3
+    assert _requests("/tests/stream", suffix="sum") - total >= 0.15
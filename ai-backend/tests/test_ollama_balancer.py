@@ -0,0 +1,150 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.core.llm_registry import LLMRegistry
+from app.core.ollama_balancer import OllamaBalancer
+
+NODE_A = "http://node-a:11434"
+NODE_B = "http://node-b:11434"
+MODEL = "tiny:1b"
+
+
+def _chat_line(content: str, done: bool = False) -> bytes:
+    line = {
+        "model": MODEL,
+        "created_at": "2024-01-01T00:00:00Z",
+        "message": {"role": "assistant", "content": content},
+        "done": done,
+    }
+    if done:
+        line["done_reason"] = "stop"
+    return json.dumps(line).encode() + b"\n"
+
+
+class BrokenStream(httpx.SyncByteStream):
+    """Streams a first chunk, then loses the connection."""
+
+    def __iter__(self):
+        yield _chat_line("partial ")
+        raise httpx.ReadError("connection lost")
+
+
+class StubOllama:
+    """MockTransport handler standing in for a few Ollama servers."""
+
+    def __init__(self):
+        self.down = set()
+        self.chat_fails = set()
+        self.chat_breaks = set()
+        self.loaded = {NODE_A: [], NODE_B: []}
+        self.chats = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        node = f"{request.url.scheme}://{request.url.host}:{request.url.port}"
+        if node in self.down:
+            raise httpx.ConnectError("connection refused", request=request)
+        if request.url.path == "/api/ps":
+            models = [{"name": name, "model": name} for name in self.loaded[node]]
+            return httpx.Response(200, json={"models": models})
+        if request.url.path == "/api/chat":
+            self.chats.append(node)
+            if node in self.chat_fails:
+                return httpx.Response(500, json={"error": "out of memory"})
+            if node in self.chat_breaks:
+                return httpx.Response(200, stream=BrokenStream())
+            body = _chat_line(f"hello from {node}") + _chat_line("", done=True)
+            return httpx.Response(200, content=body)
+        return httpx.Response(404, json={"error": "not found"})
+
+
+@pytest.fixture
+def ollama():
+    return StubOllama()
+
+
+@pytest.fixture
+def balancer(ollama):
+    return OllamaBalancer(
+        [NODE_A, NODE_B],
+        {"transport": httpx.MockTransport(ollama)},
+        eject_after=2,
+        cold_penalty=2,
+    )
+
+
+def _node(balancer, host):
+    return next(node for node in balancer.nodes if node.host == host)
+
+
+def test_pick_prefers_the_least_outstanding_node(balancer):
+    a, b = balancer.nodes
+    a.outstanding = 3
+    assert balancer.pick(MODEL) is b
+
+    # Picking counts as outstanding until the attempt finishes
+    assert b.outstanding == 1
+    b.outstanding = 5
+    assert balancer.pick(MODEL) is a
+
+
+def test_nodes_with_the_model_loaded_win_within_the_penalty(balancer):
+    warm, cold = balancer.nodes
+    warm.loaded_models = {MODEL}
+    warm.outstanding = 1
+    assert balancer.pick(MODEL) is warm
+
+    warm.outstanding = 3
+    assert balancer.pick(MODEL) is cold
+
+
+def test_failing_nodes_are_ejected_and_readmitted_by_health_checks(ollama, balancer):
+    a, b = balancer.nodes
+    ollama.down.add(NODE_B)
+    ollama.loaded[NODE_A] = [MODEL]
+
+    asyncio.run(balancer.check_all())
+    assert b.healthy  # one failure is not enough
+    asyncio.run(balancer.check_all())
+    assert not b.healthy
+    assert a.loaded_models == {MODEL}
+    b.outstanding = -10  # cheaper on paper, but out of rotation
+    assert balancer.pick(MODEL) is a
+
+    ollama.down.clear()
+    ollama.loaded[NODE_B] = [MODEL]
+    asyncio.run(balancer.check_all())
+    assert b.healthy
+    assert b.failures == 0
+    assert b.loaded_models == {MODEL}
+
+
+def _chat_model(balancer):
+    registry = LLMRegistry(hosts=[NODE_A, NODE_B])
+    registry.balancer = balancer
+    return registry.get_chat_model(MODEL)
+
+
+def test_request_failing_before_the_first_token_is_retried(ollama, balancer):
+    _node(balancer, NODE_A).loaded_models = {MODEL}
+    ollama.chat_fails.add(NODE_A)
+
+    reply = _chat_model(balancer).invoke("hi")
+
+    assert ollama.chats == [NODE_A, NODE_B]
+    assert reply.content == f"hello from {NODE_B}"
+    assert _node(balancer, NODE_A).errors == 1
+    assert all(node.outstanding == 0 for node in balancer.nodes)
+
+
+def test_request_failing_after_the_first_token_is_not_retried(ollama, balancer):
+    _node(balancer, NODE_A).loaded_models = {MODEL}
+    ollama.chat_breaks.add(NODE_A)
+
+    with pytest.raises(httpx.ReadError):
+        list(_chat_model(balancer).stream("hi"))
+
+    assert ollama.chats == [NODE_A]
+    assert all(node.outstanding == 0 for node in balancer.nodes)
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import httpx
+
+from app.core.async_scraper import AsyncScraper
+from app.core.page_cache import PageCache, ttl_from_headers
+
+URL = "https://example.com/article"
+FIELDS = {"title": "Article", "description": "Summary"}
+HTML = (
+    "<html><head><title>Article</title>"
+    '<meta name="description" content="Summary"></head></html>'
+)
+
+
+def _cache(tmp_path, **kwargs) -> PageCache:
+    return PageCache(str(tmp_path / "pages.sqlite3"), **kwargs)
+
+
+def test_cache_control_policies():
+    assert ttl_from_headers({}, default=60) == 60
+    assert ttl_from_headers({"cache-control": "public, max-age=120"}) == 120
+    assert ttl_from_headers({"cache-control": "max-age=0"}) == 0
+    assert ttl_from_headers({"cache-control": "no-cache"}) == 0
+    assert ttl_from_headers({"cache-control": "no-store, max-age=60"}) is None
+
+
+def test_entries_go_stale_after_the_ttl(tmp_path):
+    cache = _cache(tmp_path, ttl=0.05)
+    cache.put(URL, FIELDS, {"etag": '"v1"'}, 100, 10.0)
+
+    page = cache.get(URL)
+    assert page.fresh
+    assert page.fields == FIELDS
+    time.sleep(0.1)
+    page = cache.get(URL)
+    assert not page.fresh
+    assert page.validators() == {"If-None-Match": '"v1"'}
+
+
+def test_no_store_pages_are_never_stored(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put(URL, FIELDS, {"etag": '"v1"'}, 100, 10.0)
+
+    headers = {"cache-control": "no-store", "etag": '"v2"'}
+    cache.put(URL, {"title": "Private"}, headers, 100, 10.0)
+
+    assert cache.get(URL) is None
+
+
+def test_no_cache_pages_are_stored_but_always_revalidated(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put(URL, FIELDS, {"cache-control": "no-cache", "etag": '"v1"'}, 100, 10.0)
+    cache.put("https://example.com/other", FIELDS, {"cache-control": "no-cache"}, 1, 1)
+
+    assert not cache.get(URL).fresh
+    # Without a validator such a page could never be reused
+    assert cache.get("https://example.com/other") is None
+
+
+def test_not_modified_response_refreshes_the_entry(tmp_path):
+    cache = _cache(tmp_path)
+    requests = []
+
+    def handler(request):
+        requests.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"cache-control": "max-age=60"})
+        headers = {"etag": '"v1"', "cache-control": "no-cache"}
+        return httpx.Response(200, headers=headers, text=HTML)
+
+    scraper = AsyncScraper(transport=httpx.MockTransport(handler), cache=cache)
+
+    async def scenario():
+        return [await scraper.fetch(URL) for _ in range(3)]
+
+    pages = asyncio.run(scenario())
+
+    assert all(page == {"url": URL, **FIELDS} for page in pages)
+    # Fetched, revalidated with a 304, then served fresh without a request
+    assert requests == [None, '"v1"']
+    assert cache.get(URL).fresh
+    stats = cache.stats()
+    assert (stats["misses"], stats["revalidated"], stats["hits"]) == (1, 1, 1)
+
+
+def test_least_recently_used_pages_are_evicted(tmp_path):
+    page = {"title": "x" * 100}
+    # 113 bytes each: a fourth page overflows, and dropping one is enough
+    cache = _cache(tmp_path, max_bytes=400)
+    for name in ("a", "b", "c"):
+        cache.put(f"https://example.com/{name}", page, {}, 100, 1.0)
+    cache.get("https://example.com/a")  # "b" is now the least recently used
+
+    cache.put("https://example.com/d", page, {}, 100, 1.0)
+
+    assert cache.get("https://example.com/b") is None
+    for name in ("a", "c", "d"):
+        assert cache.get(f"https://example.com/{name}") is not None
+    assert cache.stats()["evicted"] == 1
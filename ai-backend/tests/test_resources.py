@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import resources
+from app.core.resources import LazyResource
+from app.main import app
+
+
+class Factory:
+    def __init__(self, delay: float = 0.0, failures: int = 0):
+        self.delay = delay
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.calls <= self.failures:
+            raise RuntimeError("backend unavailable")
+        return {"built": self.calls}
+
+
+def test_concurrent_first_use_builds_once():
+    factory = Factory(delay=0.1)
+    resource = LazyResource("tests_concurrent", factory)
+    threads = 8
+    barrier = threading.Barrier(threads)
+    values = []
+
+    def use():
+        barrier.wait()
+        values.append(resource.get())
+
+    workers = [threading.Thread(target=use) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert factory.calls == 1
+    assert all(value is values[0] for value in values)
+    assert resource.is_loaded
+
+
+def test_failed_build_is_retried_on_next_use():
+    resource = LazyResource("tests_flaky", Factory(failures=1))
+
+    with pytest.raises(RuntimeError):
+        resource.get()
+    assert resource.resource_status()["error"] == "backend unavailable"
+    assert not resource.is_loaded
+
+    # Attribute access builds on demand too
+    assert resource.copy() == {"built": 2}
+    assert resource.resource_status()["error"] is None
+
+
+def test_ready_endpoint_flips_once_ready_resources_load(monkeypatch):
+    factory = Factory(failures=1)
+    monkeypatch.setitem(
+        resources._resources, "embed_model", LazyResource("embed_model", factory)
+    )
+    client = TestClient(app)
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["data"]["resources"]["embed_model"]["loaded"] is False
+
+    assert resources.preload("embed_model") == ["embed_model"]
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert (
+        response.json()["data"]["resources"]["embed_model"]["error"]
+        == "backend unavailable"
+    )
+
+    assert resources.preload("embed_model") == []
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["data"]["ready"] is True
+
+
+def test_preloading_before_fork_only_builds_fork_safe_resources(monkeypatch):
+    weights = LazyResource("tests_weights", Factory(), fork_safe=True)
+    client = LazyResource("tests_client", Factory())
+    monkeypatch.setattr(
+        resources, "_resources", {"tests_weights": weights, "tests_client": client}
+    )
+
+    assert resources.preload("all", before_fork=True) == []
+    assert resources.preload("tests_client", before_fork=True) == []
+    assert weights.is_loaded
+    assert not client.is_loaded
+
+    # Workers preload whatever they are told to
+    assert resources.preload("all") == []
+    assert client.is_loaded
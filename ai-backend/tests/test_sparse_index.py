@@ -0,0 +1,112 @@
+import math
+
+import pytest
+from qdrant_client.models import Record, ScoredPoint
+
+from app.service.doc_processor_service import _fuse_results
+from app.service.sparse_index import SparseIndex, reciprocal_rank_fusion, tokenize
+
+CHUNKS = {
+    "p1": ("act.pdf", "h1", "Section 303 of the act covers retention of records."),
+    "p2": ("act.pdf", "h1", "Records are retained for seven years by the office."),
+    "p3": ("faq.pdf", "h2", "How long do we keep records? Ask the records office."),
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SparseIndex(str(tmp_path / "sparse.sqlite3"))
+    index.add_documents(
+        (point_id, *entry) for point_id, entry in sorted(CHUNKS.items())
+    )
+    return index
+
+
+def _bm25(index, tf, length, df, doc_count, avg_length) -> float:
+    idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+    norm = index.k1 * (1 - index.b + index.b * length / avg_length)
+    return idf * tf * (index.k1 + 1) / (tf + norm)
+
+
+def test_tokens_keep_numbers_and_drop_stopwords():
+    assert tokenize("Section 303 of the Act") == ["section", "303", "act"]
+
+
+def test_search_scores_with_bm25(index):
+    lengths = {pid: len(tokenize(text)) for pid, (_, _, text) in CHUNKS.items()}
+    avg_length = sum(lengths.values()) / 3
+
+    hits = dict(index.search("records office", k=10))
+
+    # "records" is in every chunk, "office" in two; p3 repeats "records" but
+    # is longer, so the shorter p2 still ranks first
+    expected = {
+        pid: _bm25(index, text.lower().count("records"), lengths[pid], 3, 3, avg_length)
+        + (_bm25(index, 1, lengths[pid], 2, 3, avg_length) if "office" in text else 0)
+        for pid, (_, _, text) in CHUNKS.items()
+    }
+    assert hits == pytest.approx(expected)
+    assert max(hits, key=hits.get) == "p2"
+    assert index.search("the of", k=10) == []
+    assert index.search("records", k=0) == []
+
+
+def test_corpus_stats_follow_adds_and_deletes(index):
+    assert index.add_documents([("p1", "act.pdf", "h1", "already indexed")]) == 0
+    assert index._stats() == (3, sum(len(tokenize(t)) for _, _, t in CHUNKS.values()))
+
+    # A new revision of act.pdf replaces the old one
+    index.add_documents([("p4", "act.pdf", "h9", "Section 303 was repealed.")])
+    assert index.delete_document("act.pdf", keep_hash="h9") == 2
+
+    faq_length = len(tokenize(CHUNKS["p3"][2]))
+    assert index._stats() == (2, faq_length + 3)
+    assert [pid for pid, _ in index.search("section 303 records", k=10)] == [
+        "p4",
+        "p3",
+    ]
+    # With one document holding "section", its idf reflects the smaller corpus
+    ((_, score),) = index.search("section", k=10)
+    assert score == pytest.approx(_bm25(index, 1, 3, 1, 2, (faq_length + 3) / 2))
+
+    index.delete_document("act.pdf")
+    index.delete_document("faq.pdf")
+    assert index.is_empty()
+    assert index._stats() == (0, 0)
+    assert index.search("records", k=10) == []
+
+
+def test_reciprocal_rank_fusion():
+    fused = dict(reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60))
+
+    assert fused == pytest.approx(
+        {"a": 1 / 61 + 1 / 62, "b": 1 / 62, "c": 1 / 63 + 1 / 61}
+    )
+    assert [pid for pid, _ in reciprocal_rank_fusion([["a", "b"], ["b"]])] == [
+        "b",
+        "a",
+    ]
+
+
+def test_exact_term_missed_by_dense_retrieval_is_fused_in(index):
+    def payload(pid):
+        name, document_hash, text = CHUNKS[pid]
+        return {"page_content": text, "document_name": name}
+
+    # Dense retrieval finds the paraphrases but not the section number
+    dense_hits = [
+        ScoredPoint(id=pid, version=0, score=score, payload=payload(pid))
+        for pid, score in (("p3", 0.82), ("p2", 0.8))
+    ]
+    sparse_hits = index.search("what does section 303 say", k=10)
+    assert [pid for pid, _ in sparse_hits] == ["p1"]
+    sparse_points = [Record(id="p1", payload=payload("p1"))]
+
+    results = _fuse_results(dense_hits, sparse_hits, sparse_points, top_k=3)
+
+    assert [doc.metadata["point_id"] for doc in results] == ["p3", "p1", "p2"]
+    section = results[1]
+    assert section.page_content.startswith("Section 303")
+    assert section.metadata["dense_score"] is None
+    assert section.metadata["sparse_score"] == sparse_hits[0][1]
+    assert section.metadata["score"] == pytest.approx(1 / 61)
@@ -0,0 +1,200 @@
+import asyncio
+import time
+
+import orjson
+import pytest
+from langchain_core.messages import AIMessageChunk
+
+from app.core.streaming import FrameEncoder, acoalesce, coalesce
+from app.core.util import astream_generator, stream_generator
+
+FORMATS = ["ndjson", "sse"]
+
+
+def decode(frame: bytes, fmt: str) -> dict:
+    """Parse one frame the way the frontend does, checking its delimiters."""
+    if fmt == "sse":
+        assert frame.startswith(b"data: ") and frame.endswith(b"\n\n")
+        payload = frame[len(b"data: ") : -2]
+    else:
+        assert frame.endswith(b"\n")
+        payload = frame[:-1]
+    assert b"\n" not in payload
+    return orjson.loads(payload)
+
+
+class FakeLLM:
+    model = "tiny:1b"
+
+    def __init__(self, tokens, fail_after: int = None):
+        self.tokens = tokens
+        self.fail_after = fail_after
+
+    def _chunks(self):
+        for i, token in enumerate(self.tokens):
+            if i == self.fail_after:
+                raise RuntimeError("model crashed")
+            yield AIMessageChunk(content=token)
+
+    def stream(self, messages):
+        yield from self._chunks()
+
+    async def astream(self, messages):
+        for chunk in self._chunks():
+            await asyncio.sleep(0)
+            yield chunk
+
+
+async def _collect(frames) -> list:
+    return [frame async for frame in frames]
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_frames_round_trip_through_json(fmt):
+    encoder = FrameEncoder("tiny:1b", fmt)
+    token = 'He said "hi"\n\tand left 🚀'
+
+    assistant = decode(encoder.assistant(token), fmt)
+    done = decode(encoder.done(), fmt)
+    error = decode(encoder.error(RuntimeError("boom")), fmt)
+    event = decode(encoder.event("tool_call", tool="search", args={"q": 1}), fmt)
+
+    assert assistant == {
+        "role": "assistant",
+        "created_at": encoder.created_at,
+        "done": False,
+        "model": "tiny:1b",
+        "response": token,
+    }
+    assert done == {**assistant, "done": True, "response": ""}
+    assert error == {"error": "boom", "done": True}
+    assert event["event"] == "tool_call"
+    assert (event["tool"], event["args"], event["done"]) == ("search", {"q": 1}, False)
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_stream_generator_ends_with_a_done_frame(fmt):
+    frames = list(stream_generator(FakeLLM(["Hel", "lo", ""]), [], fmt=fmt))
+
+    decoded = [decode(frame, fmt) for frame in frames]
+    assert [frame["response"] for frame in decoded] == ["Hel", "lo", ""]
+    assert [frame["done"] for frame in decoded] == [False, False, True]
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_stream_errors_end_with_an_error_frame(fmt):
+    llm = FakeLLM(["Hel", "lo"], fail_after=1)
+
+    for frames in (
+        list(stream_generator(llm, [], fmt=fmt)),
+        asyncio.run(_collect(astream_generator(llm, [], fmt=fmt))),
+    ):
+        decoded = [decode(frame, fmt) for frame in frames]
+        assert decoded[0]["response"] == "Hel"
+        assert decoded[-1] == {"error": "model crashed", "done": True}
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_astream_generator_reports_the_full_answer(fmt):
+    answers = []
+    frames = asyncio.run(
+        _collect(
+            astream_generator(
+                FakeLLM(["a", "b", "c"]), [], on_complete=answers.append, fmt=fmt
+            )
+        )
+    )
+
+    decoded = [decode(frame, fmt) for frame in frames]
+    assert "".join(frame["response"] for frame in decoded) == "abc"
+    assert decoded[-1]["done"] is True
+    assert answers == ["abc"]
+
+
+def test_coalesce_flushes_by_size():
+    pieces = ["a", "bb", "cc", "d", "e"]
+
+    assert list(coalesce(pieces, window_ms=0, max_chars=3)) == ["a", "bbcc", "de"]
+    # Disabled: every token is its own frame
+    assert list(coalesce(pieces, window_ms=0, max_chars=0)) == pieces
+
+
+def test_coalesce_flushes_by_window():
+    def slow_pieces():
+        for piece in ["a", "b", "c", "d"]:
+            yield piece
+            time.sleep(0.05)
+
+    # "b" opens a 75 ms window that "c" arrives within and "d" after
+    assert list(coalesce(slow_pieces(), window_ms=75)) == ["a", "bcd"]
+    assert list(coalesce(slow_pieces(), window_ms=75, max_chars=2)) == [
+        "a",
+        "bc",
+        "d",
+    ]
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_acoalesce_flushes_by_size(fmt):
+    async def pieces():
+        for piece in ["a", "bb", "cc", "d", "e"]:
+            yield piece
+
+    async def scenario():
+        encoder = FrameEncoder(fmt=fmt)
+        return [
+            encoder.assistant(text)
+            async for text in acoalesce(pieces(), window_ms=0, max_chars=3)
+        ]
+
+    frames = asyncio.run(scenario())
+    assert [decode(f, fmt)["response"] for f in frames] == ["a", "bbcc", "de"]
+
+
+def test_acoalesce_flushes_an_expired_window_without_a_new_token():
+    async def pieces():
+        yield "a"
+        yield "b"
+        yield "c"
+        await asyncio.sleep(0.3)
+        yield "d"
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        return [
+            (text, loop.time() - started)
+            async for text in acoalesce(pieces(), window_ms=50, max_chars=0)
+        ]
+
+    (first, _), (middle, flushed_at), (last, _) = asyncio.run(scenario())
+
+    assert (first, middle, last) == ("a", "bc", "d")
+    # Flushed by the timer, well before "d" arrives
+    assert flushed_at < 0.2
+
+
+def test_acoalesce_cancels_the_upstream_read_when_closed_early():
+    state = {}
+
+    async def pieces():
+        try:
+            yield "a"
+            await asyncio.sleep(10)
+            yield "never"
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+        finally:
+            state["closed"] = True
+
+    async def scenario():
+        frames = acoalesce(pieces(), window_ms=50, max_chars=10)
+        assert await frames.__anext__() == "a"
+        # The client goes away while the next token is being awaited
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(frames.__anext__(), 0.05)
+        await frames.aclose()
+
+    asyncio.run(asyncio.wait_for(scenario(), 2))
+    assert state == {"cancelled": True, "closed": True}
@@ -0,0 +1,152 @@
+import functools
+import hashlib
+import shutil
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import pytest
+
+from app.service import bulk_ingestion_service, sync_service
+
+BUCKET = "documents"
+
+
+@dataclass
+class FakeObject:
+    object_name: str
+    etag: str
+    last_modified: datetime
+
+
+class FakeBucket:
+    """The listing and download calls of the MinIO client, backed by files."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.objects = {}
+
+    def put(self, name: str, text: str):
+        path = self.directory / name
+        path.write_text(text * 50)
+        etag = hashlib.md5(path.read_bytes()).hexdigest()
+        modified = datetime.now(timezone.utc)
+        self.objects[name] = (FakeObject(name, etag, modified), path)
+
+    def remove(self, name: str):
+        self.objects.pop(name)
+
+    def list_objects(self, bucket, prefix="", recursive=False):
+        assert bucket == BUCKET
+        return [obj for name, (obj, _) in sorted(self.objects.items())]
+
+    def fget_object(self, bucket, object_name, file_path):
+        shutil.copyfile(self.objects[object_name][1], file_path)
+
+
+@pytest.fixture
+def bucket(tmp_path, monkeypatch, empty_index):
+    fake = FakeBucket(tmp_path)
+    monkeypatch.setattr(bulk_ingestion_service, "minio_client", fake)
+    monkeypatch.setattr(
+        sync_service,
+        "BulkIngestion",
+        functools.partial(
+            bulk_ingestion_service.BulkIngestion, parse_executor="thread"
+        ),
+    )
+    monkeypatch.setattr(sync_service, "SYNC_LOCK_PATH", str(tmp_path / "sync.lock"))
+    monkeypatch.setattr(sync_service, "active_documents", set)
+    return fake
+
+
+@pytest.fixture
+def invalidated(monkeypatch):
+    names = []
+    monkeypatch.setattr(sync_service.answer_cache, "invalidate_documents", names.extend)
+    return names
+
+
+def _indexed_names(index) -> list:
+    points, _ = index.client.scroll(index.collection_name, limit=1000)
+    return sorted({point.payload["document_name"] for point in points})
+
+
+def test_dry_run_reports_without_indexing(bucket, empty_index):
+    bucket.put("a.txt", "alpha ")
+
+    summary = sync_service.sync_bucket(BUCKET, dry_run=True)
+
+    assert summary["new"] == ["a.txt"]
+    assert summary["dry_run"] is True
+    assert "ingestion" not in summary
+    assert empty_index.list_indexed_documents() == {}
+
+
+def test_sync_ingests_new_changed_and_drops_removed_documents(
+    bucket, empty_index, invalidated, monkeypatch
+):
+    for name in ("a.txt", "b.txt", "c.txt"):
+        bucket.put(name, f"{name} first revision ")
+    first = sync_service.sync_bucket(BUCKET)
+    assert first["new"] == ["a.txt", "b.txt", "c.txt"]
+    assert first["ingestion"]["documents"] == 3
+    records = empty_index.list_indexed_documents()
+    assert records["a.txt"]["source_etag"] == bucket.objects["a.txt"][0].etag
+
+    bucket.put("a.txt", "a.txt second revision ")
+    bucket.remove("b.txt")
+    bucket.put("d.txt", "brand new ")
+    bucket.put("e.txt", "being uploaded right now ")
+    monkeypatch.setattr(sync_service, "active_documents", lambda: {"e.txt"})
+
+    plan = sync_service.sync_bucket(BUCKET, dry_run=True)
+    summary = sync_service.sync_bucket(BUCKET)
+
+    for report in (plan, summary):
+        assert report["new"] == ["d.txt"]
+        assert report["changed"] == ["a.txt"]
+        assert report["removed"] == ["b.txt"]
+        assert report["skipped_in_flight"] == ["e.txt"]
+    assert summary["ingestion"]["documents"] == 2
+    assert _indexed_names(empty_index) == ["a.txt", "c.txt", "d.txt"]
+    records = empty_index.list_indexed_documents()
+    assert sorted(records) == ["a.txt", "c.txt", "d.txt"]
+    assert records["a.txt"]["source_etag"] == bucket.objects["a.txt"][0].etag
+    assert sorted(invalidated) == ["a.txt", "b.txt"]
+
+
+def test_unchanged_bucket_is_a_no_op(bucket, invalidated):
+    bucket.put("a.txt", "alpha ")
+    sync_service.sync_bucket(BUCKET)
+
+    summary = sync_service.sync_bucket(BUCKET)
+
+    assert (summary["new"], summary["changed"], summary["removed"]) == ([], [], [])
+    assert "ingestion" not in summary
+    assert invalidated == []
+
+
+def test_records_of_other_buckets_are_left_alone(bucket, empty_index):
+    empty_index.record_indexed_document(
+        "elsewhere.txt", "hash", 1, source_bucket="archive", source_etag="x"
+    )
+
+    summary = sync_service.sync_bucket(BUCKET)
+
+    assert summary["removed"] == []
+    assert "elsewhere.txt" in empty_index.list_indexed_documents()
+
+
+def test_staleness_falls_back_to_the_modification_time():
+    source = bulk_ingestion_service.Source(
+        "a.txt", "etag-2", metadata={"source_last_modified": "2024-01-02T00:00:00"}
+    )
+
+    assert sync_service._is_stale({"source_etag": "etag-1"}, source)
+    assert not sync_service._is_stale({"source_etag": "etag-2"}, source)
+    # An upload that reported no etag is compared by modification time
+    same = {"source_etag": None, "source_last_modified": "2024-01-02T00:00:00"}
+    older = {"source_etag": None, "source_last_modified": "2024-01-01T00:00:00"}
+    assert not sync_service._is_stale(same, source)
+    assert sync_service._is_stale(older, source)
+    assert sync_service._is_stale({}, source)
@@ -0,0 +1,169 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.requests import ClientDisconnect, Request
+
+from app.service import upload_stream
+from app.service.upload_stream import UploadRejectedError, _Pipe, receive_upload
+
+BOUNDARY = b"upload-boundary"
+CONTENT = b"".join(b"line %d of the document\n" % i for i in range(20000))
+
+
+class FakeBucket:
+    """Stands in for `upload_stream_to_bucket`, reading the pipe like MinIO."""
+
+    def __init__(self, fail_after: int = None):
+        self.objects = {}
+        self.reads = 0
+        self.fail_after = fail_after
+
+    def __call__(self, data, object_name, bucket_name, content_type=None):
+        received = []
+        while chunk := data.read(5000):
+            self.reads += 1
+            if self.reads == self.fail_after:
+                raise ConnectionError("bucket went away")
+            received.append(chunk)
+        self.objects[(bucket_name, object_name)] = (b"".join(received), content_type)
+        return object_name
+
+
+@pytest.fixture(autouse=True)
+def temp_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    return tmp_path
+
+
+def _multipart(filename: str, content: bytes) -> bytes:
+    return (
+        b"--" + BOUNDARY + b"\r\n"
+        b'Content-Disposition: form-data; name="note"\r\n\r\nhello\r\n'
+        b"--" + BOUNDARY + b"\r\n"
+        b'Content-Disposition: form-data; name="file"; filename="'
+        + filename.encode()
+        + b'"\r\nContent-Type: text/plain\r\n\r\n'
+        + content
+        + b"\r\n--"
+        + BOUNDARY
+        + b"--\r\n"
+    )
+
+
+def _request(body: bytes, chunk_size: int = 64 * 1024, disconnect_at: int = None):
+    """An ASGI request that delivers `body` in chunks, optionally cut short."""
+    chunks = [body[i : i + chunk_size] for i in range(0, len(body), chunk_size)]
+    messages = iter(chunks)
+    sent = 0
+
+    async def receive():
+        nonlocal sent
+        if sent == disconnect_at:
+            return {"type": "http.disconnect"}
+        sent += 1
+        chunk = next(messages)
+        return {"type": "http.request", "body": chunk, "more_body": sent < len(chunks)}
+
+    content_type = b"multipart/form-data; boundary=" + BOUNDARY
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/documents",
+        "headers": [(b"content-type", content_type)],
+    }
+    return Request(scope, receive)
+
+
+def test_upload_is_stored_hashed_and_kept_in_one_pass(monkeypatch, temp_dir):
+    bucket = FakeBucket()
+    monkeypatch.setattr(upload_stream, "upload_stream_to_bucket", bucket)
+    app = FastAPI()
+
+    @app.post("/documents")
+    async def upload(request: Request):
+        received = await receive_upload(request, "documents")
+        stored = await received.stored
+        return {**received.__dict__, "stored": stored}
+
+    files = {"file": ("report.txt", CONTENT, "text/plain")}
+    response = TestClient(app).post("/documents", data={"note": "hi"}, files=files)
+
+    result = response.json()
+    assert result["stored"] == "report.txt"
+    assert result["size"] == len(CONTENT)
+    assert result["document_hash"] == hashlib.sha256(CONTENT).hexdigest()
+    assert bucket.objects[("documents", "report.txt")] == (CONTENT, "text/plain")
+    # The same bytes were teed into the local copy the ingestion job parses
+    assert os.path.dirname(result["file_path"]) == str(temp_dir)
+    with open(result["file_path"], "rb") as f:
+        assert f.read() == CONTENT
+
+
+def test_unsupported_and_missing_files_are_rejected(monkeypatch, temp_dir):
+    monkeypatch.setattr(upload_stream, "upload_stream_to_bucket", FakeBucket())
+
+    with pytest.raises(UploadRejectedError, match="Unsupported document type"):
+        asyncio.run(receive_upload(_request(_multipart("tool.exe", b"MZ")), "b"))
+    with pytest.raises(UploadRejectedError, match="File not provided"):
+        asyncio.run(receive_upload(_request(_multipart("", b"")), "b"))
+    assert list(temp_dir.iterdir()) == []
+
+
+def test_client_disconnect_aborts_the_put_and_removes_the_copy(monkeypatch, temp_dir):
+    bucket = FakeBucket()
+    monkeypatch.setattr(upload_stream, "upload_stream_to_bucket", bucket)
+    request = _request(_multipart("report.txt", CONTENT), disconnect_at=3)
+
+    with pytest.raises(ClientDisconnect):
+        asyncio.run(receive_upload(request, "documents"))
+
+    # The put saw the error instead of an end of stream, so nothing is stored
+    assert bucket.objects == {}
+    assert bucket.reads > 0
+    assert list(temp_dir.iterdir()) == []
+
+
+def test_failed_put_stops_the_upload(monkeypatch, temp_dir):
+    bucket = FakeBucket(fail_after=2)
+    monkeypatch.setattr(upload_stream, "upload_stream_to_bucket", bucket)
+    monkeypatch.setattr(upload_stream, "UPLOAD_PIPE_DEPTH", 1)
+    request = _request(_multipart("report.txt", CONTENT), chunk_size=4096)
+
+    with pytest.raises(ConnectionError, match="bucket went away"):
+        asyncio.run(receive_upload(request, "documents"))
+
+    assert bucket.objects == {}
+    assert list(temp_dir.iterdir()) == []
+
+
+def test_pipe_holds_back_the_writer_while_the_reader_is_behind():
+    resume = threading.Event()
+    read = []
+
+    def slow_reader(pipe):
+        resume.wait(5)
+        while chunk := pipe.read():
+            read.append(chunk)
+        return b"".join(read)
+
+    async def scenario():
+        pipe = _Pipe(asyncio.get_running_loop(), depth=2)
+        pipe.reader = asyncio.ensure_future(asyncio.to_thread(slow_reader, pipe))
+        await pipe.write(b"a")
+        await pipe.write(b"b")
+        # The queue is full: the third chunk waits for the reader
+        blocked = asyncio.ensure_future(pipe.write(b"c"))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+        resume.set()
+        await asyncio.wait_for(blocked, 1)
+        await pipe.close()
+        return await pipe.reader
+
+    assert asyncio.run(scenario()) == b"abc"
@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+
+from app.mcp import web_search_tool
+from app.mcp.web_search_tool import (
+    FakeSearchBackend,
+    SearchBackend,
+    SearchResultCache,
+)
+
+
+class CountingFetch:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("search failed")
+        return [{"href": f"https://example.com/{self.calls}"}]
+
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+    backend = FakeSearchBackend(latency=0.2)
+    monkeypatch.setattr(web_search_tool, "_backend", backend)
+    monkeypatch.setattr(web_search_tool, "search_cache", SearchResultCache())
+    return backend
+
+
+def test_concurrent_identical_searches_share_one_backend_call(fake_backend):
+    threads = 8
+    barrier = threading.Barrier(threads)
+    results = []
+
+    def search(query: str):
+        barrier.wait()
+        results.append(web_search_tool.perform_web_search(query, max_results=3))
+
+    queries = ["Python asyncio", "  python   ASYNCIO "] * (threads // 2)
+    workers = [threading.Thread(target=search, args=(q,)) for q in queries]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert fake_backend.calls == 1
+    assert len({tuple(r["href"] for r in result["results"]) for result in results}) == 1
+    stats = web_search_tool.search_cache.stats()
+    assert stats["misses"] == 1
+    assert stats["coalesced"] == threads - 1
+
+
+def test_entries_expire_after_the_ttl():
+    cache = SearchResultCache(ttl=0.05, max_entries=8)
+    fetch = CountingFetch()
+
+    first = cache.get_or_fetch("key", fetch)
+    assert cache.get_or_fetch("key", fetch) == first
+    assert fetch.calls == 1
+
+    time.sleep(0.1)
+    assert cache.get_or_fetch("key", fetch) != first
+    assert fetch.calls == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SearchResultCache(ttl=60, max_entries=2)
+    fetch = CountingFetch()
+
+    cache.get_or_fetch("a", fetch)
+    cache.get_or_fetch("b", fetch)
+    cache.get_or_fetch("a", fetch)  # "b" is now the least recently used
+    cache.get_or_fetch("c", fetch)
+    assert fetch.calls == 3
+
+    cache.get_or_fetch("a", fetch)
+    assert fetch.calls == 3
+    cache.get_or_fetch("b", fetch)
+    assert fetch.calls == 4
+    assert cache.stats()["size"] == 2
+
+
+def test_failures_are_not_cached():
+    cache = SearchResultCache(ttl=60, max_entries=8)
+    failing = CountingFetch(fail=True)
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_fetch("key", failing)
+
+    fetch = CountingFetch()
+    assert cache.get_or_fetch("key", fetch) == [{"href": "https://example.com/1"}]
+    assert failing.calls == fetch.calls == 1
+
+
+def test_backends_must_implement_search():
+    class Incomplete(SearchBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError, match="search"):
+        Incomplete()
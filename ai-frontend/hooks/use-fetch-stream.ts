@@ -25,24 +25,38 @@ export function useFetchStream() {
       const decoder = new TextDecoder("utf-8");
 
       let partialText = "";
-      while (true) {
+      // Frames are newline-delimited JSON; a read may end mid-frame
+      let buffered = "";
+      let finished = false;
+      while (!finished) {
         const { done, value } = await reader.read();
-        const decodedResponse: any = decoder.decode(value, { stream: true });
+        buffered += decoder.decode(value, { stream: !done });
         setLoading(false);
-        try {
-          const response: any = JSON.parse(decodedResponse);
-
-          partialText += response.response;
-          setMessage({
-            role: response?.role,
-            content: partialText,
-            created_at: new Date(response?.created_at),
-            done: response?.done,
-          });
-          if (response?.done) {
-            break;
-          }
-        } catch (e: any) {}
+
+        const lines = buffered.split("\n");
+        buffered = done ? "" : lines.pop() ?? "";
+        for (const line of lines) {
+          const frame = line.startsWith("data: ") ? line.slice(6) : line;
+          if (!frame.trim()) continue;
+          try {
+            const response: any = JSON.parse(frame);
+            // Agent progress events carry no answer tokens
+            if (response?.event) continue;
+
+            partialText += response.response ?? "";
+            setMessage({
+              role: response?.role ?? "assistant",
+              content: partialText,
+              created_at: new Date(response?.created_at ?? Date.now()),
+              done: response?.done,
+            });
+            if (response?.done) {
+              finished = true;
+              break;
+            }
+          } catch (e: any) {}
+        }
+        if (done) break;
       }
     } catch (err) {
       console.error("Streaming error", err);